@@ -0,0 +1,116 @@
+#!/bin/env python3
+"""
+Measure time and peak memory of core operations on synthetic corpora of
+growing scale. Runs headless: Qt models use the offscreen platform
+"""
+
+import gc
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+from tempfile import mkdtemp
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, create_corpus
+from json_override_test_assignment.tree import TreeItem, TreeModel
+
+# name: create_corpus() options
+SCALES = {
+    "small": dict(files=10, depth=2, fanout=(2, 5), list_length=(2, 5)),
+    "medium": dict(files=50, depth=3, fanout=(5, 10), list_length=(10, 50),
+                   size=10_000_000),
+    "large": dict(files=200, depth=4, fanout=(5, 10), list_length=(10, 100),
+                  size=100_000_000),
+}
+
+
+def first_leaf_override(configs: Configs) -> dict:
+    """Return override changing the first leaf of every config"""
+    override = {}
+    for name, value in configs.items():
+        path = [name]
+        while isinstance(value, dict) and value:
+            key = next(iter(value))
+            path.append(key)
+            value = value[key]
+        node = override
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = ["changed"] if isinstance(value, list) else "changed"
+    return override
+
+
+def measure(operation) -> tuple:
+    """Return (seconds, peak bytes) of given operation. Time and memory are
+    measured in separate runs since tracing slows the operation down"""
+    gc.collect()
+    started = time.perf_counter()
+    operation()
+    elapsed = time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench(directory: str) -> dict:
+    """Return {operation: (seconds, peak bytes)} for corpus in directory"""
+    original = Configs.from_config_dir(directory)
+    override = first_leaf_override(original)
+    actual = Configs.override(original, override)
+    overrides = Configs.diff(original, actual)
+    dump_file = f"{directory}/overrides.json"
+
+    # note: measure() runs an operation twice, patch needs a fresh copy
+    copies = [Configs.override(original, {}) for _ in range(2)]
+
+    def patch():
+        Configs.patch(copies.pop(), original, Configs(), override)
+
+    def model_load():
+        TreeModel().load(actual)
+
+    return {
+        "from_config_dir": measure(lambda: Configs.from_config_dir(directory)),
+        "override": measure(lambda: Configs.override(original, override)),
+        "diff": measure(lambda: Configs.diff(original, actual)),
+        "patch": measure(patch),
+        "dump overrides": measure(lambda: overrides.dump(dump_file)),
+        "dump configs": measure(lambda: actual.dump(dump_file)),
+        "TreeItem.load": measure(lambda: TreeItem.load(actual)),
+        "TreeModel.load": measure(model_load),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", nargs="+", choices=SCALES,
+                        default=["small", "medium"])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        tmp_dir = mkdtemp()
+        try:
+            create_corpus(tmp_dir, seed=args.seed, **SCALES[scale])
+            size = sum(os.path.getsize(f"{tmp_dir}/{f}")
+                       for f in os.listdir(tmp_dir))
+            results = bench(tmp_dir)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        print(f"{scale} ({SCALES[scale]['files']} files, "
+              f"{size / 1e6:.1f} MB)")
+        print(f"  {'operation':22}{'time, s':>10}{'peak, MB':>10}")
+        for operation, (elapsed, peak) in results.items():
+            print(f"  {operation:22}{elapsed:>10.3f}{peak / 1e6:>10.1f}")
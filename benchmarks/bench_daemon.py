@@ -0,0 +1,109 @@
+#!/bin/env python3
+"""
+Load-test ConfigsServer: client threads share a pooled ConfigsClient and
+request random paths (and snapshots of single configs), throughput and
+latency percentiles are reported
+"""
+
+import random
+import shutil
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath, join
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import ConfigsClient, ConfigsServer, \
+    create_corpus
+
+
+def leaf_paths(configs: dict) -> list:
+    """Return JSON Pointers of leaves outside lists"""
+    paths, stack = [], [("/" + k, v) for k, v in configs.items()]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((f"{path}/{k}", v) for k, v in value.items())
+        elif not isinstance(value, list):
+            paths.append(path)
+    return paths
+
+
+def load(client: ConfigsClient, requests: list, threads: int) -> list:
+    """Send given (operation, argument) requests from given number of
+    threads, return latencies in seconds"""
+    latencies = []
+    chunks = [requests[i::threads] for i in range(threads)]
+
+    def worker(chunk: list):
+        measured = []
+        for operation, argument in chunk:
+            started = time.perf_counter()
+            operation(argument)
+            measured.append(time.perf_counter() - started)
+        latencies.extend(measured)
+
+    workers = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies
+
+
+def report(name: str, latencies: list, elapsed: float):
+    latencies = sorted(latencies)
+
+    def percentile(share: float) -> float:
+        return latencies[min(int(share * len(latencies)),
+                             len(latencies) - 1)] * 1e6
+
+    print(f"{name:10}{len(latencies) / elapsed:>12.0f}"
+          f"{percentile(0.5):>10.1f}{percentile(0.99):>10.1f}"
+          f"{percentile(0.999):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", type=int, default=5_000_000,
+                        help="total size of config files in bytes")
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    directory = mkdtemp()
+    server = None
+    try:
+        create_corpus(directory, args.files, seed=1, depth=3,
+                      fanout=(5, 10), list_length=(5, 20), size=args.size)
+        with open(join(directory, "overrides.json"), "w") as f:
+            f.write("{}")
+        server = ConfigsServer(join(directory, "configs.sock"), directory,
+                               join(directory, "overrides.json"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        rng = random.Random(1)
+        paths = leaf_paths(server.configs)
+        names = list(server.configs)
+        with ConfigsClient(server.server_address, args.pool_size) as client:
+            print(f"{'request':10}{'req/s':>12}{'p50 us':>10}{'p99 us':>10}"
+                  f"{'p99.9 us':>10}")
+            for name, operation, arguments in (
+                    ("get", client.get, paths),
+                    ("snapshot", client.snapshot, names)):
+                requests = [(operation, rng.choice(arguments))
+                            for _ in range(args.requests)]
+                started = time.perf_counter()
+                latencies = load(client, requests, args.threads)
+                report(name, latencies, time.perf_counter() - started)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(directory)
@@ -0,0 +1,70 @@
+#!/bin/env python3
+"""Measure diff, override, patch and tree loading of deeply nested configs,
+deeper than the recursion limit allows"""
+
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs
+from json_override_test_assignment.tree import TreeItem
+
+
+def deep_document(depth: int, leaf) -> Configs:
+    """Return configs with dicts nested "depth" levels deep and a list of
+    scalars and a list of dicts on each level"""
+    document = node = {}
+    for level in range(depth - 1):
+        node["values"] = [level, str(level)]
+        node["items"] = [{"level": level}]
+        node = node.setdefault("child", {})
+    node["leaf"] = leaf
+    return Configs(config=document)
+
+
+def bench(function, repeat: int, setup=lambda: ()) -> float:
+    """Return the shortest time of function(*setup()) in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        args = setup()
+        started = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--depths", type=int, nargs="+",
+                        default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"recursion limit: {sys.getrecursionlimit()}")
+    operations = ("diff", "sparse diff", "override", "share", "patch",
+                  "tree load")
+    print(f"{'depth':>8}" + "".join(f"{name + ', s':>16}"
+                                    for name in operations))
+    for depth in args.depths:
+        original = deep_document(depth, "value")
+        changed = deep_document(depth, "changed")
+        over = Configs.diff(original, changed)
+
+        timings = [
+            bench(lambda: Configs.diff(original, changed), args.repeat),
+            bench(lambda: Configs.diff(original, changed, sparse_lists=True),
+                  args.repeat),
+            bench(lambda: Configs.override(original, over), args.repeat),
+            bench(lambda: Configs.override(original, over, share=True),
+                  args.repeat),
+            bench(lambda actual: Configs.patch(actual, original, Configs(),
+                                               over, verify=True),
+                  args.repeat,
+                  lambda: (Configs.override(original, {}),)),
+            bench(lambda: TreeItem.load(original), args.repeat)]
+        print(f"{depth:>8}" + "".join(f"{timing:>16.4f}"
+                                      for timing in timings))
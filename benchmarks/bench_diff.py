@@ -0,0 +1,83 @@
+#!/bin/env python3
+"""Compare single-pass Configs.diff with the previous per-level diff"""
+
+import sys
+import time
+from argparse import ArgumentParser
+from copy import deepcopy
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs
+
+
+def previous_diff(orig: dict, alter: dict) -> dict:
+    """Configs.diff before the single-pass engine: deep comparison at each
+    level and recursion into the same subtrees"""
+    diff_dict = {}
+    for key in filter(lambda k: orig[k] != alter[k], alter):
+        if isinstance(orig[key], dict):
+            diff_dict[key] = previous_diff(orig[key], alter[key])
+        else:
+            diff_dict[key] = alter[key]
+    return diff_dict
+
+
+def deep_document(depth: int, fanout: int) -> tuple:
+    """Return (document, path to the deepest leaf) with "depth" levels"""
+    document = node = {}
+    path = []
+    for level in range(depth):
+        for i in range(fanout - 1):
+            node[f"key{i}"] = [f"value{i}"] * fanout
+        node[f"key{fanout - 1}"] = child = {}
+        path.append(f"key{fanout - 1}")
+        node = child
+    node["leaf"] = "value"
+    return document, path + ["leaf"]
+
+
+def wide_document(width: int, list_length: int) -> tuple:
+    """Return (document, path to a leaf) with "width" keys on two levels"""
+    values = [f"value{k}" for k in range(list_length)]
+    document = {f"key{i}": {f"key{j}": list(values) for j in range(width)}
+                for i in range(width)}
+    return document, ["key0", "key0"]
+
+
+def bench(function, orig: dict, alter: dict, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function(orig, alter)
+    return (time.perf_counter() - started) / repeat
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10000)
+    documents = {"deep (depth 200)": deep_document(200, 10),
+                 "deep (depth 800)": deep_document(800, 10),
+                 "wide (300x300)": wide_document(300, 5)}
+
+    print(f"{'document':20}{'previous, s':>14}{'single-pass, s':>16}"
+          f"{'json patch, s':>15}")
+    for name, (document, path) in documents.items():
+        altered = deepcopy(document)
+        node = altered
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = "changed"
+
+        assert Configs.diff(document, altered) == \
+            previous_diff(document, altered)
+
+        timings = [bench(function, document, altered, args.repeat)
+                   for function in (previous_diff, Configs.diff,
+                                    Configs.json_patch)]
+        print(f"{name:20}{timings[0]:>14.4f}{timings[1]:>16.4f}"
+              f"{timings[2]:>15.4f}")
@@ -0,0 +1,92 @@
+#!/bin/env python3
+"""
+Measure memory and time of keeping every version of configs across a series
+of single-leaf edits: full private copies (Configs.override()) against
+copy-on-write versions (Configs.with_path()) and EditHistory steps
+"""
+
+import gc
+import random
+import shutil
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, create_corpus
+from json_override_test_assignment.tree import EditHistory
+
+
+def leaf_paths(configs: Configs) -> list:
+    """Return paths of leaves outside lists"""
+    paths, stack = [], [((k,), v) for k, v in configs.items()]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((path + (k,), v) for k, v in value.items())
+        elif not isinstance(value, list):
+            paths.append(path)
+    return paths
+
+
+def measure(name: str, keep_versions):
+    """Print time and memory retained by given function"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    versions = keep_versions()
+    elapsed = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{name:14}{elapsed:>10.3f}{retained / 2 ** 20:>12.2f}"
+          f"{retained / len(versions):>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", type=int, default=5_000_000,
+                        help="total size of config files in bytes")
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--full-edits", type=int, default=5,
+                        help="number of edits kept as full copies")
+    args = parser.parse_args()
+
+    directory = mkdtemp()
+    try:
+        create_corpus(directory, args.files, seed=1, depth=3,
+                      fanout=(5, 10), list_length=(5, 20), size=args.size)
+        configs = Configs.from_config_dir(directory)
+    finally:
+        shutil.rmtree(directory)
+
+    edits = random.Random(1).sample(leaf_paths(configs), args.edits)
+
+    def full_copies():
+        versions = [configs]
+        for path in edits[:args.full_edits]:
+            versions.append(Configs.override(
+                versions[-1], Configs.from_path(path, "edited")))
+        return versions[1:]
+
+    def shared_versions():
+        versions = [configs]
+        for path in edits:
+            versions.append(versions[-1].with_path(path, "edited"))
+        return versions[1:]
+
+    def history_steps():
+        history = EditHistory(limit=len(edits))
+        for path in edits:
+            history.push([(path, str(configs.get_path(path)), "edited")])
+        return history
+
+    print(f"{'versions':14}{'s':>10}{'MiB':>12}{'B/version':>14}")
+    measure("override", full_copies)
+    measure("with_path", shared_versions)
+    measure("EditHistory", history_steps)
@@ -0,0 +1,78 @@
+#!/bin/env python3
+"""
+Measure cost of persisting a series of single-leaf edits with overrides of
+growing size: rewriting the whole overrides file (what OverridesWriter does
+per write) against appending journal records, compactions included
+"""
+
+import random
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath, join
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, OverridesJournal, \
+    atomic_write
+
+
+def make_overrides(leaves: int) -> Configs:
+    """Return overrides with given number of leaves, 100 per config"""
+    overrides = Configs()
+    for i in range(leaves):
+        overrides.setdefault(f"config{i // 100}", {})[f"param{i % 100}"] = \
+            f"value{i}"
+    return overrides
+
+
+def edits(overrides: Configs, count: int) -> list:
+    """Return (config, param, value) edits of random leaves"""
+    rng = random.Random(1)
+    names = list(overrides)
+    result = []
+    for i in range(count):
+        name = rng.choice(names)
+        result.append((name, rng.choice(list(overrides[name])), f"edit{i}"))
+    return result
+
+
+def rewrite(directory: str, overrides: Configs, changes: list):
+    filename = join(directory, "overrides.json")
+    for name, param, value in changes:
+        overrides[name][param] = value
+        atomic_write(filename, overrides.dumps())
+
+
+def journal(directory: str, overrides: Configs, changes: list):
+    storage = OverridesJournal(join(directory, "overrides.json"))
+    for name, param, value in changes:
+        with storage.lock:
+            overrides[name][param] = value
+        storage.append({name: {param: value}}, overrides)
+    storage.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--leaves", type=int, nargs="+",
+                        default=[100, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'leaves':>10}{'rewrite ms/edit':>18}{'journal ms/edit':>18}")
+    for leaves in args.leaves:
+        changes = edits(make_overrides(leaves), args.edits)
+        times = []
+        for persist in (rewrite, journal):
+            directory = mkdtemp()
+            try:
+                started = time.perf_counter()
+                persist(directory, make_overrides(leaves), changes)
+                times.append((time.perf_counter() - started) / args.edits)
+            finally:
+                shutil.rmtree(directory)
+        print(f"{leaves:>10}" + "".join(f"{t * 1e3:>18.3f}" for t in times))
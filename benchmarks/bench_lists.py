@@ -0,0 +1,57 @@
+#!/bin/env python3
+"""
+Measure single-element edits of a long list: time of Configs.patch() and
+size of the resulting overrides with whole-list and sparse list overrides
+"""
+
+import random
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs
+
+
+def edit(original: Configs, indices: list, sparse_lists: bool) -> tuple:
+    """Edit given elements one by one, return mean time of patch() and
+    size of overrides in bytes"""
+    actual = Configs.override(original, {})
+    overrides = Configs()
+    elements = actual["config"]["list"]
+    started = time.perf_counter()
+    for index in indices:
+        if sparse_lists:
+            over = {"config": {"list": {"$list": True,
+                                        str(index): "edited"}}}
+        else:
+            # what the model emits for whole-list overrides
+            values = list(elements)
+            values[index] = "edited"
+            over = {"config": {"list": values}}
+        Configs.patch(actual, original, overrides, over,
+                      sparse_lists=sparse_lists)
+        elements = actual["config"]["list"]
+    elapsed = (time.perf_counter() - started) / len(indices)
+    return elapsed, len(overrides.dumps())
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+",
+                        default=[1_000, 100_000])
+    parser.add_argument("--edits", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'length':>10}{'mode':>8}{'patch ms':>12}{'overrides KB':>14}")
+    for length in args.lengths:
+        original = Configs({"config": {"list": [f"value{i}"
+                                                for i in range(length)]}})
+        indices = random.Random(1).sample(range(length), args.edits)
+        for mode, sparse in (("whole", False), ("sparse", True)):
+            elapsed, size = edit(original, indices, sparse)
+            print(f"{length:>10}{mode:>8}{elapsed * 1e3:>12.3f}"
+                  f"{size / 1e3:>14.1f}")
@@ -0,0 +1,62 @@
+#!/bin/env python3
+"""
+Measure loading a corpus generated by create_corpus() with every available
+JSON parser backend: Configs.from_config_dir() on a single thread and with
+a process pool, and which backend the self-benchmark selects
+"""
+
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, available_parsers, \
+    create_corpus, select_parser
+
+
+def best_of(repeat: int, function) -> float:
+    """Return the shortest time of given number of calls in seconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", type=int, nargs="+",
+                        default=[1_000_000, 20_000_000],
+                        help="total size of config files in bytes")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    selected = select_parser()
+    print(f"self-benchmark selected {selected} in "
+          f"{(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    print(f"{'size MB':>8}{'parser':>10}{'serial s':>10}{'processes s':>13}")
+    for size in args.size:
+        directory = mkdtemp()
+        try:
+            create_corpus(directory, args.files, seed=1, depth=3,
+                          fanout=(5, 10), list_length=(5, 20), size=size)
+            for name in available_parsers():
+                select_parser(name)
+                serial = best_of(args.repeat,
+                                 lambda: Configs.from_config_dir(directory))
+                pooled = best_of(args.repeat, lambda: Configs.from_config_dir(
+                    directory, workers=args.workers, processes=True))
+                print(f"{size / 1e6:>8.0f}{name:>10}{serial:>10.3f}"
+                      f"{pooled:>13.3f}")
+        finally:
+            shutil.rmtree(directory)
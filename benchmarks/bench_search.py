@@ -0,0 +1,57 @@
+#!/bin/env python3
+"""Measure SearchIndex build time and latency of typical queries"""
+
+import gc
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, SearchIndex, create_corpus
+
+QUERIES = (("param12", True), ("config3.param2", True), ("key7", False),
+           ("alue1", False), ("g3.param2.key1", False), ("missing", False))
+
+
+def query_time(index: SearchIndex, text: str, prefix: bool,
+               repeat: int) -> tuple:
+    """Return (number of matches, mean seconds) of given query"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        matches = index.search(text, prefix)
+    return len(matches), (time.perf_counter() - started) / repeat
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", type=int, default=10_000_000,
+                        help="total size of config files in bytes")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        create_corpus(directory, args.files, seed=1, depth=3,
+                      fanout=(5, 10), list_length=(5, 20), size=args.size)
+        configs = Configs.from_config_dir(directory)
+    finally:
+        shutil.rmtree(directory)
+
+    gc.collect()
+    started = time.perf_counter()
+    search_index = SearchIndex.build(configs)
+    print(f"nodes: {len(search_index)}, "
+          f"build: {time.perf_counter() - started:.3f} s")
+
+    print(f"{'query':24}{'prefix':>8}{'matches':>10}{'ms':>10}")
+    for query, is_prefix in QUERIES:
+        count, elapsed = query_time(search_index, query, is_prefix,
+                                    args.repeat)
+        print(f"{query:24}{str(is_prefix):>8}{count:>10}"
+              f"{elapsed * 1000:>10.3f}")
@@ -0,0 +1,82 @@
+#!/bin/env python3
+"""
+Measure dumping merged configs generated by create_corpus(): json.dumps()
+with indentation (what Configs.dumps() used to do) against the byte-identical
+and the fast (orjson, if installed) modes of encode_json(), compact encoding
+and a streamed Configs.dump() into a file
+"""
+
+import json
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath, join
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, create_corpus, \
+    encode_json
+from json_override_test_assignment import _serialize
+
+
+def best_of(repeat: int, function) -> float:
+    """Return the shortest time of given number of calls in seconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", type=int, nargs="+",
+                        default=[1_000_000, 20_000_000],
+                        help="total size of config files in bytes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sort-keys", action="store_true")
+    args = parser.parse_args()
+    sort_keys = args.sort_keys
+
+    print(f"orjson: {'installed' if _serialize._orjson else 'missing'}")
+    cases = {
+        "json.dumps indent": lambda c: json.dumps(c, indent=2,
+                                                  sort_keys=sort_keys),
+        "compatible": lambda c: encode_json(c, sort_keys=sort_keys,
+                                            compatible=True),
+        "fast": lambda c: encode_json(c, sort_keys=sort_keys),
+        "compact compatible": lambda c: encode_json(c, compact=True,
+                                                    sort_keys=sort_keys,
+                                                    compatible=True),
+        "compact fast": lambda c: encode_json(c, compact=True,
+                                              sort_keys=sort_keys),
+    }
+    print(f"{'size MB':>8}{'mode':>20}{'seconds':>10}{'speedup':>9}")
+    for size in args.size:
+        directory = mkdtemp()
+        try:
+            create_corpus(directory, args.files, seed=1, depth=3,
+                          fanout=(5, 10), list_length=(5, 20), size=size)
+            configs = Configs.from_config_dir(directory)
+
+            baseline = None
+            for mode, encode in cases.items():
+                elapsed = best_of(args.repeat, lambda: encode(configs))
+                baseline = baseline or elapsed
+                print(f"{size / 1e6:>8.0f}{mode:>20}{elapsed:>10.3f}"
+                      f"{baseline / elapsed:>8.1f}x")
+
+            filename = join(directory, "merged.json")
+            for mode, compatible in (("dump compatible", True),
+                                     ("dump fast", False)):
+                elapsed = best_of(args.repeat, lambda: configs.dump(
+                    filename, sort_keys=sort_keys, compatible=compatible))
+                print(f"{size / 1e6:>8.0f}{mode:>20}{elapsed:>10.3f}"
+                      f"{baseline / elapsed:>8.1f}x")
+        finally:
+            shutil.rmtree(directory)
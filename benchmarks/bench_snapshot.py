@@ -0,0 +1,91 @@
+#!/bin/env python3
+"""
+Compare binary snapshots of merged configs with JSON: compile time and size,
+time to open a file and look up a few values, the way a short-lived
+consumer process reads its settings
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from os.path import dirname, abspath, join
+from tempfile import mkdtemp
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs, ConfigsSnapshot, \
+    create_corpus, write_snapshot
+
+
+def leaf_paths(configs: dict) -> list:
+    """Return paths of leaves outside lists"""
+    paths, stack = [], [((k,), v) for k, v in configs.items()]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((path + (k,), v) for k, v in value.items())
+        elif not isinstance(value, list):
+            paths.append(path)
+    return paths
+
+
+def best_of(repeat: int, function) -> float:
+    """Return the shortest time of given number of calls in seconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size", type=int, default=20_000_000,
+                        help="total size of config files in bytes")
+    parser.add_argument("--lookups", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = mkdtemp()
+    try:
+        create_corpus(directory, args.files, seed=1, depth=3,
+                      fanout=(5, 10), list_length=(5, 20), size=args.size)
+        configs = Configs.from_config_dir(directory)
+        json_file = join(directory, "merged.json")
+        snapshot_file = join(directory, "configs.snap")
+        paths = random.Random(1).sample(leaf_paths(configs), args.lookups)
+
+        json_time = best_of(args.repeat, lambda: Configs(configs).dump(
+            json_file))
+        snapshot_time = best_of(args.repeat, lambda: write_snapshot(
+            configs, snapshot_file))
+        print(f"{'format':10}{'write ms':>12}{'size MB':>12}{'read ms':>12}")
+
+        def read_json():
+            with open(json_file, "r") as f:
+                merged = json.load(f)
+            for path in paths:
+                value = merged
+                for key in path:
+                    value = value[key]
+
+        def read_snapshot():
+            with ConfigsSnapshot(snapshot_file) as snapshot:
+                for path in paths:
+                    snapshot.get(path)
+
+        for name, write_time, filename, read in (
+                ("json", json_time, json_file, read_json),
+                ("snapshot", snapshot_time, snapshot_file, read_snapshot)):
+            print(f"{name:10}{write_time * 1e3:>12.1f}"
+                  f"{os.path.getsize(filename) / 1e6:>12.1f}"
+                  f"{best_of(args.repeat, read) * 1e3:>12.3f}")
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,79 @@
+#!/bin/env python3
+"""Compare memory per node and lookup speed of TreeItem and TreeStore"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from json_override_test_assignment import Configs
+from json_override_test_assignment.tree import TreeItem, TreeStore
+
+
+def make_configs(configs: int, fanout: int, list_length: int) -> Configs:
+    """Create configs with nested dicts and long lists of strings"""
+    return Configs({f"config{c}": {
+        f"param{p}": {f"key{k}": f"value{k}" for k in range(fanout)}
+        if p % 2 else [f"value{i}" for i in range(list_length)]
+        for p in range(fanout)} for c in range(configs)})
+
+
+def measure(build) -> tuple:
+    """Return (result, seconds, allocated bytes) of given build function"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+
+def lookup_items(root: TreeItem) -> float:
+    """Time parent()+row() of every element of the longest list"""
+    lst = max((root.child(c).child(p) for c in range(root.child_count())
+               for p in range(root.child(c).child_count())),
+              key=TreeItem.child_count)
+    started = time.perf_counter()
+    for i in range(lst.child_count()):
+        lst.child(i).parent().row()
+        lst.child(i).row()
+    return time.perf_counter() - started
+
+
+def lookup_store(store: TreeStore) -> float:
+    """Time parent()+row() of every element of the longest list"""
+    lst = max(range(len(store)), key=store.child_count)
+    started = time.perf_counter()
+    for i in range(store.child_count(lst)):
+        node = store.child(lst, i)
+        store.row(store.parent(node))
+        store.row(node)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--configs", type=int, default=10)
+    parser.add_argument("--fanout", type=int, default=20)
+    parser.add_argument("--list-length", type=int, default=5000)
+    args = parser.parse_args()
+
+    data = make_configs(args.configs, args.fanout, args.list_length)
+
+    root, items_time, items_memory = measure(lambda: TreeItem.load(data))
+    store, store_time, store_memory = measure(lambda: TreeStore.load(data))
+    nodes = len(store)
+
+    print(f"nodes: {nodes}")
+    print(f"{'':10}{'build, s':>12}{'bytes/node':>12}{'lookups, s':>12}")
+    print(f"{'TreeItem':10}{items_time:>12.3f}{items_memory / nodes:>12.1f}"
+          f"{lookup_items(root):>12.3f}")
+    print(f"{'TreeStore':10}{store_time:>12.3f}{store_memory / nodes:>12.1f}"
+          f"{lookup_store(store):>12.3f}")
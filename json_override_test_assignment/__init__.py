@@ -1,6 +1,29 @@
 """Package public interface"""
 
-from ._app import Application
-from ._configs_handler import Configs
-from ._misc import create_json
+from ._cache import ConfigsCache
+from ._configs_handler import Configs, ConfigsLoadError
+from ._daemon import ConfigsServer, ConfigsClient
+from ._diff import apply_json_patch
+from ._journal import OverridesJournal
+from ._layers import OverrideLayers
+from ._lazy import LazyDocument, LazyDict
+from ._misc import create_json, create_corpus
+from ._parsers import available_parsers, benchmark_parsers, parse_json, \
+    register_parser, select_parser, selected_parser
 from ._paths import CONFIGS as CONFIGS_DIRECTORY, OVERRIDES as OVERRIDE_FILE
+from ._profiling import Profiler, enable_profiling, disable_profiling, \
+    profiling_from_environment
+from ._search import SearchIndex
+from ._serialize import encode_json, iterencode_json
+from ._snapshot import ConfigsSnapshot, compile_snapshot, write_snapshot
+from ._writer import OverridesWriter, atomic_write
+
+
+def __getattr__(name: str):
+    # note: Qt application is imported on first use, so the rest of the
+    # package can be used without loading PySide2
+    # pylint: disable=import-outside-toplevel
+    if name == "Application":
+        from ._app import Application
+        return Application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
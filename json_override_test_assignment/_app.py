@@ -1,62 +1,474 @@
 """Test assignment application module. Gather top-level logic of application"""
 
+import logging as _logging
+import os as _os
+import time as _time
+from copy import deepcopy as _deepcopy
+from typing import Union as _Union
+
 # pylint: disable=no-name-in-module
 from PySide2.QtWidgets import QApplication as _QApplication, \
-    QTreeView as _QTreeView, QHeaderView as _QHeaderView
-from PySide2.QtCore import QPoint as _QPoint
+    QTreeView as _QTreeView, QHeaderView as _QHeaderView, \
+    QProgressDialog as _QProgressDialog, QWidget as _QWidget, \
+    QVBoxLayout as _QVBoxLayout, QLineEdit as _QLineEdit, \
+    QShortcut as _QShortcut, QAbstractItemView as _QAbstractItemView, \
+    QInputDialog as _QInputDialog, QMessageBox as _QMessageBox
+from PySide2.QtGui import QKeySequence as _QKeySequence
+from PySide2.QtCore import QPoint as _QPoint, QTimer as _QTimer, \
+    Signal as _Signal
 
-from .tree import TreeModel as _JsonModel
+from .tree import TreeItem as _TreeItem, TreeModel as _JsonModel, \
+    ColumnarTreeModel as _ColumnarJsonModel, \
+    SearchFilterModel as _SearchFilterModel
+from ._cache import ConfigsCache as _ConfigsCache
 from ._configs_handler import Configs as _Configs
+from ._journal import OverridesJournal as _OverridesJournal
+from ._layers import OverrideLayers as _OverrideLayers
+from ._loader import ConfigsLoader as _ConfigsLoader
+from ._snapshot import compile_snapshot as _compile_snapshot
+from ._writer import OverridesWriter as _OverridesWriter
+from ._watcher import ConfigsWatcher as _ConfigsWatcher
 from . import _paths
 
+_logger = _logging.getLogger(__name__)
+
 
 class Application (_QApplication):
     """QApplication derive. """
     __original: _Configs
     __actual: _Configs
+    __overrides: _Configs
+
+    # emitted from writer threads with the file name and the error message
+    writeFailed = _Signal(str, str, name="writeFailed")
 
-    def __init__(self, title: str, configs_dir: str, overrides_file: str):
+    def __init__(self, title: str, configs_dir: str, overrides_file: str,
+                 verify_overrides: bool = False, write_window: float = 0.2,
+                 lazy_tree: bool = False, batch_size: int = 256,
+                 columnar_tree: bool = False, workers: int = None,
+                 processes: bool = False, cache: _ConfigsCache = None,
+                 watch: bool = False, lazy_configs: bool = False,
+                 progressive: bool = False, chunk_size: int = 16,
+                 search: bool = False, overrides_dir: str = None,
+                 snapshot_file: str = None, journal: bool = False,
+                 sparse_lists: bool = False):
+        """With "overrides_dir" overrides are layered, see OverrideLayers,
+        and "overrides_file" is the layer in that directory to edit. With
+        "snapshot_file" merged configs are compiled into it, see
+        ConfigsSnapshot, whenever they change. With "journal" edits are
+        appended to a journal compacted into "overrides_file" from time to
+        time, see OverridesJournal. With "sparse_lists" edited list elements
+        are saved instead of whole lists"""
+        assert not (progressive and overrides_dir), \
+            "layered overrides are not loaded progressively"
+        assert not (progressive and journal), \
+            "journaled overrides are not loaded progressively"
         self.setApplicationName(title)
         self.__configs_dir = configs_dir
         self.__overrides_file = overrides_file
+        self.__verify_overrides = verify_overrides
+        self.__lazy_tree = lazy_tree
+        self.__batch_size = batch_size
+        self.__columnar_tree = columnar_tree
+        self.__workers = workers
+        self.__processes = processes
+        self.__cache = cache
+        self.__watch_files = watch
+        self.__lazy_configs = lazy_configs
+        self.__progressive = progressive
+        self.__chunk_size = chunk_size
+        self.__search = search
+        self.__overrides_dir = overrides_dir
+        self.__layers = None
+        self.__model = None
+        self.__journal = journal
+        self.__sparse_lists = sparse_lists
+        self.__writer = _OverridesJournal(overrides_file) if journal else \
+            _OverridesWriter(overrides_file, write_window,
+                             on_error=lambda error: self.writeFailed.emit(
+                                 overrides_file, str(error)))
+        self.__snapshot_writer = None if snapshot_file is None else \
+            _OverridesWriter(snapshot_file, write_window, _compile_snapshot,
+                             self.__writer.lock, in_place=False,
+                             on_error=lambda error: self.writeFailed.emit(
+                                 snapshot_file, str(error)))
         _QApplication.__init__(self)
+        self.writeFailed.connect(self.__report_write_error)
+
+    @property
+    def writer(self) -> _Union[_OverridesWriter, _OverridesJournal]:
+        """Background writer of overrides.json. Provides write counters"""
+        return self.__writer
 
     def read_configs(self) -> _Configs:
         """Read JSON from config files and overrides. Return merged data"""
-        self.__original = _Configs.from_config_dir(self.__configs_dir)
+        self.__original = _Configs.from_config_dir(self.__configs_dir,
+                                                   self.__workers,
+                                                   self.__processes,
+                                                   self.__cache,
+                                                   self.__lazy_configs)
+        if self.__overrides_dir is not None:
+            return self.__read_layers()
         overrides = _Configs.from_override_file(self.__overrides_file)
-        return _Configs.override(self.__original, overrides)
+        actual = _Configs.override(self.__original, overrides)
+        self.__overrides = _Configs.diff(self.__original, actual,
+                                         self.__sparse_lists)
+        if self.__journal:
+            changesets = self.__writer.replay()
+            for override in changesets:
+                _Configs.patch(actual, self.__original, self.__overrides,
+                               override, sparse_lists=self.__sparse_lists)
+            if changesets:
+                self.__writer.submit(self.__overrides)
+        return actual
+
+    @property
+    def __target_layer(self) -> str:
+        return _os.path.splitext(_os.path.basename(self.__overrides_file))[0]
+
+    def __read_layers(self) -> _Configs:
+        """Read override layers on top of original configs, the edited one
+        must be among them"""
+        self.__layers = _OverrideLayers.from_directory(self.__original,
+                                                       self.__overrides_dir,
+                                                       self.__sparse_lists)
+        if self.__target_layer not in self.__layers.names:
+            raise ValueError(f"Layer \"{self.__overrides_file}\" not found in "
+                             f"\"{self.__overrides_dir}\"")
+        if self.__journal:
+            changesets = self.__writer.replay()
+            for override in changesets:
+                self.__layers.edit(self.__target_layer, override)
+            if changesets:
+                self.__writer.submit(
+                    self.__layers.layer(self.__target_layer))
+        self.__overrides = self.__layers.layer(self.__target_layer)
+        return self.__layers.actual
+
+    def __edit_layer(self, override: dict):
+        """Put user input into the edited layer. Values masked by the layers
+        above it are brought back in the model"""
+        layers, target = self.__layers, self.__target_layer
+        with self.__writer.lock:
+            layers.edit(target, override)
+            self.__overrides = layers.layer(target)
+            self.__actual = layers.actual
+
+        stack = [((k,), v) for k, v in override.items()]
+        while stack:
+            path, value = stack.pop()
+            if isinstance(value, dict):
+                stack.extend((path + (k,), v) for k, v in value.items())
+                continue
+            source = layers.source(path)
+            if source != target and layers.actual.has_path(path):
+                _logger.warning("/%s is overridden by layer \"%s\"",
+                                "/".join(map(str, path)), source)
+                self.__model.update(self.__actual, keys=path[:1])
 
     def on_override(self, override: dict):
         """
         Slot for a TreeModel "newOverride" signal. Catches user input and saves
         difference between original configs and actuals into overrides.json"""
-        self.__actual = _Configs.override(self.__actual, override)
-        _Configs.diff(self.__original,
-                      self.__actual).dump(self.__overrides_file)
+        if self.__layers is not None:
+            self.__edit_layer(override)
+        else:
+            with self.__writer.lock:
+                _Configs.patch(self.__actual, self.__original,
+                               self.__overrides, override,
+                               verify=self.__verify_overrides,
+                               sparse_lists=self.__sparse_lists)
+        if self.__journal:
+            self.__writer.append(override, self.__overrides)
+        else:
+            self.__writer.submit(self.__overrides)
+        self.__export()
+
+    def __export(self):
+        """Schedule compiling of merged configs into the snapshot file"""
+        if self.__snapshot_writer is not None:
+            self.__snapshot_writer.submit(self.__actual)
+
+    def __report_write_error(self, filename: str, message: str):
+        """Slot for "writeFailed" signal. Warn the user that edits are not
+        saved, the writer has logged the error already"""
+        _QMessageBox.warning(self.activeWindow(), self.applicationName(),
+                             f"\"{filename}\" is not written: {message}")
+
+    def __close_writers(self):
+        self.__writer.close()
+        if self.__snapshot_writer is not None:
+            self.__snapshot_writer.close()
+
+    def reload_config(self, name: str):
+        """
+        Slot for a ConfigsWatcher "configChanged" signal. Re-read single config
+        file and update the model with the difference
+        """
+        filename = f"{self.__configs_dir}/{name}.json"
+        try:
+            original = _Configs.read_config(filename) \
+                if _os.path.exists(filename) else None
+        except (OSError, ValueError) as error:
+            _logger.warning("Config \"%s\" is not reloaded: %s", filename,
+                            error)
+            return
+
+        with self.__writer.lock:
+            if self.__layers is not None:
+                self.__layers.set_config(name, original)
+                self.__original = self.__layers.original
+                self.__actual = self.__layers.actual
+            elif original is None:
+                self.__original.pop(name, None)
+                self.__actual.pop(name, None)
+                self.__overrides.pop(name, None)
+            else:
+                self.__original[name] = original
+                actual = _Configs.override(
+                    _Configs({name: original}),
+                    _Configs({name: self.__overrides.get(name, {})}))
+                self.__actual[name] = actual[name]
+                self.__overrides.pop(name, None)
+                self.__overrides.update(
+                    _Configs.diff({name: original}, actual,
+                                  self.__sparse_lists))
+
+        self.__model.update(self.__actual, keys=(name,))
+        self.__export()
+
+    def reload_overrides(self):
+        """
+        Slot for a ConfigsWatcher "overridesChanged" signal. Re-read
+        overrides.json changed by someone else and update the model
+        """
+        try:
+            # pylint: disable=invalid-name
+            with open(self.__overrides_file, encoding="ascii") as f:
+                if f.read() == self.__writer.last_written:
+                    return
+            overrides = _Configs.from_override_file(self.__overrides_file)
+        except (OSError, ValueError) as error:
+            _logger.warning("Overrides \"%s\" are not reloaded: %s",
+                            self.__overrides_file, error)
+            return
+
+        with self.__writer.lock:
+            if self.__layers is not None:
+                self.__layers.set_layer(self.__target_layer, overrides)
+                self.__overrides = self.__layers.layer(self.__target_layer)
+                self.__actual = self.__layers.actual
+            else:
+                self.__actual = _Configs.override(self.__original, overrides)
+                self.__overrides = _Configs.diff(self.__original,
+                                                 self.__actual,
+                                                 self.__sparse_lists)
+        if self.__journal:
+            # journaled changes must not be replayed over external ones
+            self.__writer.submit(self.__overrides)
+
+        self.__model.update(self.__actual)
+        self.__export()
+
+    def __watch(self, model: _JsonModel):
+        """Follow changes of config files made by someone else"""
+        if self.__watch_files:
+            watcher = _ConfigsWatcher(self.__configs_dir,
+                                      self.__overrides_file, parent=model)
+            watcher.configChanged.connect(self.reload_config)
+            watcher.overridesChanged.connect(self.reload_overrides)
+
+    def __load_progressively(self, view: _QTreeView, model: _JsonModel,
+                             started: float):
+        """Load configs in a background thread adding them to the model chunk
+        by chunk. Overrides of configs not loaded yet are kept as they are"""
+        self.__original, self.__actual = _Configs(), _Configs()
+        self.__overrides = _Configs.from_override_file(self.__overrides_file)
+        # note: loaded chunks are added to "actual" before their items, so it
+        # mustn't be the source of not yet built items of a lazy model
+        model.load(_Configs())
+        self.__model = model
+
+        # columnar store can't grow, so it's built once everything is loaded
+        columnar = self.__columnar_tree
+        loader = _ConfigsLoader(self.__configs_dir,
+                                _deepcopy(self.__overrides),
+                                None if columnar else model.make_items,
+                                self.__chunk_size, self.__workers,
+                                self.__processes, self.__cache,
+                                self.__lazy_configs, self.__sparse_lists,
+                                parent=view)
+
+        dialog = _QProgressDialog("Loading configs...", "Cancel", 0, 0, view)
+        dialog.setMinimumDuration(500)
+        dialog.canceled.connect(loader.requestInterruption)
+
+        def on_progress(loaded: int, total: int):
+            dialog.setMaximum(total)
+            dialog.setValue(loaded)
+
+        def on_chunk(original: _Configs, actual: _Configs,
+                     overrides: _Configs, items: list):
+            if not self.__actual:
+                _logger.info("First configs shown in %.3f s",
+                             _time.perf_counter() - started)
+            with self.__writer.lock:
+                self.__original.update(original)
+                self.__actual.update(actual)
+                for name in original:
+                    self.__overrides.pop(name, None)
+                self.__overrides.update(overrides)
+            if items is not None:
+                model.add_items(items, actual)
+
+        failed = False
+
+        def on_failed(message: str):
+            nonlocal failed
+            failed = True
+            _logger.error("Configs are not loaded: %s", message)
+            self.exit(1)
+
+        def on_finished():
+            dialog.reset()
+            if failed:
+                return
+            if loader.isInterruptionRequested():
+                _logger.warning("Loading cancelled, %d configs loaded",
+                                len(self.__original))
+                return
+            _logger.info("Configs fully loaded in %.3f s",
+                         _time.perf_counter() - started)
+            if columnar:
+                model.load(self.__actual)
+            self.__export()
+            self.__watch(model)
+
+        loader.progress.connect(on_progress)
+        loader.chunkLoaded.connect(on_chunk)
+        loader.failed.connect(on_failed)
+        loader.finished.connect(on_finished)
+
+        # make sure the thread is stopped before it's destroyed
+        def stop():
+            loader.requestInterruption()
+            loader.wait()
+        self.aboutToQuit.connect(stop)
+        loader.start()
+
+    @staticmethod
+    def __search_window(view: _QTreeView, model: _JsonModel) -> _QWidget:
+        """Put search field above the view filtering the model"""
+        window = _QWidget()
+        search_field = _QLineEdit(window)
+        search_field.setPlaceholderText("Search keys, values and dotted "
+                                        "paths")
+        search_field.setClearButtonEnabled(True)
+        layout = _QVBoxLayout(window)
+        layout.addWidget(search_field)
+        layout.addWidget(view)
+
+        proxy = _SearchFilterModel(view)
+        proxy.setSourceModel(model)
+        view.setModel(proxy)
+
+        def on_query(text: str):
+            proxy.set_query(text)
+            # expand matches unless there are too many of them
+            if text and len(proxy.matches) <= 100:
+                view.expandAll()
+        search_field.textChanged.connect(on_query)
+        return window
+
+    @staticmethod
+    def __bind_edits(view: _QTreeView, window: _QWidget, model: _JsonModel):
+        """Undo/redo, paste into every selected value and replace-all
+        shortcuts. Bulk edits are saved at once"""
+        _QShortcut(_QKeySequence.Undo, window, model.undo)
+        _QShortcut(_QKeySequence.Redo, window, model.redo)
+        view.setSelectionMode(_QAbstractItemView.ExtendedSelection)
+
+        def paste():
+            # one line goes to every selected value, lines go to the
+            # selected values top down otherwise
+            lines = _QApplication.clipboard().text().splitlines() or [""]
+            rows = sorted(view.selectionModel().selectedRows(),
+                          key=lambda index: view.visualRect(index).top())
+            column = _TreeItem.Fields.index("value")
+            indexes = []
+            for index in rows:
+                if view.model() is not model:
+                    index = view.model().mapToSource(index)
+                indexes.append(model.index(index.row(), column,
+                                           index.parent()))
+            if len(lines) == 1:
+                lines = lines * len(indexes)
+            model.set_values(zip(indexes, lines))
+
+        def replace_all():
+            text, accepted = _QInputDialog.getText(window, "Replace all",
+                                                   "Find:")
+            if not accepted or not text:
+                return
+            replacement, accepted = _QInputDialog.getText(
+                window, "Replace all", f"Replace \"{text}\" with:")
+            if accepted:
+                _logger.info("%d values replaced",
+                             model.replace_all(text, replacement))
+
+        _QShortcut(_QKeySequence.Paste, window, paste)
+        _QShortcut(_QKeySequence.Replace, window, replace_all)
 
     def exec(self):
         """Method to run the application"""
 
         # Initialize Widgets
         view = _QTreeView()
-        model = _JsonModel(view)
-        view.setModel(model)
-        view.show()
+        if self.__columnar_tree:
+            model = _ColumnarJsonModel(view, search=self.__search,
+                                       sparse_lists=self.__sparse_lists)
+        else:
+            model = _JsonModel(view, lazy=self.__lazy_tree,
+                               batch_size=self.__batch_size,
+                               search=self.__search,
+                               sparse_lists=self.__sparse_lists)
+        if self.__search:
+            window = self.__search_window(view, model)
+        else:
+            window = view
+            view.setModel(model)
+        window.show()
 
-        # Connect model "newOverride" signal to "on_override" slot
+        # Connect model "newOverride" signal to "on_override" slot and make
+        # sure pending overrides are written before exit
         model.newOverride.connect(self.on_override)
+        self.aboutToQuit.connect(self.__close_writers)
+        self.__bind_edits(view, window, model)
 
-        # Read configs and load into model
-        self.__actual = self.read_configs()
-        model.load(self.__actual)
+        # Read configs and load into model, either before showing the
+        # window or in the background while it's already shown
+        started = _time.perf_counter()
+        _QTimer.singleShot(0, lambda: _logger.info(
+            "Window shown in %.3f s", _time.perf_counter() - started))
+        if self.__progressive:
+            self.__load_progressively(view, model, started)
+        else:
+            self.__actual = self.read_configs()
+            model.load(self.__actual)
+            if self.__layers is not None:
+                model.set_value_source(self.__layers.source)
+            self.__model = model
+            self.__export()
+            self.__watch(model)
 
         # Expand both columns and split width equally
         view.header().setSectionResizeMode(0, _QHeaderView.Stretch)
 
         # Move the application window to the center of the screen
         screen_center = self.primaryScreen().geometry().center()  # type:_QPoint
-        view.move(screen_center.x() - view.width()//2,
-                  screen_center.y() - view.height()//2)
+        window.move(screen_center.x() - window.width()//2,
+                    screen_center.y() - window.height()//2)
 
-        return _QApplication.exec_()
+        result = _QApplication.exec_()
+        self.__close_writers()
+        return result
@@ -0,0 +1,111 @@
+"""Module that keeps parsed "config*.json" files on disk between launches"""
+
+import hashlib as _hashlib
+import os as _os
+import pickle as _pickle
+from typing import Callable as _Callable, List as _List
+from ._writer import atomic_write as _atomic_write
+
+
+def _default_directory() -> str:
+    cache_home = _os.environ.get("XDG_CACHE_HOME") or \
+        _os.path.expanduser("~/.cache")
+    return _os.path.join(cache_home, "json_override_test_assignment")
+
+
+def _digest(filename: str) -> str:
+    # pylint: disable=invalid-name
+    with open(filename, 'rb') as f:
+        return _hashlib.file_digest(f, "blake2b").hexdigest() \
+            if hasattr(_hashlib, "file_digest") else \
+            _hashlib.blake2b(f.read()).hexdigest()
+
+
+class ConfigsCache:
+    """
+    Pickled cache of parsed config files. Every file is validated by its
+    mtime and size (and content hash if "hash_contents" is set), so only
+    changed files are parsed again
+    """
+
+    def __init__(self, directory: str = None, hash_contents: bool = False):
+        self.directory = directory or _default_directory()
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+
+    def cache_file(self, config_dir: str) -> str:
+        """Return path of the cache file for given configs directory"""
+        key = _hashlib.sha1(_os.path.abspath(config_dir).encode()).hexdigest()
+        return _os.path.join(self.directory, f"{key}.pickle")
+
+    def stats(self) -> dict:
+        """Return cache hit/miss counters"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self, config_dir: str = None):
+        """Remove cache of given configs directory or the whole cache"""
+        if config_dir is not None:
+            files = [self.cache_file(config_dir)]
+        elif _os.path.isdir(self.directory):
+            files = [_os.path.join(self.directory, f)
+                     for f in _os.listdir(self.directory)
+                     if f.endswith(".pickle")]
+        else:
+            files = []
+
+        for filename in files:
+            if _os.path.exists(filename):
+                _os.remove(filename)
+
+    def load(self, config_dir: str, filenames: _List[str],
+             loader: _Callable[[_List[str]], list]) -> list:
+        """
+        Return JSON data of given files taking up-to-date ones from the cache.
+        Missing or changed files are parsed with "loader", which gets a list of
+        filenames and returns a list of their contents
+        """
+        cache_file = self.cache_file(config_dir)
+
+        # Read cache entries: {filename: (mtime_ns, size, digest, content)}
+        try:
+            # pylint: disable=invalid-name
+            with open(cache_file, 'rb') as f:
+                entries = _pickle.load(f)
+            assert isinstance(entries, dict)
+        except Exception:  # pylint: disable=broad-except
+            entries = {}
+
+        # Split files on valid cache entries and ones to be parsed
+        signatures, contents, missing = {}, {}, []
+        for filename in filenames:
+            stat = _os.stat(filename)
+            signature = (stat.st_mtime_ns, stat.st_size,
+                         _digest(filename) if self.hash_contents else None)
+            signatures[filename] = signature
+            entry = entries.get(filename)
+            if entry is not None and entry[:3] == signature:
+                contents[filename] = entry[3]
+            else:
+                missing.append(filename)
+
+        self.hits += len(filenames) - len(missing)
+        self.misses += len(missing)
+
+        if not missing:
+            return [contents[f] for f in filenames]
+
+        contents.update(zip(missing, loader(missing)))
+
+        # Store cache without entries of removed files. Cache is optional, so
+        # failure to write it is not an error. Pickle recurses into nested
+        # containers, so configs nested too deep aren't cached
+        entries = {f: signatures[f] + (contents[f],) for f in filenames}
+        try:
+            _os.makedirs(self.directory, exist_ok=True)
+            _atomic_write(cache_file, _pickle.dumps(
+                entries, protocol=_pickle.HIGHEST_PROTOCOL))
+        except (OSError, RecursionError):
+            pass
+
+        return [contents[f] for f in filenames]
@@ -0,0 +1,306 @@
+"""Module with headless command line interface. It doesn't need Qt, so it can
+be used on servers and in CI pipelines"""
+
+import json as _json
+import os as _os
+import signal as _signal
+import sys as _sys
+from argparse import ArgumentParser as _ArgumentParser
+from functools import partial as _partial
+from typing import Iterable as _Iterable, List as _List
+from ._configs_handler import Configs as _Configs, \
+    ConfigsLoadError as _ConfigsLoadError
+from ._daemon import ConfigsServer as _ConfigsServer
+from ._journal import read_overrides as _read_overrides, \
+    write_overrides as _write_overrides
+from ._snapshot import compile_snapshot as _compile_snapshot
+from ._writer import atomic_write as _atomic_write
+from ._profiling import \
+    profiling_from_environment as _profiling_from_environment
+from ._misc import create_json as _create_json, \
+    create_corpus as _create_corpus
+from ._parsers import benchmark_parsers as _benchmark_parsers, \
+    select_parser as _select_parser
+
+COMMANDS = ("generate", "merge", "diff", "apply", "validate", "snapshot",
+            "serve", "parsers")
+
+
+def _overrides_file(config_dir: str, overrides: str) -> str:
+    return _os.path.join(config_dir, overrides)
+
+
+def _unknown_paths(orig: dict, over: dict, path: str = "") -> _List[str]:
+    """Return JSON Pointers of overrides that don't match any config value"""
+    unknown = []
+    for key, value in over.items():
+        pointer = f"{path}/{key}"
+        if key not in orig:
+            unknown.append(pointer)
+        elif isinstance(orig[key], dict):
+            if isinstance(value, dict):
+                unknown += _unknown_paths(orig[key], value, pointer)
+            else:
+                unknown.append(pointer)
+    return unknown
+
+
+def merge(config_dir: str, overrides: str) -> dict:
+    """Return configs of given directory with overrides applied"""
+    original = _Configs.from_config_dir(config_dir)
+    over = _read_overrides(_overrides_file(config_dir, overrides), original)
+    return {"merged": _Configs.override(original, over)}
+
+
+def diff(config_dir: str, overrides: str, json_patch: bool = False,
+         sparse_lists: bool = False) -> dict:
+    """Return overrides which actually change configs of given directory"""
+    original = _Configs.from_config_dir(config_dir)
+    over = _read_overrides(_overrides_file(config_dir, overrides), original,
+                           sparse_lists)
+    actual = _Configs.override(original, over)
+    if json_patch:
+        return {"json_patch": _Configs.json_patch(original, actual)}
+    return {"overrides": _Configs.diff(original, actual, sparse_lists)}
+
+
+def apply(config_dir: str, overrides: str, changes: dict,
+          sparse_lists: bool = False) -> dict:
+    """Apply changeset to the overrides file of given directory"""
+    filename = _overrides_file(config_dir, overrides)
+    original = _Configs.from_config_dir(config_dir)
+    actual = _Configs.override(original, _read_overrides(filename, original,
+                                                         sparse_lists))
+    result = _Configs.diff(original, actual, sparse_lists)
+    _Configs.patch(actual, original, result, changes,
+                   sparse_lists=sparse_lists)
+    _write_overrides(filename, result)
+    return {"overrides": result}
+
+
+def snapshot(config_dir: str, overrides: str, output: str) -> dict:
+    """Compile configs of given directory with overrides applied into
+    binary snapshot, see ConfigsSnapshot"""
+    original = _Configs.from_config_dir(config_dir)
+    over = _read_overrides(_overrides_file(config_dir, overrides), original)
+    data = _compile_snapshot(_Configs.override(original, over))
+    filename = _os.path.join(config_dir, output)
+    _atomic_write(filename, data, in_place=False)
+    return {"snapshot": filename, "size": len(data)}
+
+
+def validate(config_dir: str, overrides: str) -> dict:
+    """Check config files and overrides of given directory can be loaded and
+    every override matches some config value"""
+    errors = []
+    try:
+        original = _Configs.from_config_dir(config_dir)
+    except _ConfigsLoadError as error:
+        original = None
+        errors += [f"{f}: {e}" for f, e in error.errors.items()]
+    except (OSError, ValueError) as error:
+        original = None
+        errors.append(f"{config_dir}: {error}")
+
+    filename = _overrides_file(config_dir, overrides)
+    try:
+        over = _read_overrides(filename, original or {})
+        if not isinstance(over, dict):
+            raise ValueError("must contain JSON object")
+    except (OSError, ValueError) as error:
+        over = None
+        errors.append(f"{filename}: {error}")
+
+    if original is not None and over is not None:
+        errors += [f"{filename}: no config value at {p}"
+                   for p in _unknown_paths(original, over)]
+    return {"valid": not errors, "errors": errors}
+
+
+def _run(job, config_dir: str) -> dict:
+    """Run job for given directory and turn its failure into a record"""
+    try:
+        record = job(config_dir)
+    except Exception as error:  # pylint: disable=broad-except
+        record = {"error": f"{type(error).__name__}: {error}"}
+    return {"configs": config_dir, **record}
+
+
+def run_jobs(job, config_dirs: _List[str], workers: int = None) -> _Iterable:
+    """Yield job records for given directories in order. Directories are
+    processed in a process pool unless single worker is requested"""
+    run = _partial(_run, job)
+    if workers == 1 or len(config_dirs) <= 1:
+        yield from map(run, config_dirs)
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(run, config_dirs)
+
+
+def _parser() -> _ArgumentParser:
+    parser = _ArgumentParser(
+        prog="python -m json_override_test_assignment",
+        description="Headless tools for config files. Commands but "
+                    "\"generate\" print a JSON line per directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="create config files")
+    generate.add_argument("filename", type=str,
+                          help="path to config file or to directory if "
+                               "--files is given")
+    generate.add_argument("--params", type=int, nargs=2,
+                          metavar=("min", "max"), default=(2, 5),
+                          help="range of params number to create")
+    generate.add_argument("--seed", type=int, default=None,
+                          help="seed to create reproducible content")
+    generate.add_argument("--depth", type=int, default=1,
+                          help="nesting depth of dict params")
+    generate.add_argument("--fanout", type=int, nargs=2,
+                          metavar=("min", "max"), default=None,
+                          help="range of nested dict keys number")
+    generate.add_argument("--list-length", type=int, nargs=2,
+                          metavar=("min", "max"), default=None,
+                          help="range of list items number")
+    generate.add_argument("--files", type=int, default=None,
+                          help="number of config*.json files to create in "
+                               "directory")
+    generate.add_argument("--size", type=int, default=None,
+                          help="approximate total size of created files in "
+                               "bytes")
+
+    helps = {"merge": "print configs with overrides applied",
+             "diff": "print overrides which actually change configs",
+             "apply": "apply changeset to overrides files",
+             "validate": "check configs and overrides",
+             "snapshot": "compile configs with overrides applied into "
+                         "binary snapshot"}
+    for name, text in helps.items():
+        command = commands.add_parser(name, help=text)
+        if name == "apply":
+            command.add_argument("changes", type=str,
+                                 help="JSON file with changeset in "
+                                      "\"overrides.json\" format")
+        command.add_argument("config_dirs", type=str, nargs="+",
+                             help="directories with config*.json")
+        command.add_argument("--overrides", type=str,
+                             default="overrides.json",
+                             help="overrides file, relative to each "
+                                  "directory unless absolute")
+        command.add_argument("--workers", type=int, default=None,
+                             help="number of processes handling directories")
+        if name == "diff":
+            command.add_argument("--json-patch", action="store_true",
+                                 help="print RFC 6902 JSON Patch instead")
+        if name in ("diff", "apply"):
+            command.add_argument("--sparse-lists", action="store_true",
+                                 help="store changed list elements instead "
+                                      "of whole lists")
+        if name == "snapshot":
+            command.add_argument("--output", type=str,
+                                 default="configs.snap",
+                                 help="snapshot file, relative to each "
+                                      "directory unless absolute")
+
+    serve = commands.add_parser("serve", help="serve configs with overrides "
+                                              "applied over a Unix socket")
+    serve.add_argument("config_dir", type=str,
+                       help="directory with config*.json")
+    serve.add_argument("--overrides", type=str, default="overrides.json",
+                       help="overrides file, relative to the directory "
+                            "unless absolute")
+    serve.add_argument("--socket", type=str, default=None,
+                       help="socket path, \"configs.sock\" in the directory "
+                            "by default")
+    serve.add_argument("--poll-interval", type=float, default=0.5,
+                       help="seconds between checks of files for changes")
+
+    parsers = commands.add_parser("parsers", help="measure JSON parser "
+                                                  "backends and print a JSON "
+                                                  "line per backend")
+    parsers.add_argument("--file", type=str, default=None,
+                         help="JSON file to parse instead of a generated "
+                              "sample")
+    return parser
+
+
+def main(argv: _List[str] = None, output=None) -> int:
+    """Run command line interface. Return exit status: 1 if any directory
+    failed or is invalid"""
+    argv = _sys.argv[1:] if argv is None else list(argv)
+    output = _sys.stdout if output is None else output
+
+    # note: "python -m json_override_test_assignment <file>" used to be the
+    # only way to generate config files
+    if argv and argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        argv.insert(0, "generate")
+    args = _parser().parse_args(argv)
+    _profiling_from_environment()
+
+    if args.command == "generate":
+        options = dict(params=tuple(args.params), seed=args.seed,
+                       depth=args.depth, fanout=args.fanout,
+                       list_length=args.list_length, size=args.size)
+        if args.files is None:
+            _create_json(args.filename, **options)
+        else:
+            _create_corpus(args.filename, args.files, **options)
+        return 0
+
+    if args.command == "serve":
+        socket_path = args.socket or _os.path.join(args.config_dir,
+                                                   "configs.sock")
+        server = _ConfigsServer(socket_path, args.config_dir,
+                                _overrides_file(args.config_dir,
+                                                args.overrides),
+                                args.poll_interval)
+
+        # stop on SIGTERM as on Ctrl+C, so the socket file is removed
+        def stop(*_):
+            raise KeyboardInterrupt
+        _signal.signal(_signal.SIGTERM, stop)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    if args.command == "parsers":
+        data = None
+        if args.file is not None:
+            # pylint: disable=invalid-name
+            with open(args.file, 'rb') as f:
+                data = f.read()
+        selected = _select_parser(data=data)
+        for name, seconds in _benchmark_parsers(data).items():
+            output.write(_json.dumps({"parser": name, "seconds": seconds,
+                                      "selected": name == selected}) + '\n')
+        return 0
+
+    if args.command == "merge":
+        job = _partial(merge, overrides=args.overrides)
+    elif args.command == "diff":
+        job = _partial(diff, overrides=args.overrides,
+                       json_patch=args.json_patch,
+                       sparse_lists=args.sparse_lists)
+    elif args.command == "apply":
+        job = _partial(apply, overrides=args.overrides,
+                       changes=_Configs.read_config(args.changes),
+                       sparse_lists=args.sparse_lists)
+    elif args.command == "snapshot":
+        job = _partial(snapshot, overrides=args.overrides,
+                       output=args.output)
+    else:
+        job = _partial(validate, overrides=args.overrides)
+
+    status = 0
+    for record in run_jobs(job, args.config_dirs, args.workers):
+        if "error" in record or not record.get("valid", True):
+            status = 1
+        output.write(_json.dumps(record) + '\n')
+        output.flush()
+    return status
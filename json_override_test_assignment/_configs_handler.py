@@ -2,25 +2,254 @@
 
 import json as _json
 import os as _os
-from typing import List as _List, Dict as _Dict
+from typing import List as _List, Dict as _Dict, Tuple as _Tuple, \
+    Union as _Union, Generator as _Generator
 from copy import deepcopy as _deepcopy
+import concurrent.futures as _futures
+from itertools import chain as _chain
+from ._writer import atomic_write as _atomic_write
+from ._serialize import encode_json as _encode_json, \
+    iterencode_json as _iterencode_json
+from ._cache import ConfigsCache as _ConfigsCache
+from ._lazy import LazyDocument as _LazyDocument, LazyDict as _LazyDict, \
+    _Span
+from ._parsers import parse_json as _parse_json, \
+    selected_parser as _selected_parser
+from . import _diff
 
 
 # ValueType = str | _List[str] | _Dict[str, str]
+# JSON Pointer ("/config1/param/0") or sequence of keys
+PathType = _Union[str, _Tuple, _List]
+
+_MISSING = object()
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+class ConfigsLoadError (Exception):
+    """Raised when some "config*.json" files can't be loaded. Holds errors of
+    every failed file"""
+
+    def __init__(self, errors: _Dict[str, Exception]):
+        self.errors = errors
+        Exception.__init__(self, "Failed to load config files:\n" +
+                           "\n".join(f"  {f}: {e}" for f, e in errors.items()))
+
+
+def _read(filename: str) -> bytes:
+    # note: files are parsed from bytes, see _parsers.parse_json()
+    # pylint: disable=invalid-name
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def _load(filename: str):
+    return _parse_json(_read(filename))
+
+
+def _load_concurrently(filenames: _List[str], workers: int,
+                       processes: bool) -> list:
+    """Load JSON from given files reading them with a thread pool and
+    optionally parsing with a process pool. Keep files order"""
+    errors = {}
+
+    def collect(futures: dict) -> dict:
+        results = {}
+        for filename, future in futures.items():
+            try:
+                results[filename] = future.result()
+            except Exception as error:  # pylint: disable=broad-except
+                errors[filename] = error
+        return results
+
+    with _futures.ThreadPoolExecutor(workers) as readers:
+        if not processes:
+            contents = collect({f: readers.submit(_load, f)
+                                for f in filenames})
+        else:
+            texts = collect({f: readers.submit(_read, f) for f in filenames})
+            # note: the backend is passed, so workers don't select it again
+            parser = _selected_parser()
+            with _futures.ProcessPoolExecutor(workers) as parsers:
+                contents = collect({f: parsers.submit(_parse_json, text,
+                                                      parser)
+                                    for f, text in texts.items()})
+
+    if errors:
+        raise ConfigsLoadError({f: errors[f] for f in filenames
+                                if f in errors})
+
+    return [contents[f] for f in filenames]
+
+
+def _override_in_place(alter: dict, over: dict):
+    """Override values of given dict with given changeset"""
+    assert isinstance(over, dict)
+
+    for key in over:
+        if key in alter:
+            alter[key] = _overridden(alter[key], over[key])
+
+
+def _overridden(value, over):
+    """Return value overridden in place with given value of changeset.
+    Lists are overridden by sparse overrides element by element"""
+    return _override_value(value, over, False)
+
+
+def _override_sharing(alter: dict, over: dict):
+    """Override values of given dict with given changeset copying only dicts
+    along the overridden paths. The rest stays shared"""
+    assert isinstance(over, dict)
+
+    for key in over:
+        if key in alter:
+            alter[key] = shared_overridden(alter[key], over[key])
+
+
+def shared_overridden(value, over):
+    """Return value overridden with given value of changeset. Overridden
+    containers are copied, see _override_sharing()"""
+    return _override_value(value, over, True)
+
+
+def _override_value(value, over, share: bool):
+    """Return value overridden with given value of changeset, containers are
+    changed in place unless "share" is set. Containers to override are kept
+    in a stack instead of recursing into them, so the depth of documents
+    isn't limited by recursion"""
+    # (container to fill, source container, its changeset)
+    pending = []
+
+    def overridden(value, over):
+        # note: returned containers are filled when they're popped
+        if isinstance(value, dict):
+            assert isinstance(over, dict)
+            if share:
+                value = value.copy()
+            pending.append((value, value, over))
+            return value
+        if isinstance(value, list) and _diff.is_sparse(over):
+            in_place = not share and \
+                not any(operation in over for operation in _diff.OPERATIONS)
+            pending.append((value if in_place else [], value, over))
+            return pending[-1][0]
+        return over
+
+    result = overridden(value, over)
+    while pending:
+        target, value, over = pending.pop()
+        if isinstance(target, dict):
+            for key in over:
+                if key in target:
+                    target[key] = overridden(target[key], over[key])
+        elif target is value:
+            _diff.override_list(target, over, overridden, True)
+        else:
+            target.extend(_diff.override_list(value, over, overridden))
+    return result
+
+
+def copy_json(value):
+    """Return deep copy of JSON data like copy.deepcopy() does. Nested
+    containers are copied with a stack, so the depth of documents isn't
+    limited by recursion"""
+    memo = {}
+    pending = []  # (source, copy)
+
+    def copied(value):
+        kind = type(value)
+        if kind in _SCALARS:
+            return value
+        copy = memo.get(id(value))
+        if copy is not None:
+            return copy
+        if kind in (dict, list, Configs, _LazyDict):
+            copy = kind()
+        else:
+            return _deepcopy(value, memo)
+        memo[id(value)] = copy
+        pending.append((value, copy))
+        return copy
+
+    result = copied(value)
+    while pending:
+        source, copy = pending.pop()
+        if isinstance(source, list):
+            copy.extend(map(copied, source))
+        elif isinstance(source, _LazyDict):
+            # note: unparsed values are shared, as LazyDict.__deepcopy__()
+            # does
+            for key, value in dict.items(source):
+                dict.__setitem__(copy, key, value if isinstance(value, _Span)
+                                 else copied(value))
+        else:
+            for key, value in source.items():
+                copy[key] = copied(value)
+    return result
+
+
+def path_keys(path: PathType) -> tuple:
+    """Turn JSON Pointer or sequence of keys into tuple of keys"""
+    if type(path) is tuple:  # pylint: disable=unidiomatic-typecheck
+        return path
+    if isinstance(path, str):
+        if path and not path.startswith("/"):
+            raise ValueError(f"Invalid JSON Pointer \"{path}\"")
+        tokens = path.split("/")[1:]
+        return tuple(map(_diff.unescape, tokens) if "~" in path else tokens)
+    return tuple(path)
+
+
+def _child_key(container, key):
+    """Return key of the child in given container. JSON Pointer addresses
+    list elements by decimal strings"""
+    if not isinstance(container, list):
+        return key
+    index = int(key)
+    if not 0 <= index < len(container):
+        raise IndexError(index)
+    return index
 
 
 class Configs (dict):
     """
     Holds JSON data from either "config*.json" or "overrides.json" in same
-    format
+    format. Values can be addressed by paths, see get_path()
     """
 
     @staticmethod
-    def from_config_dir(config_dir: str):
+    def from_config_dir(config_dir: str, workers: int = None,
+                        processes: bool = False,
+                        cache: "_ConfigsCache" = None, lazy: bool = False):
         """
-        Read "config*.json" files from given dir and join JSONs into single dict
+        Read "config*.json" files from given dir and join JSONs into single dict.
+        If "workers" is given files are read by a pool of threads (and parsed
+        by a pool of processes if "processes" is set); errors are collected
+        over all files and raised as ConfigsLoadError. If "cache" is given
+        only files changed since the last call are parsed. If "lazy" is set
+        files are memory-mapped and parsed on access (workers and cache are
+        not used then). Configs nested deeper than the recursion limit are
+        loaded, but they can't be passed from worker processes or cached
         """
 
+        files = Configs.config_files(config_dir)
+        names, paths = list(files), list(files.values())
+
+        # Populate dictionary with JSON data from them
+        def load(filenames: _List[str]) -> list:
+            return Configs.read_configs(filenames, workers, processes)
+
+        if lazy:
+            return Configs(zip(names, Configs.read_configs(paths, lazy=True)))
+        if cache is None:
+            return Configs(zip(names, load(paths)))
+        return Configs(zip(names, cache.load(config_dir, paths, load)))
+
+    @staticmethod
+    def config_files(config_dir: str) -> _Dict[str, str]:
+        """Return {config name: path} of "config*.json" files in given dir"""
+
         # Check if directory exists
         if not _os.path.isdir(config_dir):
             raise NotADirectoryError(f"Configs directory \"{config_dir}\" "
@@ -31,18 +260,27 @@ class Configs (dict):
             raise PermissionError(f"Configs directory \"{config_dir}\" is "
                                   f"read-protected")
 
-        # Nested function to load JSON data from config file
-        def content(filename: str):
-            # pylint: disable=invalid-name
-            with open(filename, encoding="ascii") as f:
-                return _json.load(f)
+        # Get "config*.json" files from given directory
+        files = [f for f in _os.listdir(config_dir)
+                 if f.startswith("config") and f.endswith(".json")]
+        return {_os.path.splitext(f)[0]: f"{config_dir}/{f}" for f in files}
+
+    @staticmethod
+    def read_configs(filenames: _List[str], workers: int = None,
+                     processes: bool = False, lazy: bool = False) -> list:
+        """Read JSON data of given "config*.json" files keeping their order.
+        "workers", "processes" and "lazy" are the same as in from_config_dir"""
+        if lazy:
+            return [_LazyDocument(f).root for f in filenames]
+        if workers is None:
+            return list(map(_load, filenames))
+        assert workers > 0
+        return _load_concurrently(filenames, workers, processes)
 
-        # Get "config*.json" files from given directory and populate dictionary
-        # with JSON data from them
-        return Configs({_os.path.splitext(_os.path.basename(f))[0]:
-                            content(f"{config_dir}/{f}")
-                        for f in _os.listdir(config_dir)
-                        if f.startswith("config") and f.endswith(".json")})
+    @staticmethod
+    def read_config(filename: str):
+        """Read JSON data of a single "config*.json" file"""
+        return _load(filename)
 
     @staticmethod
     def from_override_file(filename: str):
@@ -63,45 +301,187 @@ class Configs (dict):
                 _json.dump({}, f)
 
         # Load data from file
-        # pylint: disable=invalid-name
-        with open(filename, encoding="ascii") as f:
-            return Configs(_json.load(f))
+        return Configs(_load(filename))
 
     @staticmethod
-    def override(orig: dict, over: dict) -> "Configs":
-        """Override values of given dict with given changeset"""
+    def override(orig: dict, over: dict, share: bool = False) -> "Configs":
+        """Override values of given dict with given changeset. Lists are
+        replaced by whole values or changed element by element by sparse
+        overrides, dicts marked with "$list" addressing elements by index
+        (see _diff.override_list()). With
+        "share" set only containers along the overridden paths are copied and
+        the rest is shared with "orig" and "over" (copy-on-write), so none of
+        them may be changed in place afterwards"""
         assert isinstance(orig, dict)
         assert isinstance(over, dict)
 
-        alter_dict = _deepcopy(orig)
-        for key in orig.keys() & over.keys():
-            if isinstance(orig[key], dict):
-                alter_dict[key].update(
-                    Configs.override(alter_dict[key], over[key]))
-            else:
-                alter_dict[key] = over[key]
+        if share:
+            alter = Configs(orig)
+            _override_sharing(alter, over)
+            return alter
 
+        alter_dict = copy_json(orig)
+        _override_in_place(alter_dict, over)
         return Configs(alter_dict)
 
     @staticmethod
-    def diff(orig: dict, alter: dict) -> "Configs":
+    def patch(actual: dict, original: dict, overrides: dict, over: dict,
+              verify: bool = False, sparse_lists: bool = False) -> "Configs":
+        """
+        Apply given changeset to "actual" in place and keep "overrides" equal
+        to diff(original, actual, sparse_lists). Only nodes along the changed
+        paths are touched, so the cost depends on changeset size, not on
+        configs size. With "verify" set the result is checked against a full
+        recompute
+        """
+        _diff._run(Configs.__patch(actual, original, overrides, over,
+                                   sparse_lists))
+
+        if verify and not _diff.equal(overrides, Configs.diff(
+                original, actual, sparse_lists)):
+            raise RuntimeError("Incremental overrides diverged from full "
+                               "recompute")
+
+        return overrides
+
+    @staticmethod
+    def __patch(actual: dict, original: dict, overrides: dict, over: dict,
+                sparse_lists: bool) -> _Generator:
+        """Steps of _diff._run() applying patch() to nested dicts"""
+        assert isinstance(actual, dict)
+        assert isinstance(original, dict)
+        assert isinstance(overrides, dict)
+        assert isinstance(over, dict)
+
+        for key in over:
+            if key not in actual:
+                continue
+
+            if isinstance(actual[key], dict):
+                nested = overrides.get(key, Configs())
+                yield Configs.__patch(actual[key], original[key], nested,
+                                      over[key], sparse_lists)
+                if nested:
+                    overrides[key] = nested
+                else:
+                    overrides.pop(key, None)
+            else:
+                value = actual[key] = _overridden(actual[key],
+                                                  copy_json(over[key]))
+                if sparse_lists and isinstance(value, list) and \
+                        isinstance(original[key], list):
+                    value = _diff.patch_list(
+                        original[key], value, overrides.get(key), over[key],
+                        Configs) if _diff.is_sparse(over[key]) else \
+                        _diff.diff_list(original[key], value, Configs)
+                    changed = value is not None
+                else:
+                    changed = not _diff.equal(value, original[key])
+                if changed:
+                    overrides[key] = value
+                else:
+                    overrides.pop(key, None)
+
+    @staticmethod
+    def from_path(path: PathType, value) -> "Configs":
+        """Return changeset setting given value at given path in
+        "overrides.json" format"""
+        keys = path_keys(path)
+        assert keys, "path must not be empty"
+        for key in reversed(keys[1:]):
+            value = {key: value}
+        return Configs({keys[0]: value})
+
+    def __locate(self, keys: tuple) -> tuple:
+        """Return (container, key) of the value at given keys"""
+        container = self
+        for key in keys[:-1]:
+            container = container[_child_key(container, key)]
+        if not isinstance(container, (dict, list)):
+            raise TypeError(f"{type(container).__name__} has no children")
+        return container, _child_key(container, keys[-1])
+
+    def get_path(self, path: PathType, default=_MISSING):
+        """Return value at given path. Raise KeyError if there's no such
+        value unless default is given"""
+        keys = path_keys(path)
+        try:
+            if not keys:
+                return self
+            container, key = self.__locate(keys)
+            return container[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            if default is _MISSING:
+                raise KeyError(path) from None
+            return default
+
+    def has_path(self, path: PathType) -> bool:
+        """Check there's a value at given path"""
+        try:
+            self.get_path(path)
+        except KeyError:
+            return False
+        return True
+
+    def set_path(self, path: PathType, value):
+        """Set value at given path. The parent container must exist, list
+        elements can be replaced only"""
+        keys = path_keys(path)
+        try:
+            container, key = self.__locate(keys)
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise KeyError(path) from None
+        container[key] = value
+
+    def with_path(self, path: PathType, value) -> "Configs":
+        """Return configs with given value at given path leaving these ones
+        intact. Only containers along the path are copied, the rest is shared
+        (copy-on-write), so neither configs may be changed in place then"""
+        keys = path_keys(path)
+        result = Configs(self)
+        try:
+            if not keys:
+                raise KeyError(path)
+            container = result
+            for key in keys[:-1]:
+                key = _child_key(container, key)
+                child = container[key]
+                if not isinstance(child, (dict, list)):
+                    raise TypeError(f"{type(child).__name__} has no children")
+                container[key] = container = child.copy()
+            key = _child_key(container, keys[-1])
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise KeyError(path) from None
+
+        container[key] = value
+        return result
+
+    @staticmethod
+    def diff(orig: dict, alter: dict, sparse_lists: bool = False) -> "Configs":
         """Show difference between original dict and altered. In other words
-        produces "overrides.json" content"""
+        produces "overrides.json" content. With "sparse_lists" only changed
+        list elements are stored, see override()"""
+        return _diff.diff(orig, alter, Configs, sparse_lists)
+
+    @staticmethod
+    def json_patch(orig: dict, alter: dict) -> list:
+        """Show difference between original dict and altered as RFC 6902
+        JSON Patch"""
         assert isinstance(orig, dict)
         assert isinstance(alter, dict)
+        return _diff.json_patch(orig, alter)
 
-        diff_dict = {}
-        for key in filter(lambda k: orig[k] != alter[k], alter):
-            if isinstance(orig[key], dict):
-                diff_dict[key] = Configs.diff(orig[key], alter[key])
-            else:
-                diff_dict[key] = alter[key]
-
-        return Configs(diff_dict)
+    def dumps(self, sort_keys: bool = False, compatible: bool = False) -> str:
+        """Return JSON data in the same format "dump" writes it"""
+        return _encode_json(self, sort_keys=sort_keys,
+                            compatible=compatible) + '\n'
 
-    def dump(self, filename: str):
-        """Dump JSON data into given file"""
-        # pylint: disable=invalid-name
-        with open(filename, 'w', encoding="ascii") as f:
-            _json.dump(self, f, indent=2)
-            f.write('\n')
+    def dump(self, filename: str, sort_keys: bool = False,
+             compatible: bool = False):
+        """Atomically dump JSON data into given file, pretty-printed with
+        2 spaces of indentation. "sort_keys" writes keys in canonical order,
+        with "compatible" set the file is byte-identical to the one of
+        json.dump(indent=2), see iterencode_json()"""
+        chunks = _iterencode_json(self, sort_keys=sort_keys,
+                                  compatible=compatible)
+        _atomic_write(filename, _chain(chunks, '\n'))
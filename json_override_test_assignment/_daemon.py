@@ -0,0 +1,429 @@
+"""Module that serves merged configs to other processes over a Unix socket.
+Requests and responses are JSON lines:
+
+    {"id": 1, "op": "get", "path": "/config1/param1"}
+    {"id": 2, "op": "snapshot", "config": "config1"}  # all configs if omitted
+    {"id": 3, "op": "version"}
+    {"id": 4, "op": "subscribe"}
+
+Responses carry the same "id", "version" of configs and either "value" or
+"error". A subscribed connection then receives {"event": "changed",
+"version": ..., "keys": [...]} whenever configs or overrides change. A
+subscriber that doesn't read its notifications is disconnected
+"""
+
+import json as _json
+import os as _os
+import queue as _queue
+import socket as _socket
+import socketserver as _socketserver
+import threading as _threading
+from typing import Dict as _Dict, Iterator as _Iterator, \
+    Optional as _Optional, Set as _Set
+
+from ._configs_handler import Configs as _Configs, PathType as _PathType
+from ._journal import journal_file as _journal_file, \
+    read_overrides as _read_overrides
+
+_MISSING = object()
+# exceptions passed from server to client by name
+_ERRORS = {"KeyError": KeyError, "ValueError": ValueError}
+
+
+def _signature(filename: str) -> _Optional[tuple]:
+    try:
+        stat = _os.stat(filename)
+    except FileNotFoundError:
+        return None
+    # note: an atomic replace within one mtime tick changes the inode only
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _shutdown(connection: _socket.socket):
+    try:
+        connection.shutdown(_socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class _Handler (_socketserver.StreamRequestHandler):
+    """Serves requests of a single connection till it's closed"""
+
+    def handle(self):
+        server = self.server  # type: ConfigsServer
+        for line in self.rfile:
+            try:
+                request = _json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be an object")
+            except ValueError as error:
+                request = {}
+                response = server.error_response(None, error)
+            else:
+                response = server.respond(request)
+            self.wfile.write(response)
+
+            if request.get("op") == "subscribe":
+                self.__send_events(server)
+                return
+
+    def __send_events(self, server: "ConfigsServer"):
+        """The connection is for notifications only from now on. Queued
+        ones are sent from this thread, the end of the connection is awaited
+        in another one"""
+        events = server.subscribe(self.connection)
+
+        def wait_closed():
+            try:
+                for _ in self.rfile:
+                    pass
+            except (OSError, ValueError):
+                pass
+            try:
+                events.put_nowait(None)
+            except _queue.Full:
+                pass  # the sender is stuck in a write, which fails now
+
+        reader = _threading.Thread(target=wait_closed, daemon=True)
+        reader.start()
+        try:
+            for line in iter(events.get, None):
+                self.wfile.write(line)
+        except OSError:
+            pass
+        finally:
+            server.unsubscribe(events)
+            _shutdown(self.connection)
+            reader.join()
+
+
+class ConfigsServer (_socketserver.ThreadingMixIn,
+                     _socketserver.UnixStreamServer):
+    """
+    Keeps configs with overrides applied in memory and serves path lookups
+    and snapshots over a Unix socket, each connection in its own thread.
+    Files are polled for changes, e.g. overrides written by the GUI: only
+    changed configs are merged again and encoded snapshots of the rest are
+    reused. Subscribers are notified about changed configs, each through
+    its own queue: one that lets "max_pending" notifications pile up is
+    disconnected instead of holding up the others
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, config_dir: str,
+                 overrides_file: str, poll_interval: float = 0.5,
+                 max_pending: int = 64):
+        assert max_pending > 0
+        self.__config_dir = config_dir
+        self.__overrides_file = overrides_file
+        self.__poll_interval = poll_interval
+        self.__max_pending = max_pending
+        self.__lock = _threading.Lock()
+        self.__version = 0
+        self.__original = _Configs()
+        self.__overrides = _Configs()
+        self.__actual = _Configs()
+        self.__encoded = {}  # type: _Dict[str, bytes]
+        self.__signatures = {}  # type: _Dict[str, tuple]
+        self.__subscribers = {}  # queue of lines to send -> connection
+        self.__stopped = _threading.Event()
+        self.refresh()
+
+        if _os.path.exists(socket_path):
+            self.__remove_stale_socket(socket_path)
+        _socketserver.UnixStreamServer.__init__(self, socket_path, _Handler)
+
+    @staticmethod
+    def __remove_stale_socket(socket_path: str):
+        with _socket.socket(_socket.AF_UNIX) as probe:
+            try:
+                probe.connect(socket_path)
+            except ConnectionRefusedError:
+                _os.unlink(socket_path)
+                return
+        raise OSError(f"\"{socket_path}\" is served already")
+
+    @property
+    def version(self) -> int:
+        """Version of served configs, grows with every change"""
+        return self.__version
+
+    @property
+    def configs(self) -> _Configs:
+        """Served configs, not to be changed"""
+        return self.__actual
+
+    def refresh(self) -> _Set[str]:
+        """Re-read changed config files and overrides, merge changed configs
+        again. Return names of configs whose served value changed"""
+        files = _Configs.config_files(self.__config_dir)
+        signatures = {path: _signature(path) for path in files.values()}
+        # note: edits of a journaled writer are in its journal first
+        overrides_files = (self.__overrides_file,
+                           _journal_file(self.__overrides_file))
+        for path in overrides_files:
+            signatures[path] = _signature(path)
+        if signatures == self.__signatures:
+            return set()
+
+        original = _Configs(self.__original)
+        for name in set(original) - set(files):
+            del original[name]
+        for name, path in files.items():
+            if name not in original or \
+                    signatures[path] != self.__signatures.get(path):
+                original[name] = _Configs.read_config(path)
+
+        overrides = self.__overrides
+        if any(signatures[path] != self.__signatures.get(path)
+               for path in overrides_files):
+            overrides = _read_overrides(self.__overrides_file, original)
+
+        # only configs whose original or overrides changed are merged again
+        stale = {name for name in original
+                 if name not in self.__original or
+                 original[name] is not self.__original[name] or
+                 overrides.get(name) != self.__overrides.get(name)}
+        actual = _Configs((name, value)
+                          for name, value in self.__actual.items()
+                          if name in original)
+        actual.update(_Configs.override(
+            {name: original[name] for name in stale},
+            {name: overrides[name] for name in stale if name in overrides}))
+        changed = {name for name in stale
+                   if self.__actual.get(name, _MISSING) != actual[name]}
+        changed |= set(self.__actual) - set(actual)
+
+        with self.__lock:
+            self.__signatures = signatures
+            self.__original, self.__overrides = original, overrides
+            self.__actual = actual
+            self.__encoded = {name: value for name, value
+                              in self.__encoded.items()
+                              if name in actual and name not in changed}
+            if changed:
+                self.__version += 1
+        return changed
+
+    def check(self) -> _Set[str]:
+        """refresh() and notify subscribers about changed configs"""
+        changed = self.refresh()
+        if changed:
+            self.__notify({"event": "changed", "version": self.__version,
+                           "keys": sorted(changed)})
+        return changed
+
+    def __notify(self, event: dict):
+        line = _json.dumps(event).encode() + b"\n"
+        for events, connection in list(self.__subscribers.items()):
+            try:
+                events.put_nowait(line)
+            except _queue.Full:
+                # its sender is stuck in a write, which fails now
+                self.unsubscribe(events)
+                _shutdown(connection)
+
+    def subscribe(self, connection: _socket.socket) -> _queue.Queue:
+        """Queue change notifications for given connection. Return the
+        queue of lines to send into it, None ends them"""
+        events = _queue.Queue(self.__max_pending)
+        self.__subscribers[events] = connection
+        return events
+
+    def unsubscribe(self, events: _queue.Queue):
+        """Stop queueing change notifications into given queue"""
+        self.__subscribers.pop(events, None)
+
+    def __encoded_config(self, name: str, actual: _Configs,
+                         encoded: dict) -> bytes:
+        value = encoded.get(name)
+        if value is None:
+            value = encoded[name] = _json.dumps(actual[name]).encode()
+        return value
+
+    @staticmethod
+    def error_response(request_id, error: Exception) -> bytes:
+        """Return response line reporting given error"""
+        message = error.args[0] if isinstance(error, KeyError) and \
+            error.args else str(error)
+        return _json.dumps({"id": request_id, "error": str(message),
+                            "type": type(error).__name__}).encode() + b"\n"
+
+    def respond(self, request: dict) -> bytes:
+        """Return response line to given request"""
+        request_id = request.get("id")
+        with self.__lock:
+            version, actual = self.__version, self.__actual
+            encoded = self.__encoded
+        try:
+            operation = request.get("op")
+            if operation == "get":
+                path = request.get("path", "")
+                if not isinstance(path, (str, list)):
+                    raise ValueError("path must be a JSON Pointer or a list")
+                value = _json.dumps(actual.get_path(path)).encode()
+            elif operation == "snapshot":
+                name = request.get("config")
+                if name is None:
+                    value = b"{" + b", ".join(
+                        _json.dumps(k).encode() + b": " +
+                        self.__encoded_config(k, actual, encoded)
+                        for k in actual) + b"}"
+                elif name in actual:
+                    value = self.__encoded_config(name, actual, encoded)
+                else:
+                    raise KeyError(f"no config \"{name}\"")
+            elif operation in ("version", "subscribe"):
+                value = b"true" if operation == "subscribe" else b"null"
+            else:
+                raise ValueError(f"unknown operation \"{operation}\"")
+        except KeyError as error:
+            return self.error_response(request_id, KeyError(
+                f"no value at {request.get('path')}"
+                if operation == "get" else error.args[0]))
+        except ValueError as error:
+            return self.error_response(request_id, error)
+
+        return (f"{{\"id\": {_json.dumps(request_id)}, "
+                f"\"version\": {version}, \"value\": ").encode() + \
+            value + b"}\n"
+
+    def __poll(self):
+        while not self.__stopped.wait(self.__poll_interval):
+            try:
+                self.check()
+            except (OSError, ValueError):
+                # note: files may be caught in the middle of a change
+                continue
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        """Override from BaseServer. Watch files while serving"""
+        poller = _threading.Thread(target=self.__poll, daemon=True)
+        poller.start()
+        try:
+            _socketserver.UnixStreamServer.serve_forever(self, poll_interval)
+        finally:
+            self.__stopped.set()
+            poller.join()
+
+    def server_close(self):
+        """Override from BaseServer. Remove the socket file"""
+        _socketserver.UnixStreamServer.server_close(self)
+        if _os.path.exists(self.server_address):
+            _os.unlink(self.server_address)
+
+
+class _Connection:
+    def __init__(self, socket_path: str, timeout: _Optional[float] = None):
+        self.socket = _socket.socket(_socket.AF_UNIX)
+        self.socket.settimeout(timeout)
+        self.socket.connect(socket_path)
+        self.rfile = self.socket.makefile("rb")
+
+    def request(self, request: dict) -> dict:
+        self.socket.sendall(_json.dumps(request).encode() + b"\n")
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        return _json.loads(line)
+
+    def close(self):
+        self.rfile.close()
+        self.socket.close()
+
+
+class ConfigsClient:
+    """
+    Client of ConfigsServer. Keeps up to "pool_size" open connections and
+    reuses them, so it can be shared between threads
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = 4,
+                 timeout: float = 5.0):
+        assert pool_size > 0
+        self.__socket_path = socket_path
+        self.__timeout = timeout
+        self.__idle = _queue.LifoQueue()
+        self.__slots = _threading.Semaphore(pool_size)
+        self.__next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def request(self, request: dict) -> dict:
+        """Send given request, return response. Raise KeyError or
+        ValueError reported by the server"""
+        with self.__slots:
+            try:
+                connection = self.__idle.get_nowait()
+            except _queue.Empty:
+                connection = _Connection(self.__socket_path, self.__timeout)
+            try:
+                response = connection.request(request)
+            except (OSError, ValueError):
+                connection.close()
+                raise
+            self.__idle.put(connection)
+
+        if "error" in response:
+            raise _ERRORS.get(response.get("type"),
+                              RuntimeError)(response["error"])
+        return response
+
+    def get(self, path: _PathType, default=_MISSING):
+        """Return value at given path (JSON Pointer or sequence of keys).
+        Raise KeyError if there's no such value unless default is given"""
+        self.__next_id += 1
+        try:
+            return self.request({"id": self.__next_id, "op": "get",
+                                 "path": path if isinstance(path, str)
+                                 else list(path)})["value"]
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+
+    def snapshot(self, name: str = None):
+        """Return config with given name, all configs if it's not given"""
+        self.__next_id += 1
+        request = {"id": self.__next_id, "op": "snapshot"}
+        if name is not None:
+            request["config"] = name
+        return self.request(request)["value"]
+
+    def version(self) -> int:
+        """Return version of served configs, it grows with every change"""
+        self.__next_id += 1
+        return self.request({"id": self.__next_id, "op": "version"})[
+            "version"]
+
+    def subscribe(self) -> _Iterator[dict]:
+        """Subscribe at once and return iterator of change notifications, see
+        module docstring. It has its own connection, which is closed when the
+        iterator is"""
+        connection = _Connection(self.__socket_path)
+        try:
+            connection.request({"op": "subscribe"})
+        except (OSError, ValueError):
+            connection.close()
+            raise
+
+        def events() -> _Iterator[dict]:
+            try:
+                for line in connection.rfile:
+                    yield _json.loads(line)
+            finally:
+                connection.close()
+        return events()
+
+    def close(self):
+        """Close idle connections"""
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except _queue.Empty:
+                return
@@ -0,0 +1,464 @@
+"""
+Module that computes differences between JSON documents in a single pass.
+Besides whole values, overrides of lists may be sparse: a dict marked with
+"$list" addressing elements of the overridden list by index, see
+override_list(). Dicts without the mark replace lists as a whole
+
+    {"param": {"$list": true, "1": "new", "$remove": [4], "$append": ["x"]}}
+"""
+
+from typing import Any as _Any, Callable as _Callable, \
+    Generator as _Generator, List as _List, Type as _Type
+from ._lazy import LazyDict as _LazyDict
+
+_MISSING = object()
+# diff of list element that overrides can't express, see _element_diff()
+_REPLACE = object()
+
+# keys of sparse list overrides besides element indices
+LIST = "$list"
+REMOVE = "$remove"
+INSERT = "$insert"
+APPEND = "$append"
+OPERATIONS = (REMOVE, INSERT, APPEND)
+
+
+def is_sparse(over: _Any) -> bool:
+    """Check given override is a sparse override of a list"""
+    return isinstance(over, dict) and over.get(LIST) is True
+
+
+def _raw(value: dict, key: str) -> _Any:
+    # note: bypasses LazyDict parsing, so shared unparsed values are skipped
+    return dict.__getitem__(value, key)
+
+
+def escape(key) -> str:
+    """Escape key to be used as a JSON Pointer (RFC 6901) reference token"""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def unescape(token: str) -> str:
+    """Reverse escape() of a JSON Pointer reference token"""
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def equal(orig: _Any, alter: _Any) -> bool:
+    """Compare JSON values like == does. Values nested deeper than the
+    recursion limit, which == can't compare, are compared with a stack"""
+    try:
+        return orig == alter
+    except RecursionError:
+        return _equal_iteratively(orig, alter)
+
+
+def _equal_iteratively(orig: _Any, alter: _Any) -> bool:
+    pending = [(orig, alter)]
+    while pending:
+        orig, alter = pending.pop()
+        if orig is alter:
+            continue
+        if isinstance(orig, dict) and isinstance(alter, dict):
+            if len(orig) != len(alter):
+                return False
+            for key, value in orig.items():
+                other = alter.get(key, _MISSING)
+                if other is _MISSING:
+                    return False
+                pending.append((value, other))
+        elif isinstance(orig, list) and isinstance(alter, list):
+            if len(orig) != len(alter):
+                return False
+            pending.extend(zip(orig, alter))
+        elif not orig == alter:
+            return False
+    return True
+
+
+def _typed_equal(orig: _Any, alter: _Any) -> bool:
+    """Compare JSON values like equal() does, but leaves of different types
+    differ: 1, 1.0 and true are different values in JSON"""
+    if not equal(orig, alter):
+        return False
+    pending = [(orig, alter)]
+    while pending:
+        orig, alter = pending.pop()
+        if orig is alter:
+            continue
+        if isinstance(orig, dict):
+            pending.extend((value, alter[key]) for key, value in orig.items())
+        elif isinstance(orig, list):
+            pending.extend(zip(orig, alter))
+        elif type(orig) != type(alter):
+            return False
+    return True
+
+
+def _run(steps: _Generator) -> _Any:
+    """Run given generator to completion and return its result. Nested
+    values are handled by generators the steps yield, which get their
+    results back, so nesting is kept in a stack of suspended generators
+    instead of the call stack and the depth of documents isn't limited by
+    recursion"""
+    stack = [steps]
+    result = None
+    while True:
+        try:
+            nested = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            if not stack:
+                return stop.value
+            result = stop.value
+        else:
+            stack.append(nested)
+            result = None
+
+
+def diff(orig: dict, alter: dict, mapping: _Type[dict] = dict,
+         sparse_lists: bool = False) -> dict:
+    """
+    Return nested dict of values of "alter" that differ from "orig" in the
+    "overrides.json" format. Values that are the same object on both sides
+    are skipped. Other subtrees are compared as a whole once and the changed
+    ones are walked without comparing them again, so each value is compared
+    at most twice whatever the depth of the documents. With "sparse_lists"
+    changed lists are stored as sparse overrides, see diff_list()
+    """
+    assert isinstance(orig, dict)
+    assert isinstance(alter, dict)
+    return _run(_diff(orig, alter, mapping, True, sparse_lists))
+
+
+def _diff(orig: dict, alter: dict, mapping: _Type[dict],
+          compare: bool, sparse: bool = False,
+          strict: bool = False) -> _Generator:
+    """Steps of _run() computing diff(). With "strict" the result is
+    _REPLACE if overriding "orig" with it can't give "alter": overrides skip
+    keys missing in dicts and can't replace dicts by other values"""
+    if strict and dict.keys(orig) != dict.keys(alter):
+        return _REPLACE
+    result = mapping()
+    get = dict.get
+    lazy = isinstance(orig, _LazyDict) or isinstance(alter, _LazyDict)
+
+    # note: raw values are iterated, so unparsed parts of LazyDict shared by
+    # both dicts are skipped without parsing
+    for key, value in dict.items(alter):
+        original = get(orig, key, _MISSING)
+        if original is value:
+            continue
+        if original is _MISSING:
+            result[key] = alter[key]
+            continue
+        if lazy:
+            original, value = orig[key], alter[key]
+
+        if isinstance(value, dict) and isinstance(original, dict):
+            # compare unchanged subtrees as a whole, walk the changed ones
+            # without comparing their subtrees again
+            if compare and not lazy and equal(original, value):
+                continue
+            nested = yield _diff(original, value, mapping, compare and lazy,
+                                 sparse, strict)
+            if nested is _REPLACE:
+                return _REPLACE
+            if nested:
+                result[key] = nested
+        elif sparse and isinstance(value, list) and \
+                isinstance(original, list):
+            nested = yield _diff_list(original, value, mapping)
+            if nested is not None:
+                result[key] = nested
+        else:
+            # note: equal() inlined, it's the hottest spot
+            try:
+                changed = original != value
+            except RecursionError:
+                changed = not _equal_iteratively(original, value)
+            if changed:
+                if strict and isinstance(original, dict):
+                    return _REPLACE
+                result[key] = value
+
+    return result
+
+
+def _element_diff(orig: _Any, alter: _Any,
+                  mapping: _Type[dict]) -> _Generator:
+    """Return override of list element turning "orig" into "alter",
+    _MISSING if there's nothing to override, _REPLACE if an override can't
+    do it, e.g. keys of a dict changed. Steps of _run()"""
+    if orig is alter:
+        return _MISSING
+    if isinstance(orig, dict) and isinstance(alter, dict):
+        nested = yield _diff(orig, alter, mapping, True, True, True)
+        return nested if nested else _MISSING
+    if isinstance(orig, dict):
+        return _MISSING if equal(orig, alter) else _REPLACE
+    if isinstance(orig, list) and isinstance(alter, list):
+        nested = yield _diff_list(orig, alter, mapping)
+        return _MISSING if nested is None else nested
+    return _MISSING if equal(orig, alter) else alter
+
+
+def _common_length(orig: list, alter: list, limit: int, compare: bool,
+                   suffix: bool = False) -> int:
+    """Return length of common prefix (or suffix) of given lists up to
+    "limit". Without "compare" it ends at containers that aren't the same
+    object"""
+    length = 0
+    try:
+        while length < limit:
+            index = -1 - length if suffix else length
+            if orig[index] is not alter[index] and (
+                    not compare and isinstance(orig[index], (dict, list)) or
+                    not orig[index] == alter[index]):
+                break
+            length += 1
+    except RecursionError:
+        while length < limit:
+            index = -1 - length if suffix else length
+            if not equal(orig[index], alter[index]):
+                break
+            length += 1
+    return length
+
+
+def _sparse_or_whole(result: dict, alter: list, changes: int) -> _Any:
+    # note: sparse override of mostly changed list is larger than the list
+    return alter if 2 * changes > len(alter) else result
+
+
+def diff_list(orig: list, alter: list, mapping: _Type[dict] = dict) -> _Any:
+    """
+    Return sparse override turning "orig" list into "alter", the whole
+    "alter" if most of it changed or an element override can't express a
+    change (see _element_diff()), or None if they're equal. Common prefix
+    and suffix are skipped, elements in between are overridden, removed or
+    inserted
+    """
+    return _run(_diff_list(orig, alter, mapping))
+
+
+def _diff_list(orig: list, alter: list, mapping: _Type[dict]) -> _Generator:
+    """Steps of _run() computing diff_list()"""
+    common = min(len(orig), len(alter))
+    # note: elements of lists of the same length are diffed one by one, so
+    # containers aren't compared before they're walked
+    compare = len(orig) != len(alter)
+    first = _common_length(orig, alter, common, compare)
+    if first == len(orig) == len(alter):
+        return None
+    last = _common_length(orig, alter, common - first, compare, True)
+
+    result = mapping({LIST: True})
+    removed = len(orig) - first - last
+    inserted = len(alter) - first - last
+    for index in range(first, first + min(removed, inserted)):
+        original, value = orig[index], alter[index]
+        if isinstance(original, dict) or isinstance(original, list) and \
+                isinstance(value, (dict, list)):
+            value = yield _element_diff(original, value, mapping)
+            if value is _REPLACE:
+                return alter
+        elif original is value or equal(original, value):
+            value = _MISSING
+        if value is not _MISSING:
+            result[str(index)] = value
+    changes = len(result) - 1
+    if removed > inserted:
+        result[REMOVE] = list(range(first + inserted, first + removed))
+        changes += removed - inserted
+    elif inserted > removed:
+        values = alter[first + removed:len(alter) - last]
+        if last:
+            result[INSERT] = mapping({str(len(orig) - last): values})
+        else:
+            result[APPEND] = values
+        changes += len(values)
+    if not changes:
+        return None
+    return _sparse_or_whole(result, alter, changes)
+
+
+def _element_indices(over: dict, length: int) -> dict:
+    """Return {index: override} of elements in range of the list"""
+    elements = {}
+    for key, value in over.items():
+        if key in OPERATIONS:
+            continue
+        try:
+            index = int(key)
+        except ValueError:
+            continue
+        if 0 <= index < length:
+            elements[index] = value
+    return elements
+
+
+def override_list(orig: list, over: dict,
+                  override: _Callable[[_Any, _Any], _Any],
+                  in_place: bool = False) -> list:
+    """
+    Return given list with sparse override applied. Keys of the override are
+    the "$list" mark, indices of overridden elements as decimal strings and
+    operations:
+
+        "$list": true,
+        "$remove": [indices of removed elements],
+        "$insert": {"index": [values inserted before the element]},
+        "$append": [values appended to the list]
+
+    Indices refer to the given list, the ones out of its range are skipped
+    like keys missing in configs. Elements are overridden by
+    "override(element, value)". With "in_place" the list itself is changed
+    unless elements are removed or inserted
+    """
+    elements = _element_indices(over, len(orig))
+    if not any(operation in over for operation in OPERATIONS):
+        result = orig if in_place else list(orig)
+        for index, value in elements.items():
+            result[index] = override(result[index], value)
+        return result
+
+    removed = set(over.get(REMOVE, ()))
+    inserted = _element_indices(over.get(INSERT, {}), len(orig) + 1)
+    result = []
+    for index, element in enumerate(orig):
+        result.extend(inserted.get(index, ()))
+        if index not in removed:
+            result.append(override(element, elements[index])
+                          if index in elements else element)
+    result.extend(inserted.get(len(orig), ()))
+    result.extend(over.get(APPEND, ()))
+    return result
+
+
+def patch_list(orig: list, alter: list, stored: _Any, over: dict,
+               mapping: _Type[dict] = dict) -> _Any:
+    """
+    Return the same as diff_list(orig, alter) given the previous override
+    of "orig" ("stored", None if there was none) and the sparse "over" which
+    turned it into "alter". Element overrides are updated in place of
+    recomputing the diff unless elements were removed or inserted
+    """
+    if stored is None:
+        stored = {LIST: True}
+    if not is_sparse(stored) or not is_sparse(over) or \
+            len(orig) != len(alter) or \
+            any(operation in stored or operation in over
+                for operation in OPERATIONS):
+        return diff_list(orig, alter, mapping)
+
+    result = mapping(stored)
+    for index in _element_indices(over, len(orig)):
+        value = _run(_element_diff(orig[index], alter[index], mapping))
+        if value is _REPLACE:
+            return alter
+        if value is _MISSING:
+            result.pop(str(index), None)
+        else:
+            result[str(index)] = value
+    changes = len(result) - 1
+    if not changes:
+        return None
+    return _sparse_or_whole(result, alter, changes)
+
+
+def json_patch(orig: _Any, alter: _Any, path: str = "") -> _List[dict]:
+    """
+    Return RFC 6902 JSON Patch turning "orig" into "alter". Dicts and lists
+    are diffed element by element; like in diff() changed subtrees are
+    walked without comparing them again
+    """
+    operations = []
+    _run(_json_patch(orig, alter, path, operations, True))
+    return operations
+
+
+def _pointer(path: _Any) -> str:
+    """Return JSON Pointer of (parent path, token) pairs ending with the
+    string of the root"""
+    tokens = []
+    while isinstance(path, tuple):
+        path, token = path
+        tokens.append(token)
+    return path + "".join(f"/{token}" for token in reversed(tokens))
+
+
+def _json_patch(orig: _Any, alter: _Any, path: _Any, operations: list,
+                compare: bool) -> _Generator:
+    """Steps of _run() computing json_patch(). Pointers of nested values are
+    built when they're needed, see _pointer()"""
+    if isinstance(orig, dict) and isinstance(alter, dict):
+        lazy = isinstance(orig, _LazyDict) or isinstance(alter, _LazyDict)
+        for key in orig:
+            if key not in alter:
+                operations.append({"op": "remove",
+                                   "path": _pointer((path, escape(key)))})
+        for key in alter:
+            if key not in orig:
+                operations.append({"op": "add",
+                                   "path": _pointer((path, escape(key))),
+                                   "value": alter[key]})
+            elif _raw(orig, key) is not _raw(alter, key):
+                original, value = orig[key], alter[key]
+                # compare unchanged subtrees as a whole, walk the changed
+                # ones without comparing their subtrees again
+                if compare and not lazy and _typed_equal(original, value):
+                    continue
+                yield _json_patch(original, value, (path, escape(key)),
+                                  operations, compare and lazy)
+
+    elif isinstance(orig, list) and isinstance(alter, list):
+        common = min(len(orig), len(alter))
+        for index in range(common):
+            original, value = orig[index], alter[index]
+            if original is value or compare and _typed_equal(original, value):
+                continue
+            yield _json_patch(original, value, (path, index), operations,
+                              False)
+        # remove from the end so indices of the rest stay valid
+        pointer = _pointer(path) if len(orig) != len(alter) else ""
+        for index in reversed(range(common, len(orig))):
+            operations.append({"op": "remove", "path": f"{pointer}/{index}"})
+        for index in range(common, len(alter)):
+            operations.append({"op": "add", "path": f"{pointer}/{index}",
+                               "value": alter[index]})
+
+    elif type(orig) != type(alter) or not equal(orig, alter):
+        operations.append({"op": "replace", "path": _pointer(path),
+                           "value": alter})
+
+
+def apply_json_patch(document: _Any, operations: _List[dict]) -> _Any:
+    """Apply "add", "remove" and "replace" operations of RFC 6902 JSON
+    Patch to given document in place. Return the resulting document"""
+    for operation in operations:
+        tokens = [unescape(t) for t in operation["path"].split("/")[1:]]
+        if not tokens:
+            if operation["op"] != "remove":
+                document = operation["value"]
+            continue
+
+        container = document
+        for token in tokens[:-1]:
+            container = container[int(token) if isinstance(container, list)
+                                  else token]
+
+        key = tokens[-1]
+        if isinstance(container, list):
+            key = len(container) if key == "-" else int(key)
+
+        if operation["op"] == "add" and isinstance(container, list):
+            container.insert(key, operation["value"])
+        elif operation["op"] in ("add", "replace"):
+            container[key] = operation["value"]
+        elif operation["op"] == "remove":
+            del container[key]
+        else:
+            raise ValueError(f"Unsupported JSON Patch operation "
+                             f"\"{operation['op']}\"")
+
+    return document
@@ -0,0 +1,392 @@
+"""
+Module that persists overrides as an append-only journal. Records are JSON
+lines, the first one may be a header written by compaction:
+
+    {"compacted": 41}
+    {"seq": 42, "override": {"config1": {"param1": 2}}}
+    {"seq": 43, "override": {"config2": {"param2": [1, 2]}}}
+    {"compacting": 43, "digest": "5d9c..."}
+
+Records up to "compacted" are in the overrides file already. Other readers
+replay the rest on top of it with read_overrides(). A compaction appends a
+"compacting" record with the digest of the overrides file it's about to
+write: if the journal isn't rewritten after that, e.g. the process crashed,
+records up to it are skipped as long as the file has that digest. Replaying
+them twice would apply "$append" and alike twice
+"""
+
+import hashlib as _hashlib
+import json as _json
+import logging as _logging
+import os as _os
+import threading as _threading
+from typing import List as _List, Optional as _Optional, Tuple as _Tuple
+
+from ._configs_handler import Configs as _Configs
+from ._writer import atomic_write as _atomic_write
+
+_logger = _logging.getLogger(__name__)
+
+
+def journal_file(filename: str) -> str:
+    """Return name of the journal of given overrides file"""
+    return _os.path.splitext(filename)[0] + ".journal"
+
+
+def _line(record: dict) -> bytes:
+    return _json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+def _digest(data: bytes) -> str:
+    return _hashlib.blake2b(data).hexdigest()
+
+
+def _parse(data: bytes, name: str) -> _Tuple[int, int, list, _Optional[tuple],
+                                             int]:
+    """Parse journal records. Return the compacted and the last sequence
+    numbers, [(sequence, changeset)] not compacted yet, (sequence, digest) of
+    the last "compacting" record or None and the size of complete records,
+    a torn final record is left out"""
+    compacted = sequence = 0
+    records = []
+    compacting = None
+    offset = 0
+    while offset < len(data):
+        end = data.find(b"\n", offset)
+        try:
+            if end < 0:
+                raise ValueError("record is not terminated")
+            record = _json.loads(data[offset:end])
+            if not isinstance(record, dict):
+                raise ValueError("record must be an object")
+        except ValueError as error:
+            if end < 0 or end + 1 == len(data):
+                break
+            raise ValueError(f"Journal \"{name}\" is corrupted at byte "
+                             f"{offset}: {error}") from error
+
+        if "compacted" in record:
+            compacted = sequence = record["compacted"]
+        elif "compacting" in record:
+            if not isinstance(record["compacting"], int) or \
+                    not isinstance(record.get("digest"), str):
+                raise ValueError(f"Journal \"{name}\" has malformed record "
+                                 f"at byte {offset}")
+            compacting = record["compacting"], record["digest"]
+        else:
+            if not isinstance(record.get("seq"), int) or \
+                    not isinstance(record.get("override"), dict):
+                raise ValueError(f"Journal \"{name}\" has malformed record "
+                                 f"at byte {offset}")
+            if record["seq"] <= sequence:
+                raise ValueError(f"Journal \"{name}\" has record "
+                                 f"{record['seq']} out of order")
+            sequence = record["seq"]
+            records.append((sequence, record["override"]))
+        offset = end + 1
+    return compacted, sequence, records, compacting, offset
+
+
+def _read(name: str) -> _Tuple[int, list, _Optional[tuple]]:
+    try:
+        # pylint: disable=invalid-name
+        with open(name, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return 0, [], None
+    _, sequence, records, compacting, _ = _parse(data, name)
+    return sequence, records, compacting
+
+
+def _pending(filename: str, records: list,
+             compacting: _Optional[tuple]) -> _List[dict]:
+    """Return changesets of given records missing in the overrides file. An
+    interrupted compaction that has written the file covers records up to
+    its sequence number"""
+    if compacting is not None:
+        sequence, digest = compacting
+        try:
+            # pylint: disable=invalid-name
+            with open(filename, "rb") as f:
+                if _digest(f.read()) == digest:
+                    records = [r for r in records if r[0] > sequence]
+        except FileNotFoundError:
+            pass
+    return [override for _, override in records]
+
+
+def read_overrides(filename: str, original: dict,
+                   sparse_lists: bool = False) -> _Configs:
+    """Read overrides file with changesets of its journal not compacted yet
+    replayed on top, like a journaled writer does on opening. Missing or
+    empty file means no overrides. The journal is read first, compaction
+    rewrites it after the overrides file"""
+    _, records, compacting = _read(journal_file(filename))
+    changesets = _pending(filename, records, compacting)
+    if not _os.path.isfile(filename) or not _os.path.getsize(filename):
+        overrides = _Configs()
+    else:
+        overrides = _Configs(_Configs.read_config(filename))
+    if not changesets:
+        return overrides
+
+    actual = _Configs.override(original, overrides)
+    overrides = _Configs.diff(original, actual, sparse_lists)
+    for override in changesets:
+        _Configs.patch(actual, original, overrides, override,
+                       sparse_lists=sparse_lists)
+    return overrides
+
+
+def write_overrides(filename: str, overrides: dict):
+    """Write overrides read by read_overrides() back and mark records of the
+    journal as compacted into them"""
+    name = journal_file(filename)
+    sequence, records, _ = _read(name)
+    if not records:
+        overrides.dump(filename)
+        return
+
+    data = overrides.dumps()
+    # pylint: disable=invalid-name
+    with open(name, "ab") as f:
+        f.write(_line({"compacting": sequence,
+                       "digest": _digest(data.encode())}))
+        f.flush()
+        _os.fsync(f.fileno())
+    _atomic_write(filename, data)
+    _atomic_write(name, _json.dumps({"compacted": sequence}).encode() +
+                  b"\n")
+
+
+class OverridesJournal:
+    """
+    Journaled storage for overrides. Every changeset is appended to the
+    journal next to the overrides file as a small record with a sequence
+    number, so the cost of an edit depends on its size, not on the size of
+    the overrides. Once the journal grows over "compact_size" bytes, a
+    background thread writes the overrides into the plain overrides file and
+    drops the records it covers. Callers must hold "lock" while modifying
+    submitted overrides. "last_written" keeps the data of the last compaction
+    to tell own changes of the overrides file from external ones. When the
+    journal can't be created next to the overrides file, e.g. in /etc, every
+    change is compacted right away instead
+    """
+
+    def __init__(self, filename: str, compact_size: int = 1 << 20,
+                 lock: _threading.Lock = None, fsync: bool = False):
+        """Records recovered from the journal are returned by replay().
+        With "fsync" every append is flushed to disk, otherwise only
+        compactions are"""
+        self.filename = filename
+        self.journal_file = journal_file(filename)
+        self.compact_size = compact_size
+        self.lock = _threading.Lock() if lock is None else lock
+        self.last_written = None
+        self.__fsync = fsync
+
+        directory = _os.path.dirname(_os.path.abspath(self.journal_file))
+        if _os.path.exists(self.journal_file):
+            if not _os.access(self.journal_file, _os.R_OK | _os.W_OK):
+                raise PermissionError(f"Journal \"{self.journal_file}\" is "
+                                      f"not writable")
+            self.__journaled = True
+        else:
+            self.__journaled = _os.access(directory, _os.W_OK | _os.X_OK)
+        if not self.__journaled:
+            _logger.warning("Directory \"%s\" is read-only, edits of \"%s\" "
+                            "are not journaled", directory, filename)
+
+        # appends vs. rewrites of the journal
+        self.__journal_lock = _threading.Lock()
+        self.__compaction_lock = _threading.Lock()
+        self.__fd = None
+        self.__sequence = 0
+        self.__compacted = 0
+        self.__size = 0
+        self.__appends = 0
+        self.__compactions = 0
+        self.__replay = self.__recover()
+
+        self.__condition = _threading.Condition()
+        self.__overrides = None
+        self.__requested = False
+        self.__compacting = False
+        self.__closed = False
+        self.__error = None
+        self.__thread = _threading.Thread(target=self.__run,
+                                          name="OverridesJournal",
+                                          daemon=True)
+        self.__thread.start()
+
+    def __recover(self) -> _List[dict]:
+        """Read the journal, return changesets not compacted yet. A torn
+        final record, left by a crash in the middle of an append, is cut off
+        the file"""
+        try:
+            # pylint: disable=invalid-name
+            with open(self.journal_file, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+
+        self.__compacted, self.__sequence, records, compacting, offset = \
+            _parse(data, self.journal_file)
+        if offset < len(data):
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(offset)
+        self.__size = offset
+        return _pending(self.filename, records, compacting)
+
+    def replay(self) -> _List[dict]:
+        """Return changesets recovered from the journal on opening, in order.
+        They are to be applied on top of the overrides file"""
+        return list(self.__replay)
+
+    def append(self, override: dict, overrides: dict):
+        """Append given changeset to the journal, "overrides" are the
+        overrides it's been applied to"""
+        with self.__journal_lock:
+            self.__sequence += 1
+            if self.__journaled:
+                self.__write({"seq": self.__sequence, "override": override},
+                             self.__fsync)
+                self.__appends += 1
+            full = self.__size >= self.compact_size or not self.__journaled
+
+        with self.__condition:
+            self.__overrides = overrides
+            if full:
+                self.__requested = True
+                self.__condition.notify_all()
+
+    def __write(self, record: dict, fsync: bool) -> int:
+        """Append given record to the journal, return its size. The journal
+        lock must be held"""
+        if self.__fd is None:
+            self.__fd = _os.open(self.journal_file, _os.O_WRONLY |
+                                 _os.O_APPEND | _os.O_CREAT, 0o644)
+        line = _line(record)
+        # note: a single write with O_APPEND, so records never interleave
+        _os.write(self.__fd, line)
+        if fsync:
+            _os.fsync(self.__fd)
+        self.__size += len(line)
+        return len(line)
+
+    def submit(self, overrides: dict):
+        """Schedule compaction of given overrides, which replace the
+        journaled ones as a whole, e.g. after they've been reloaded"""
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("OverridesJournal is closed")
+            self.__overrides = overrides
+            self.__requested = True
+            self.__condition.notify_all()
+
+    def flush(self):
+        """Block until scheduled compaction is done"""
+        with self.__condition:
+            self.__condition.wait_for(lambda: not self.__requested and
+                                      not self.__compacting or
+                                      self.__closed)
+            if self.__error is not None:
+                error, self.__error = self.__error, None
+                raise error
+
+    def compact(self):
+        """Write overrides into the overrides file and drop journal records
+        it covers now"""
+        with self.__compaction_lock:
+            with self.__condition:
+                overrides = self.__overrides
+            if overrides is not None:
+                self.__compact(overrides)
+
+    def __compact(self, overrides: dict):
+        with self.lock:
+            # note: changes are applied before they're appended, so the data
+            # covers every record up to the sequence number and maybe more
+            with self.__journal_lock:
+                sequence, offset = self.__sequence, self.__size
+            data = overrides.dumps()
+        if not self.__journaled:
+            _atomic_write(self.filename, data)
+            self.last_written = data
+            with self.__journal_lock:
+                self.__compacted = sequence
+                self.__compactions += 1
+            return
+
+        # a crash before the journal is rewritten leaves the marker telling
+        # that records up to the sequence number are in the overrides file
+        with self.__journal_lock:
+            marker = self.__size - offset
+            marker_size = self.__write({"compacting": sequence,
+                                        "digest": _digest(data.encode())},
+                                       True)
+        _atomic_write(self.filename, data)
+        self.last_written = data
+
+        with self.__journal_lock:
+            # pylint: disable=invalid-name
+            with open(self.journal_file, "rb") as f:
+                f.seek(offset)
+                tail = f.read()
+            tail = tail[:marker] + tail[marker + marker_size:]
+            data = _json.dumps({"compacted": sequence}).encode() + b"\n" + tail
+            _atomic_write(self.journal_file, data)
+            if self.__fd is not None:
+                _os.close(self.__fd)
+                self.__fd = None
+            self.__compacted = sequence
+            self.__size = len(data)
+            self.__compactions += 1
+
+    def close(self):
+        """Stop the background thread and compact the journal, so the
+        overrides file alone is complete for other readers. Till then they
+        have to replay the journal on top of it, see read_overrides()"""
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+        try:
+            if self.__sequence > self.__compacted:
+                self.compact()
+        finally:
+            with self.__journal_lock:
+                if self.__fd is not None:
+                    _os.close(self.__fd)
+                    self.__fd = None
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def stats(self) -> dict:
+        """Return append and compaction counters and journal size in bytes"""
+        with self.__journal_lock:
+            return {"appends": self.__appends,
+                    "compactions": self.__compactions,
+                    "records": self.__sequence - self.__compacted,
+                    "journal_size": self.__size}
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__requested or
+                                          self.__closed)
+                if self.__closed:
+                    return
+                self.__requested = False
+                self.__compacting = True
+            try:
+                self.compact()
+            except Exception as error:  # pylint: disable=broad-except
+                self.__error = error
+            with self.__condition:
+                self.__compacting = False
+                self.__condition.notify_all()
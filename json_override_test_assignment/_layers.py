@@ -0,0 +1,195 @@
+"""Module that merges ordered override layers on top of original configs"""
+
+import os as _os
+from typing import Generator as _Generator, Iterable as _Iterable, \
+    List as _List, Optional as _Optional, Tuple as _Tuple
+from ._configs_handler import Configs as _Configs, PathType as _PathType, \
+    copy_json as _copy_json, path_keys as _path_keys, \
+    shared_overridden as _shared_overridden
+from ._diff import diff_list as _diff_list, equal as _equal, \
+    is_sparse as _is_sparse, OPERATIONS as _OPERATIONS
+from . import _diff
+
+
+def _edit_layer(layer: dict, below: dict, over: dict,
+                sparse_lists: bool) -> _Generator:
+    """Steps of _diff._run() putting values of changeset into given layer.
+    Values equal to the ones below the layer are removed from it, empty
+    dicts are pruned. Sparse changesets of lists address elements of the
+    list the layer makes"""
+    for key in over:
+        if key not in below:
+            continue
+        if isinstance(below[key], dict):
+            nested = layer.get(key)
+            nested = nested.copy() if isinstance(nested, dict) else {}
+            yield _edit_layer(nested, below[key], over[key], sparse_lists)
+            if nested:
+                layer[key] = nested
+            else:
+                layer.pop(key, None)
+        elif isinstance(below[key], list) and _is_sparse(over[key]):
+            current = _shared_overridden(below[key], layer[key]) \
+                if key in layer else below[key]
+            value = _shared_overridden(current, over[key])
+            if sparse_lists:
+                value = _diff_list(below[key], value)
+            elif _equal(value, below[key]):
+                value = None
+            if value is None:
+                layer.pop(key, None)
+            else:
+                layer[key] = _copy_json(value)
+        elif _equal(below[key], over[key]):
+            layer.pop(key, None)
+        else:
+            layer[key] = _copy_json(over[key])
+
+
+def _supplies(layer: dict, keys: tuple) -> bool:
+    """Check given layer overrides the value at given keys. Lists overridden
+    as a whole or with elements removed or inserted are supplied with all
+    their elements"""
+    node = layer
+    for key in keys:
+        if not isinstance(node, dict):
+            return True
+        if _is_sparse(node):
+            # note: list elements are addressed by index in sparse overrides
+            if any(operation in node for operation in _OPERATIONS):
+                return True
+            key = str(key)
+        elif isinstance(key, int):
+            # the list is replaced by a dict
+            return True
+        if key not in node:
+            return False
+        node = node[key]
+    return not isinstance(node, dict)
+
+
+class OverrideLayers:
+    """
+    Ordered override layers (site-wide, host, user...) on top of original
+    configs. Result of merging every layer is cached, so a change in a layer
+    recomputes only the layers from it to the top. Merges copy only dicts
+    along overridden paths and share the rest, so merged configs and layers
+    must not be changed in place: use edit(), set_layer() and set_config()
+    """
+
+    def __init__(self, original: _Configs,
+                 layers: _Iterable[_Tuple[str, dict]],
+                 sparse_lists: bool = False):
+        """"layers" are (name, overrides) pairs, the lowest one first. With
+        "sparse_lists" edited lists are stored as sparse overrides"""
+        self.__original = original
+        self.__sparse_lists = sparse_lists
+        self.__names = []
+        self.__layers = []
+        for name, layer in layers:
+            self.__names.append(name)
+            self.__layers.append(_Configs(layer))
+        self.__merged = [_Configs()] * len(self.__layers)
+        # number of merges of single layers done so far
+        self.merges = 0
+        self.__recompute(0)
+
+    @classmethod
+    def from_directory(cls, original: _Configs, directory: str,
+                       sparse_lists: bool = False) -> "OverrideLayers":
+        """Load layers from "*.json" files of given directory ordered by file
+        name, e.g. "10-site.json", "20-host.json", "30-user.json". Layers are
+        named after files without extension"""
+        if not _os.path.isdir(directory):
+            raise NotADirectoryError(f"Overrides directory \"{directory}\" "
+                                     f"not found")
+
+        files = sorted(f for f in _os.listdir(directory)
+                       if f.endswith(".json"))
+        paths = [_os.path.join(directory, f) for f in files]
+        return cls(original, [
+            (_os.path.splitext(f)[0],
+             _Configs.read_config(p) if _os.path.getsize(p) else {})
+            for f, p in zip(files, paths)], sparse_lists)
+
+    @property
+    def names(self) -> _List[str]:
+        """Names of layers, the lowest one first"""
+        return list(self.__names)
+
+    @property
+    def original(self) -> _Configs:
+        """Configs under every layer"""
+        return self.__original
+
+    @property
+    def actual(self) -> _Configs:
+        """Configs with every layer applied"""
+        return self.__merged[-1] if self.__merged else self.__original
+
+    def layer(self, name: str) -> _Configs:
+        """Return overrides of given layer"""
+        return self.__layers[self.__names.index(name)]
+
+    def merged(self, name: str) -> _Configs:
+        """Return configs with layers up to the given one applied"""
+        return self.__merged[self.__names.index(name)]
+
+    def __recompute(self, first: int, keys: set = None):
+        """Merge layers from given one to the top. If "keys" are given only
+        these configs are merged again"""
+        below = self.__merged[first - 1] if first else self.__original
+        for i in range(first, len(self.__layers)):
+            layer = self.__layers[i]
+            if keys is None:
+                merged = _Configs.override(below, layer, share=True)
+            else:
+                merged = _Configs(self.__merged[i])
+                for key in keys:
+                    if key in below:
+                        merged[key] = below[key]
+                    else:
+                        merged.pop(key, None)
+                merged = _Configs.override(
+                    merged, {k: layer[k] for k in keys if k in layer},
+                    share=True)
+            self.__merged[i] = below = merged
+            self.merges += 1
+
+    def edit(self, name: str, over: dict):
+        """Apply changeset to given layer and merge the layers above it.
+        Like Configs.patch() values equal to the ones below the layer are
+        removed from it"""
+        index = self.__names.index(name)
+        below = self.__merged[index - 1] if index else self.__original
+        layer = _Configs(self.__layers[index])
+        _diff._run(_edit_layer(layer, below, over, self.__sparse_lists))
+        self.__layers[index] = layer
+        self.__recompute(index, set(over))
+
+    def set_layer(self, name: str, overrides: dict):
+        """Replace overrides of given layer, e.g. after its file is changed"""
+        index = self.__names.index(name)
+        self.__layers[index] = _Configs(overrides)
+        self.__recompute(index)
+
+    def set_config(self, name: str, config: _Optional[dict]):
+        """Replace original config with given name, None removes it"""
+        original = _Configs(self.__original)
+        if config is None:
+            original.pop(name, None)
+        else:
+            original[name] = config
+        self.__original = original
+        if self.__layers:
+            self.__recompute(0, {name})
+
+    def source(self, path: _PathType) -> _Optional[str]:
+        """Return name of the layer which supplied the value at given path,
+        None if it comes from original configs"""
+        keys = _path_keys(path)
+        for name, layer in zip(reversed(self.__names),
+                               reversed(self.__layers)):
+            if _supplies(layer, keys):
+                return name
+        return None
@@ -0,0 +1,235 @@
+"""Module that provides lazily parsed access to memory-mapped JSON files"""
+
+import json as _json
+import mmap as _mmap
+import re as _re
+from copy import deepcopy as _deepcopy
+
+from ._parsers import _stdlib_loads
+
+_WHITESPACE = _re.compile(rb"[ \t\n\r]*")
+_STRING = _re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', _re.DOTALL)
+_SCALAR = _re.compile(rb"[^,:\]} \t\n\r]+")
+# note: strings are matched as a whole so brackets inside them are skipped
+_FILLER = _re.compile(rb'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*',
+                      _re.DOTALL)
+
+
+def _error(message: str, pos: int) -> _json.JSONDecodeError:
+    return _json.JSONDecodeError(message, "", pos)
+
+
+def _skip_whitespace(buffer, pos: int) -> int:
+    return _WHITESPACE.match(buffer, pos).end()
+
+
+def _skip_value(buffer, pos: int) -> int:
+    """Return position right after JSON value starting at given position"""
+    if pos >= len(buffer):
+        raise _error("Expecting value", pos)
+
+    char = buffer[pos:pos + 1]
+    if char == b'"':
+        match = _STRING.match(buffer, pos)
+        if match is None:
+            raise _error("Unterminated string", pos)
+        return match.end()
+
+    if char not in b"{[":
+        match = _SCALAR.match(buffer, pos)
+        if match is None:
+            raise _error("Expecting value", pos)
+        return match.end()
+
+    # Skip everything but brackets in one go
+    depth, start = 0, pos
+    while True:
+        char = buffer[pos:pos + 1]
+        if not char or char == b'"':
+            raise _error("Unterminated container", start)
+        depth += 1 if char in b"{[" else -1
+        pos += 1
+        if not depth:
+            return pos
+        pos = _FILLER.match(buffer, pos).end()
+
+
+def _index_object(buffer, pos: int, document: "LazyDocument") -> tuple:
+    """Return {key: span of value} of JSON object starting at given position
+    and position right after the object"""
+    assert buffer[pos:pos + 1] == b"{"
+    index = {}
+
+    pos = _skip_whitespace(buffer, pos + 1)
+    if buffer[pos:pos + 1] == b"}":
+        return index, pos + 1
+
+    while True:
+        match = _STRING.match(buffer, pos)
+        if match is None:
+            raise _error("Expecting property name enclosed in double quotes",
+                         pos)
+        key = _json.loads(match.group().decode("ascii"))
+
+        pos = _skip_whitespace(buffer, match.end())
+        if buffer[pos:pos + 1] != b":":
+            raise _error("Expecting ':' delimiter", pos)
+        start = _skip_whitespace(buffer, pos + 1)
+        end = _skip_value(buffer, start)
+        index[key] = _Span(document, start, end)
+
+        pos = _skip_whitespace(buffer, end)
+        char = buffer[pos:pos + 1]
+        if char == b"}":
+            return index, pos + 1
+        if char != b",":
+            raise _error("Expecting ',' delimiter", pos)
+        pos = _skip_whitespace(buffer, pos + 1)
+
+
+class _Span:
+    """Not yet parsed JSON value. Spans are shared between copies of
+    LazyDict, so equal spans mean equal values"""
+    __slots__ = ("document", "start", "end", "__index")
+
+    def __init__(self, document: "LazyDocument", start: int, end: int,
+                 index: dict = None):
+        self.document = document
+        self.start = start
+        self.end = end
+        self.__index = index
+
+    def value(self):
+        """Parse the value. Objects become LazyDict with unparsed values"""
+        buffer = self.document.buffer
+        if buffer[self.start:self.start + 1] == b"{":
+            if self.__index is None:
+                self.__index = _index_object(buffer, self.start,
+                                             self.document)[0]
+            return LazyDict(self.__index)
+        return _stdlib_loads(buffer[self.start:self.end])
+
+
+class LazyDict (dict):
+    """
+    Dict whose values are parsed from the memory-mapped file on first access.
+    Behaves like a regular dict for reading, copying, comparing and JSON
+    encoding. Untouched values are compared without parsing them
+    """
+
+    def __resolve(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, _Span):
+            value = value.value()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __resolve_all(self):
+        for key in self:
+            self.__resolve(key)
+
+    def __getitem__(self, key):
+        return self.__resolve(key)
+
+    def __iter__(self):
+        # note: disables dict fast paths (dict(), update()) that would copy
+        # unparsed spans
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self.__resolve(key) if key in self else default
+
+    def items(self):
+        self.__resolve_all()
+        return dict.items(self)
+
+    def values(self):
+        self.__resolve_all()
+        return dict.values(self)
+
+    def pop(self, key, *default):
+        if key in self:
+            self.__resolve(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self.__resolve_all()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self.__resolve(key)
+        return dict.setdefault(self, key, default)
+
+    def copy(self) -> "LazyDict":
+        return LazyDict(dict.items(self))
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo: dict) -> "LazyDict":
+        result = LazyDict()
+        memo[id(self)] = result
+        for key, value in dict.items(self):
+            dict.__setitem__(result, key, value if isinstance(value, _Span)
+                             else _deepcopy(value, memo))
+        return result
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+    def __eq__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+
+        lazy = isinstance(other, LazyDict)
+        for key, value in dict.items(self):
+            if key not in other:
+                return False
+            if lazy and dict.__getitem__(other, key) is value:
+                continue
+            if self.__resolve(key) != other[key]:
+                return False
+        return True
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        self.__resolve_all()
+        return dict.__repr__(self)
+
+
+class LazyDocument:
+    """
+    Memory-mapped JSON file. Only the offsets of the top-level values are
+    indexed on opening, everything else is parsed on demand
+    """
+
+    def __init__(self, filename: str):
+        # pylint: disable=invalid-name
+        with open(filename, 'rb') as f:
+            try:
+                self.buffer = _mmap.mmap(f.fileno(), 0,
+                                         access=_mmap.ACCESS_READ)
+            except ValueError as error:  # empty file
+                raise _error("Expecting value", 0) from error
+
+        # Index top-level object right away, it's scanned to the end anyway
+        start = _skip_whitespace(self.buffer, 0)
+        if self.buffer[start:start + 1] == b"{":
+            index, end = _index_object(self.buffer, start, self)
+        else:
+            index, end = None, _skip_value(self.buffer, start)
+        if _skip_whitespace(self.buffer, end) != len(self.buffer):
+            raise _error("Extra data", end)
+        self.__root = _Span(self, start, end, index)
+
+    @property
+    def root(self):
+        """Top-level value of the document"""
+        return self.__root.value()
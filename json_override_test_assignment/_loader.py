@@ -0,0 +1,83 @@
+"""Module that reads and merges configs in a background thread"""
+
+from typing import Callable as _Callable
+
+# pylint: disable=no-name-in-module
+from PySide2.QtCore import QObject as _QObject, QThread as _QThread, \
+    Signal as _Signal
+
+from ._cache import ConfigsCache as _ConfigsCache
+from ._configs_handler import Configs as _Configs, \
+    ConfigsLoadError as _ConfigsLoadError
+
+
+class ConfigsLoader (_QThread):
+    """
+    Reads "config*.json" files, overrides them and builds tree items in a
+    background thread. Results are handed over "chunk_size" configs at a
+    time through queued signals. requestInterruption() cancels loading
+    between chunks
+    """
+
+    # original configs, overridden configs, their overrides and tree items
+    # built by "make_items" (None if it's not given)
+    chunkLoaded = _Signal(object, object, object, object, name="chunkLoaded")
+    # number of loaded and total number of config files
+    progress = _Signal(int, int, name="progress")
+    failed = _Signal(str, name="failed")
+
+    def __init__(self, configs_dir: str, overrides: dict,
+                 make_items: _Callable[[_Configs], list] = None,
+                 chunk_size: int = 16, workers: int = None,
+                 processes: bool = False, cache: _ConfigsCache = None,
+                 lazy: bool = False, sparse_lists: bool = False,
+                 parent: _QObject = None):
+        """Given overrides must not be changed while loading. With
+        "sparse_lists" changed lists are diffed element by element"""
+        assert chunk_size > 0
+        _QThread.__init__(self, parent)
+        self.__configs_dir = configs_dir
+        self.__overrides = overrides
+        self.__make_items = make_items
+        self.__chunk_size = chunk_size
+        self.__workers = workers
+        self.__processes = processes
+        self.__cache = cache
+        self.__lazy = lazy
+        self.__sparse_lists = sparse_lists
+
+    def run(self):
+        """Override from QThread. Load configs chunk by chunk"""
+        try:
+            files = _Configs.config_files(self.__configs_dir)
+            names, paths = list(files), list(files.values())
+            self.progress.emit(0, len(names))
+
+            # Cached contents are loaded at once, the rest file by file
+            contents = None
+            if self.__cache is not None and not self.__lazy:
+                contents = self.__cache.load(self.__configs_dir, paths,
+                                             self.__read)
+
+            for first in range(0, len(names), self.__chunk_size):
+                if self.isInterruptionRequested():
+                    return
+                last = min(first + self.__chunk_size, len(names))
+                chunk = contents[first:last] if contents is not None else \
+                    self.__read(paths[first:last])
+                self.__emit_chunk(_Configs(zip(names[first:last], chunk)))
+                self.progress.emit(last, len(names))
+
+        except (OSError, ValueError, _ConfigsLoadError) as error:
+            self.failed.emit(str(error))
+
+    def __read(self, filenames: list) -> list:
+        return _Configs.read_configs(filenames, self.__workers,
+                                     self.__processes, self.__lazy)
+
+    def __emit_chunk(self, original: _Configs):
+        actual = _Configs.override(original, {
+            k: v for k, v in self.__overrides.items() if k in original})
+        overrides = _Configs.diff(original, actual, self.__sparse_lists)
+        items = self.__make_items(actual) if self.__make_items else None
+        self.chunkLoaded.emit(original, actual, overrides, items)
@@ -1,14 +1,47 @@
-from json import dump as _dump
-from random import randint as _randint, choice as _choice
+from json import dump as _dump, dumps as _dumps
+from random import Random as _Random
 import os as _os
-from argparse import ArgumentParser as _ArgumentParser
 
 
-def create_json(filename: str, params: tuple = (2, 5)):
+def _is_range(value) -> bool:
+    return isinstance(value, tuple) and len(value) == 2 and \
+        all(isinstance(i, int) and i >= 0 for i in value) and \
+        value[1] >= value[0]
+
+
+def _create_value(rng: _Random, depth: int, fanout: tuple,
+                  list_length: tuple):
+    """Create random param value: string, list of strings or dict nested
+    "depth" levels deep"""
+    param_type = rng.choice((str, list, dict))
+    if param_type == str:
+        return "value"
+    elif param_type == list:
+        return [f"value{i+1}" for i in range(rng.randint(*list_length))]
+    elif depth <= 1:
+        return {f"key{i+1}": f"value{i+1}"
+                for i in range(rng.randint(*fanout))}
+    else:
+        return {f"key{i+1}": _create_value(rng, depth - 1, fanout,
+                                           list_length)
+                for i in range(rng.randint(*fanout))}
+
+
+def create_json(filename: str, params: tuple = (2, 5), seed: int = None,
+                depth: int = 1, fanout: tuple = None,
+                list_length: tuple = None, size: int = None):
     """
     Create .json file with appropriate format
     :param filename: full path to a target .json file
     :param params: (min, max) range for the number of params in file
+    :param seed: seed of random generator to get reproducible content
+    :param depth: nesting depth of dict params
+    :param fanout: (min, max) range for the number of keys in nested dicts,
+        "params" by default
+    :param list_length: (min, max) range for the number of list items,
+        "params" by default
+    :param size: approximate size of file in bytes. Params are added until
+        it's reached
     :return:
     """
 
@@ -24,24 +57,60 @@ def create_json(filename: str, params: tuple = (2, 5)):
            params[1] > params[0], f"{create_json.__name__}: " \
                                   f"'params' must contain (min, max) tuple"
 
+    # assert generator controls are valid
+    fanout = params if fanout is None else tuple(fanout)
+    list_length = params if list_length is None else tuple(list_length)
+    assert isinstance(depth, int) and depth > 0, \
+        f"{create_json.__name__}: 'depth' must be positive integer"
+    assert _is_range(fanout) and _is_range(list_length), \
+        f"{create_json.__name__}: 'fanout' and 'list_length' must contain " \
+        f"(min, max) tuples"
+
+    rng = _Random(seed)
+
     # create future json dictionary...
     content = dict.fromkeys([f"param{i+1}"
-                             for i in range(_randint(params[0], params[1]))],
+                             for i in range(rng.randint(params[0],
+                                                        params[1]))],
                             None)
     # ... and fill it
     for k in content:
-        param_type = _choice((str, list, dict))
-        if param_type == str:
-            content[k] = "value"
-        elif param_type == list:
-            content[k] = [f"value{i+1}" for i in range(_randint(params[0],
-                                                                params[1]))]
-        else:
-            content[k] = {f"key{i+1}": f"value{i+1}"
-                          for i in range(_randint(params[0], params[1]))}
+        content[k] = _create_value(rng, depth, fanout, list_length)
+
+    # ... and grow it up to requested size
+    if size is not None:
+        total = len(_dumps(content, indent=2))
+        while total < size:
+            key = f"param{len(content) + 1}"
+            content[key] = _create_value(rng, depth, fanout, list_length)
+            total += len(_dumps({key: content[key]}, indent=2))
 
     # save json to file
     with open(filename, 'w') as f:
         _dump(content, f, indent=2)
         f.write('\n')
 
+
+def create_corpus(directory: str, files: int, params: tuple = (2, 5),
+                  seed: int = None, depth: int = 1, fanout: tuple = None,
+                  list_length: tuple = None, size: int = None):
+    """
+    Create "config1.json" ... "config<files>.json" in given directory
+    :param directory: existing directory to put files in
+    :param files: number of files to create
+    :param seed: seed of random generator. File i is created with seed + i,
+        so the corpus is reproducible
+    :param size: approximate total size of files in bytes
+    The rest of params are passed to create_json()
+    """
+    assert _os.path.isdir(directory), \
+        f"{create_corpus.__name__}: 'directory' must exist"
+    assert isinstance(files, int) and files > 0, \
+        f"{create_corpus.__name__}: 'files' must be positive integer"
+
+    for i in range(files):
+        create_json(_os.path.join(directory, f"config{i+1}.json"),
+                    params=params,
+                    seed=None if seed is None else seed + i,
+                    depth=depth, fanout=fanout, list_length=list_length,
+                    size=None if size is None else size // files)
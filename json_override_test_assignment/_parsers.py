@@ -0,0 +1,264 @@
+"""
+Module with a registry of JSON parser backends. The standard library is
+always available, orjson and ujson are registered when they're installed.
+Whatever the backend, parsed configs and errors are the ones of the standard
+library: documents a backend rejects are parsed by the standard library
+again, so it has the final word. Documents nested too deep for the
+recursive scanner of the standard library are parsed with a stack
+"""
+
+import json as _json
+import math as _math
+import os as _os
+import random as _random
+import re as _re
+import threading as _threading
+import time as _time
+from typing import Any as _Any, Callable as _Callable, Dict as _Dict, \
+    List as _List
+
+from ._misc import _create_value
+
+# name of backend to use instead of the fastest one
+PARSER_VARIABLE = "JSON_OVERRIDE_PARSER"
+STDLIB = "stdlib"
+
+
+_WHITESPACE = _re.compile(r"[ \t\n\r]*")
+_CONSTANTS = (("null", None), ("true", True), ("false", False),
+              ("NaN", _math.nan), ("Infinity", _math.inf),
+              ("-Infinity", -_math.inf))
+
+
+def _loads_iteratively(text: str):
+    """Parse JSON text like json.loads() does keeping open containers in a
+    stack instead of recursing into them, so the depth isn't limited"""
+    error = _json.JSONDecodeError
+    scanstring = _json.decoder.scanstring
+    number = _json.scanner.NUMBER_RE.match
+    whitespace = _WHITESPACE.match
+    stack = []  # [container, key of the value being parsed]
+
+    def key_at(pos: int) -> tuple:
+        """Return (key, position of its value) of object member at pos"""
+        if text[pos:pos + 1] != '"':
+            raise error("Expecting property name enclosed in double quotes",
+                        text, pos)
+        key, pos = scanstring(text, pos + 1)
+        pos = whitespace(text, pos).end()
+        if text[pos:pos + 1] != ":":
+            raise error("Expecting ':' delimiter", text, pos)
+        return key, whitespace(text, pos + 1).end()
+
+    pos = whitespace(text).end()
+    while True:
+        # parse value at pos, open containers are continued below
+        char = text[pos:pos + 1]
+        if char == '"':
+            value, pos = scanstring(text, pos + 1)
+        elif char == "{" or char == "[":
+            pos = whitespace(text, pos + 1).end()
+            closing = "}" if char == "{" else "]"
+            if text[pos:pos + 1] == closing:
+                value, pos = ({} if char == "{" else []), pos + 1
+            elif char == "{":
+                key, pos = key_at(pos)
+                stack.append([{}, key])
+                continue
+            else:
+                stack.append([[], None])
+                continue
+        else:
+            match = number(text, pos)
+            if match is not None:
+                integer, frac, exp = match.groups()
+                value = float(integer + (frac or "") + (exp or "")) \
+                    if frac or exp else int(integer)
+                pos = match.end()
+            else:
+                for name, value in _CONSTANTS:
+                    if text.startswith(name, pos):
+                        pos += len(name)
+                        break
+                else:
+                    raise error("Expecting value", text, pos)
+
+        # put the value into its container, close finished containers
+        while stack:
+            container, key = frame = stack[-1]
+            if key is None:
+                container.append(value)
+            else:
+                container[key] = value
+            pos = whitespace(text, pos).end()
+            char = text[pos:pos + 1]
+            if char == ",":
+                pos = whitespace(text, pos + 1).end()
+                if key is not None:
+                    frame[1], pos = key_at(pos)
+                break
+            if char != ("]" if key is None else "}"):
+                raise error("Expecting ',' delimiter", text, pos)
+            stack.pop()
+            value, pos = container, pos + 1
+        else:
+            pos = whitespace(text, pos).end()
+            if pos != len(text):
+                raise error("Extra data", text, pos)
+            return value
+
+
+# backends recurse without a limit (orjson crashes on objects nested some
+# thousands levels deep), deeper documents are left to the standard library
+_MAX_DEPTH = 512
+# digits to "0", brackets of both kinds to "[" and "]", bytes ending numbers
+# to ","; the rest is deleted, see _needs_stdlib()
+_SCAN = bytes(48 if 48 <= i < 58 else 91 if i in b"[{" else
+              93 if i in b"]}" else 44 if i in b",:.eE" else i
+              for i in range(256))
+_NOT_SCANNED = bytes(i for i in range(256) if i not in b"0123456789[]{},:.eE")
+
+
+def _needs_stdlib(data: bytes) -> bool:
+    """Check data is left to the standard library whatever the backend:
+    non-ASCII, having 19 digits in a row (ints that may not fit into 64 bits
+    some backends turn into floats silently) or nesting containers deeper
+    than _MAX_DEPTH. Digits and brackets are picked out in a single pass,
+    then innermost pairs of brackets are removed level by level. The ones
+    inside strings err on the safe side"""
+    if not data.isascii():
+        return True
+    scanned = data.translate(_SCAN, _NOT_SCANNED)
+    if b"0" * 19 in scanned:
+        return True
+    brackets = scanned.translate(None, b"0,")
+    for _ in range(_MAX_DEPTH):
+        paired = brackets.replace(b"[]", b"")
+        if len(paired) == len(brackets):
+            return len(brackets) > _MAX_DEPTH
+        brackets = paired
+    return bool(brackets)
+
+
+def _stdlib_loads(data: bytes):
+    # note: config files are ASCII, non-ASCII data raises UnicodeDecodeError
+    # as reading them in text mode with encoding="ascii" does
+    text = data.decode("ascii")
+    try:
+        return _json.loads(text)
+    except RecursionError:
+        return _loads_iteratively(text)
+
+
+_backends = {STDLIB: _stdlib_loads}  # type: _Dict[str, _Callable]
+_selected = None
+_lock = _threading.Lock()
+
+
+def register_parser(name: str, loads: _Callable[[bytes], _Any]):
+    """Register JSON parser backend taking contents of a file as bytes.
+    Automatic selection is made again to consider it"""
+    global _selected  # pylint: disable=global-statement
+    with _lock:
+        _backends[name] = loads
+        if _selected is not None and _selected[1]:
+            _selected = None
+
+
+def _register_installed():
+    # pylint: disable=import-outside-toplevel
+    try:
+        import orjson
+        register_parser("orjson", orjson.loads)
+    except ImportError:
+        pass
+    try:
+        import ujson
+        register_parser("ujson", ujson.loads)
+    except ImportError:
+        pass
+
+
+_register_installed()
+
+
+def available_parsers() -> _List[str]:
+    """Return names of registered backends"""
+    return list(_backends)
+
+
+def parse_json(data: bytes, parser: str = None):
+    """Parse JSON from contents of a file with given backend, the selected
+    one by default"""
+    name = parser or selected_parser()
+    if name == STDLIB or _needs_stdlib(data):
+        return _stdlib_loads(data)
+    try:
+        return _backends[name](data)
+    except Exception:  # pylint: disable=broad-except
+        # note: backends reject some of documents the standard library
+        # accepts (NaN, lone surrogates) and report errors in their own way
+        return _stdlib_loads(data)
+
+
+def _sample() -> bytes:
+    """Return JSON document of about 200 KB like the ones create_json()
+    generates"""
+    rng = _random.Random(1)
+    content = {f"param{i + 1}": _create_value(rng, 3, (5, 10), (5, 20))
+               for i in range(100)}
+    return _json.dumps(content, indent=2).encode("ascii")
+
+
+def benchmark_parsers(data: bytes = None,
+                      repeat: int = 5) -> _Dict[str, float]:
+    """Return {backend: the shortest time of parse_json() with it on given
+    data in seconds}, a config-like sample by default. Checks of the data
+    parse_json() makes for backends other than the standard library are
+    timed too. Backends whose results differ from the ones of the standard
+    library are left out"""
+    data = _sample() if data is None else data
+    expected = _stdlib_loads(data)
+    times = {}
+    for name in list(_backends):
+        try:
+            if name != STDLIB and parse_json(data, name) != expected:
+                continue
+        except Exception:  # pylint: disable=broad-except
+            continue
+        best = float("inf")
+        for _ in range(repeat):
+            started = _time.perf_counter()
+            parse_json(data, name)
+            best = min(best, _time.perf_counter() - started)
+        times[name] = best
+    return times
+
+
+def select_parser(name: str = None, data: bytes = None) -> str:
+    """Make given backend the default one. Without a name the fastest one
+    parsing given data is selected by benchmark_parsers(), unless
+    "JSON_OVERRIDE_PARSER" environment variable names one. Return name of
+    selected backend"""
+    global _selected  # pylint: disable=global-statement
+    automatic = name is None
+    if automatic:
+        name = _os.environ.get(PARSER_VARIABLE) or None
+        automatic = name is None
+    if name is not None and name not in _backends:
+        raise ValueError(f"Unknown JSON parser \"{name}\", available: "
+                         f"{', '.join(_backends)}")
+    if automatic:
+        name = STDLIB
+        if len(_backends) > 1:
+            times = benchmark_parsers(data, repeat=3)
+            name = min(times, key=times.get)
+    with _lock:
+        _selected = (name, automatic)
+    return name
+
+
+def selected_parser() -> str:
+    """Return name of default backend, selecting it on first call"""
+    selected = _selected
+    return select_parser() if selected is None else selected[0]
@@ -0,0 +1,241 @@
+"""Module that measures calls of hot functions on demand"""
+
+import atexit as _atexit
+import functools as _functools
+import json as _json
+import os as _os
+import signal as _signal
+import sys as _sys
+import threading as _threading
+from time import perf_counter_ns as _perf_counter_ns
+from typing import Callable as _Callable, Dict as _Dict, \
+    Iterable as _Iterable, Optional as _Optional
+
+from ._configs_handler import Configs as _Configs
+from ._writer import atomic_write as _atomic_write
+from .tree import TreeItem as _TreeItem
+
+# "1" enables profiling with a report on exit, see profiling_from_environment
+PROFILE_VARIABLE = "JSON_OVERRIDE_PROFILE"
+# file name of Chrome trace written on exit
+TRACE_VARIABLE = "JSON_OVERRIDE_TRACE"
+
+_CONFIGS_TARGETS = ("override", "patch", "diff", "json_patch", "dump",
+                    "dumps", "from_config_dir", "read_configs")
+_MODEL_TARGETS = ("load", "update", "data", "setData", "headerData", "index",
+                  "parent", "rowCount", "columnCount", "hasChildren",
+                  "canFetchMore", "fetchMore", "flags")
+
+
+class Profiler:
+    """
+    Counts calls of instrumented functions and keeps histograms of their
+    latencies with power of two buckets, optionally a timeline of calls too.
+    Functions are wrapped by install() only, so there's no overhead unless
+    profiling is enabled. Recursive calls are measured once, as a whole
+    """
+
+    def __init__(self, trace: bool = False, max_events: int = 1_000_000):
+        self.__lock = _threading.Lock()
+        # name -> [calls, total ns, max ns, histogram]
+        self.__stats = {}  # type: _Dict[str, list]
+        self.__events = [] if trace else None
+        self.__max_events = max_events
+        self.__active = _threading.local()
+        self.__origin = _perf_counter_ns()
+        self.__installed = []  # (owner, attribute, original)
+
+    def record(self, name: str, started: int, duration: int):
+        """Account call of given name started at given perf_counter_ns()
+        and lasted given number of nanoseconds"""
+        with self.__lock:
+            stats = self.__stats.get(name)
+            if stats is None:
+                stats = self.__stats[name] = [0, 0, 0, [0] * 64]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+            stats[3][min(duration.bit_length(), 63)] += 1
+
+            if self.__events is not None and \
+                    len(self.__events) < self.__max_events:
+                self.__events.append((name, started, duration,
+                                      _threading.get_ident()))
+
+    def wrap(self, name: str, function: _Callable) -> _Callable:
+        """Return given function measured under given name"""
+        record, active = self.record, self.__active
+
+        @_functools.wraps(function)
+        def measured(*args, **kwargs):
+            names = getattr(active, "names", None)
+            if names is None:
+                names = active.names = set()
+            if name in names:
+                return function(*args, **kwargs)
+
+            names.add(name)
+            started = _perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, started, _perf_counter_ns() - started)
+                names.discard(name)
+        return measured
+
+    def install(self, owner: type, attributes: _Iterable[str]):
+        """Wrap given methods defined by given class itself"""
+        for attribute in attributes:
+            original = owner.__dict__.get(attribute)
+            if original is None:
+                continue
+            name = f"{owner.__name__}.{attribute}"
+            if isinstance(original, (staticmethod, classmethod)):
+                wrapped = type(original)(self.wrap(name, original.__func__))
+            else:
+                wrapped = self.wrap(name, original)
+            setattr(owner, attribute, wrapped)
+            self.__installed.append((owner, attribute, original))
+
+    def uninstall(self):
+        """Restore every wrapped method"""
+        while self.__installed:
+            owner, attribute, original = self.__installed.pop()
+            setattr(owner, attribute, original)
+
+    def stats(self) -> _Dict[str, dict]:
+        """Return calls, total, mean, max and estimated median and 99th
+        percentile latencies (in seconds) per function name"""
+        with self.__lock:
+            snapshot = {name: (calls, total, longest, list(histogram))
+                        for name, (calls, total, longest, histogram)
+                        in self.__stats.items()}
+
+        def percentile(calls: int, histogram: list, share: float) -> int:
+            # upper bound of the bucket the percentile falls into
+            count = 0
+            for bucket, bucket_count in enumerate(histogram):
+                count += bucket_count
+                if count >= share * calls:
+                    return 1 << bucket
+            return 1 << len(histogram)
+
+        return {name: {"calls": calls,
+                       "total": total / 1e9,
+                       "mean": total / calls / 1e9,
+                       "p50": min(percentile(calls, histogram, 0.5),
+                                  longest) / 1e9,
+                       "p99": min(percentile(calls, histogram, 0.99),
+                                  longest) / 1e9,
+                       "max": longest / 1e9}
+                for name, (calls, total, longest, histogram)
+                in snapshot.items()}
+
+    def report(self) -> str:
+        """Return table of stats() sorted by total time"""
+        lines = [f"{'function':32}{'calls':>10}{'total ms':>12}"
+                 f"{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for name, stats in sorted(self.stats().items(),
+                                  key=lambda item: -item[1]["total"]):
+            lines.append(f"{name:32}{stats['calls']:>10}"
+                         f"{stats['total'] * 1e3:>12.3f}"
+                         + "".join(f"{stats[k] * 1e6:>10.1f}"
+                                   for k in ("mean", "p50", "p99", "max")))
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Return recorded calls in Chrome trace event format, to be opened
+        in chrome://tracing or Perfetto"""
+        with self.__lock:
+            events = list(self.__events or ())
+        pid = _os.getpid()
+        return {"traceEvents": [{"name": name, "ph": "X", "pid": pid,
+                                 "tid": thread,
+                                 "ts": (started - self.__origin) / 1e3,
+                                 "dur": duration / 1e3}
+                                for name, started, duration, thread in events],
+                "displayTimeUnit": "ms"}
+
+    def dump_trace(self, filename: str):
+        """Write chrome_trace() to given file"""
+        _atomic_write(filename, _json.dumps(self.chrome_trace()))
+
+
+_profiler = None  # type: _Optional[Profiler]
+_report = None  # type: _Optional[_Callable]
+_report_later = None  # type: _Optional[_Callable]
+
+
+def enable_profiling(trace_file: str = None,
+                     report_on_exit: bool = True) -> Profiler:
+    """
+    Instrument Configs operations, TreeItem.load() and overrides of tree
+    models. The report is printed to stderr on exit and on SIGUSR1 (from
+    another thread), the timeline is written to "trace_file" then too if
+    it's given
+    """
+    # pylint: disable=global-statement
+    global _profiler, _report, _report_later
+    disable_profiling()
+    _profiler = profiler = Profiler(trace=trace_file is not None)
+
+    profiler.install(_Configs, _CONFIGS_TARGETS)
+    profiler.install(_TreeItem, ("load",))
+    try:
+        # pylint: disable=import-outside-toplevel
+        from .tree import _model
+    except ImportError:
+        pass
+    else:
+        profiler.install(_model.TreeModel, _MODEL_TARGETS)
+        profiler.install(_model.ColumnarTreeModel, _MODEL_TARGETS)
+
+    if report_on_exit:
+        def report(*_):
+            print(profiler.report(), file=_sys.stderr)
+            if trace_file is not None:
+                profiler.dump_trace(trace_file)
+        def report_later(*_):
+            # note: the signal may interrupt record() holding the lock, so
+            # the report waits for it in another thread
+            _threading.Thread(target=report, name="ProfilingReport",
+                              daemon=True).start()
+        _report = report
+        _atexit.register(report)
+        if _can_handle_signal():
+            _signal.signal(_signal.SIGUSR1, report_later)
+            _report_later = report_later
+    return profiler
+
+
+def _can_handle_signal() -> bool:
+    return hasattr(_signal, "SIGUSR1") and \
+        _threading.current_thread() is _threading.main_thread()
+
+
+def disable_profiling() -> _Optional[Profiler]:
+    """Remove instrumentation. Return the profiler used"""
+    # pylint: disable=global-statement
+    global _profiler, _report, _report_later
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.uninstall()
+    if _report is not None:
+        _atexit.unregister(_report)
+        _report = None
+    if _report_later is not None:
+        if _can_handle_signal() and \
+                _signal.getsignal(_signal.SIGUSR1) is _report_later:
+            _signal.signal(_signal.SIGUSR1, _signal.SIG_DFL)
+        _report_later = None
+    return profiler
+
+
+def profiling_from_environment() -> _Optional[Profiler]:
+    """Enable profiling if JSON_OVERRIDE_PROFILE is set to "1" or
+    JSON_OVERRIDE_TRACE names a trace file"""
+    trace_file = _os.environ.get(TRACE_VARIABLE) or None
+    if _os.environ.get(PROFILE_VARIABLE, "0") in ("", "0") and \
+            trace_file is None:
+        return None
+    return enable_profiling(trace_file)
@@ -0,0 +1,204 @@
+"""Module that indexes keys, values and paths of configs for fast search"""
+
+from bisect import bisect_left as _bisect_left, insort as _insort
+from typing import Any as _Any, Iterable as _Iterable, Set as _Set
+
+_GRAM = 3
+
+
+def _grams(token: str, sizes: range = range(1, _GRAM + 1)) -> set:
+    """Return substrings of given token with given lengths"""
+    return {token[i:i + n] for n in sizes for i in range(len(token) - n + 1)}
+
+
+def dotted(path: tuple) -> str:
+    """Return lowercase dotted form of given path, as it's searched"""
+    return ".".join(str(k) for k in path).lower()
+
+
+class SearchIndex:
+    """
+    Inverted index of configs nodes. Nodes are addressed by paths: tuples of
+    keys from the root. Keys and values of leaves are lowercased into tokens;
+    sorted tokens serve prefix queries and substrings of tokens up to three
+    characters long serve substring queries. Queries with dots are matched
+    against dotted paths of nodes too
+    """
+
+    def __init__(self):
+        self.__paths = []  # node id -> path, None for removed nodes
+        self.__ids = {}  # path -> node id
+        self.__children = {}  # node id -> ids of children
+        self.__values = {}  # node id -> value token of leaf
+        self.__postings = {}  # token -> node ids
+        self.__positions = {}  # index in list as str -> node ids
+        self.__tokens = []  # sorted tokens
+        self.__grams = {}  # substring up to _GRAM long -> tokens
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    @classmethod
+    def build(cls, configs: dict) -> "SearchIndex":
+        """Index every node of given configs"""
+        index = cls()
+        for key, value in configs.items():
+            index.add((key,), value)
+        return index
+
+    def __add_token(self, token: str, node: int):
+        nodes = self.__postings.get(token)
+        if nodes is None:
+            nodes = self.__postings[token] = set()
+            _insort(self.__tokens, token)
+            for gram in _grams(token):
+                self.__grams.setdefault(gram, set()).add(token)
+        nodes.add(node)
+
+    def __remove_token(self, token: str, node: int):
+        nodes = self.__postings[token]
+        nodes.discard(node)
+        if not nodes:
+            del self.__postings[token]
+            del self.__tokens[_bisect_left(self.__tokens, token)]
+            for gram in _grams(token):
+                tokens = self.__grams[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self.__grams[gram]
+
+    def __remove_position(self, position: str, node: int):
+        nodes = self.__positions[position]
+        nodes.discard(node)
+        if not nodes:
+            del self.__positions[position]
+
+    def add(self, path: tuple, value: _Any):
+        """Index node with given path and value and all its descendants.
+        The parent of the node must be indexed already"""
+        parent = self.__ids.get(path[:-1]) if len(path) > 1 else None
+        stack = [(path, value, parent)]
+        while stack:
+            path, value, parent = stack.pop()
+            if path in self.__ids:
+                self.remove(path)
+
+            node = len(self.__paths)
+            self.__paths.append(path)
+            self.__ids[path] = node
+            if parent is not None:
+                self.__children.setdefault(parent, []).append(node)
+
+            # note: list elements are known by their values only, positions
+            # serve dotted queries
+            if isinstance(path[-1], str):
+                self.__add_token(path[-1].lower(), node)
+            else:
+                self.__positions.setdefault(str(path[-1]), set()).add(node)
+
+            if isinstance(value, dict):
+                stack.extend((path + (k,), v, node) for k, v in value.items())
+            elif isinstance(value, list):
+                stack.extend((path + (i,), v, node)
+                             for i, v in enumerate(value))
+            else:
+                self.__values[node] = token = str(value).lower()
+                self.__add_token(token, node)
+
+    def remove(self, path: tuple):
+        """Drop node with given path and all its descendants from the index"""
+        node = self.__ids.get(path)
+        if node is None:
+            return
+        parent = self.__ids.get(path[:-1])
+        if parent is not None:
+            self.__children[parent].remove(node)
+
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            path = self.__paths[node]
+            self.__paths[node] = None
+            del self.__ids[path]
+            stack.extend(self.__children.pop(node, ()))
+
+            if isinstance(path[-1], str):
+                self.__remove_token(path[-1].lower(), node)
+            else:
+                self.__remove_position(str(path[-1]), node)
+            token = self.__values.pop(node, None)
+            if token is not None:
+                self.__remove_token(token, node)
+
+    def set_value(self, path: tuple, value: _Any):
+        """Update value of indexed leaf"""
+        node = self.__ids[path]
+        self.__remove_token(self.__values[node], node)
+        self.__values[node] = token = str(value).lower()
+        self.__add_token(token, node)
+
+    def __match_tokens(self, text: str, prefix: bool) -> _Iterable[str]:
+        tokens = self.__tokens
+        if prefix:
+            first = _bisect_left(tokens, text)
+            last = _bisect_left(tokens, text + "\U0010ffff", first)
+            return tokens[first:last]
+
+        if len(text) <= _GRAM:
+            return self.__grams.get(text, ())
+
+        # candidates share every trigram of the text, check the rest
+        candidates = sorted((self.__grams.get(g, ())
+                             for g in _grams(text, (_GRAM,))), key=len)
+        result = set(candidates[0]).intersection(*candidates[1:])
+        return [t for t in result if text in t]
+
+    def search(self, text: str, prefix: bool = False) -> _Set[tuple]:
+        """
+        Return paths of nodes whose key or value contains given text
+        (case-insensitive) or starts with it if "prefix" is set. If the text
+        contains dots it's matched against dotted paths too: only the topmost
+        matching nodes are returned, not their descendants
+        """
+        text = text.lower().strip(".")
+        if not text:
+            return set()
+
+        paths = self.__paths
+        result = {paths[n] for t in self.__match_tokens(text, prefix)
+                  for n in self.__postings[t]}
+        if "." not in text:
+            return result
+
+        # Matching path ends within the last key and crosses the key of the
+        # parent, so children of nodes with matching keys are checked
+        head, _, last = text.rpartition(".")
+        parent_key = head.rpartition(".")[2]
+        if "." in head or prefix:
+            tokens = [parent_key] if parent_key in self.__postings else []
+            positions = [parent_key] if parent_key in self.__positions \
+                else []
+        else:
+            tokens = [t for t in self.__match_tokens(parent_key, False)
+                      if t.endswith(parent_key)]
+            positions = [p for p in self.__positions
+                         if p.endswith(parent_key)]
+        parents = [parent for token in tokens
+                   for parent in self.__postings[token]
+                   if isinstance(paths[parent][-1], str)]
+        parents += [parent for position in positions
+                    for parent in self.__positions[position]]
+
+        def matches(path: tuple) -> bool:
+            value = dotted(path)
+            return value.startswith(text) if prefix else text in value
+
+        for parent in parents:
+            if prefix and len(paths[parent]) != head.count(".") + 1:
+                continue
+            for node in self.__children.get(parent, ()):
+                path = paths[node]
+                if str(path[-1]).lower().startswith(last) and \
+                        matches(path) and not matches(path[:-1]):
+                    result.add(path)
+        return result
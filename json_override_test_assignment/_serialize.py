@@ -0,0 +1,195 @@
+"""
+Module that serializes configs into JSON text. Pretty-printed output is the
+one of json.dumps(value, indent=2), but the standard library encodes it in
+pure Python. Here containers of scalars, the bulk of configs, are encoded by
+the C encoder at once and only the rest is walked in Python. orjson is used
+when it's installed unless byte-identical output is requested
+"""
+
+import json as _json
+import math as _math
+from json.encoder import encode_basestring_ascii as _encode_string
+from typing import Any as _Any, Iterator as _Iterator
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+INDENT = "  "
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+# number of pieces joined into a single chunk of streamed output
+_BATCH = 16384
+_END = object()
+
+
+class _LeafEncoder:
+    """Encodes scalars and containers of scalars pretty-printed at given
+    depth with the C encoder"""
+
+    def __init__(self, sort_keys: bool):
+        self.__sort_keys = sort_keys
+        self.__scalar = _json.JSONEncoder(sort_keys=sort_keys).encode
+        self.__encoders = []  # by depth
+
+    def scalar(self, value: _Any) -> str:
+        return _encode_string(value) if type(value) is str else \
+            self.__scalar(value)
+
+    def key(self, key: _Any) -> str:
+        # note: like json.dumps() keys of basic types are turned into strings
+        if isinstance(key, str):
+            return _encode_string(key)
+        if key is None or isinstance(key, (bool, int, float)):
+            return _encode_string(self.__scalar(key))
+        raise TypeError(f"keys must be str, int, float, bool or None, "
+                        f"not {type(key).__name__}")
+
+    def leaf(self, value: _Any, depth: int) -> str:
+        """Return container of scalars pretty-printed at given depth"""
+        while len(self.__encoders) <= depth:
+            separator = ",\n" + INDENT * (len(self.__encoders) + 1)
+            self.__encoders.append(_json.JSONEncoder(
+                separators=(separator, ": "),
+                sort_keys=self.__sort_keys).encode)
+        text = self.__encoders[depth](value)
+        return f"{text[0]}\n{INDENT * (depth + 1)}{text[1:-1]}\n" \
+               f"{INDENT * depth}{text[-1]}"
+
+
+def _is_leaf(value) -> bool:
+    """Check given non-empty container holds scalars only"""
+    return _SCALARS.issuperset(map(type, value.values() if
+                                   isinstance(value, dict) else value))
+
+
+def _iterencode_pretty(value: _Any, sort_keys: bool) -> _Iterator[str]:
+    """Yield chunks of value pretty-printed the way json.dumps(value,
+    indent=2) does. Containers are walked with a stack, so the depth of the
+    value isn't limited by recursion"""
+    encoder = _LeafEncoder(sort_keys)
+    pieces = []
+    # [children iterator, depth, closing bracket, separator, container id]
+    stack = []
+    opened = set()
+    depth = 0
+
+    while True:
+        if type(value) in _SCALARS:
+            pieces.append(encoder.scalar(value))
+        elif isinstance(value, (dict, list)):
+            is_dict = isinstance(value, dict)
+            if not value:
+                pieces.append("{}" if is_dict else "[]")
+            elif _is_leaf(value):
+                pieces.append(encoder.leaf(value, depth))
+            else:
+                if id(value) in opened:
+                    raise ValueError("Circular reference detected")
+                opened.add(id(value))
+                if is_dict:
+                    children = iter(sorted(value.items()) if sort_keys
+                                    else value.items())
+                else:
+                    children = iter(value)
+                pieces.append("{" if is_dict else "[")
+                stack.append([children, depth + 1, "}" if is_dict else "]",
+                              "\n" + INDENT * (depth + 1), id(value)])
+        else:
+            # note: raises TypeError of json.dumps()
+            pieces.append(encoder.scalar(value))
+
+        # find the next value to encode
+        while stack:
+            frame = stack[-1]
+            child = next(frame[0], _END)
+            if child is _END:
+                stack.pop()
+                opened.discard(frame[4])
+                pieces.append("\n" + INDENT * (frame[1] - 1) + frame[2])
+                continue
+
+            separator = frame[3]
+            if separator[0] == "\n":
+                frame[3] = "," + separator
+            if frame[2] == "}":
+                key, value = child
+                pieces.append(f"{separator}{encoder.key(key)}: ")
+            else:
+                value = child
+                pieces.append(separator)
+            depth = frame[1]
+            break
+        else:
+            yield "".join(pieces)
+            return
+
+        if len(pieces) >= _BATCH:
+            yield "".join(pieces)
+            pieces.clear()
+
+
+def _has_non_finite(value: _Any) -> bool:
+    """Check value holds NaN or infinity, which orjson writes as null"""
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        if type(value) is float:
+            if not _math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return False
+
+
+def _orjson_encode(value: _Any, compact: bool,
+                   sort_keys: bool) -> _Any:
+    """Return value encoded by orjson, None if it can't be done the way
+    json.dumps() would: ASCII only, keys and ints orjson supports, no NaN
+    and infinity"""
+    option = 0 if compact else _orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= _orjson.OPT_SORT_KEYS
+    try:
+        data = _orjson.dumps(value, option=option)
+    except TypeError:
+        # e.g. ints over 64 bits or values LazyDict hasn't parsed yet
+        return None
+    if not data.isascii() or b"null" in data and _has_non_finite(value):
+        return None
+    return data.decode("ascii")
+
+
+def iterencode_json(value: _Any, compact: bool = False,
+                    sort_keys: bool = False,
+                    compatible: bool = False) -> _Iterator[str]:
+    """
+    Yield JSON text of given value in large chunks. Output is pretty-printed
+    with 2 spaces of indentation unless "compact" is set, "sort_keys" sorts
+    keys of dicts. With "compatible" set output is byte-identical to
+    json.dumps(value, indent=2) (or separators=(",", ":") if compact),
+    otherwise orjson may be used, if installed, which spells some floats
+    differently (1e16 for 1e+16). Values with NaN or Infinity are always
+    encoded the way json.dumps() does
+    """
+    if not compatible and _orjson is not None:
+        data = _orjson_encode(value, compact, sort_keys)
+        if data is not None:
+            yield data
+            return
+
+    if compact:
+        # note: unlike iterencode(), encode() is done by the C encoder
+        yield _json.JSONEncoder(separators=(",", ":"),
+                                sort_keys=sort_keys).encode(value)
+    else:
+        yield from _iterencode_pretty(value, sort_keys)
+
+
+def encode_json(value: _Any, compact: bool = False, sort_keys: bool = False,
+                compatible: bool = False) -> str:
+    """Return JSON text of given value, see iterencode_json()"""
+    return "".join(iterencode_json(value, compact, sort_keys, compatible))
@@ -0,0 +1,267 @@
+"""
+Module that compiles configs into a binary snapshot for memory-mapped
+lookups. Layout (little-endian):
+
+    header   magic, format version, entry count, string count, offset of
+             string offsets
+    entries  (path string id u32, type u8, 3 pad bytes, payload 8 bytes)
+             sorted by path, a JSON Pointer; the root has path ""
+    strings  (string count + 1) u64 offsets followed by UTF-8 data of
+             interned paths, keys and string values
+
+Payload is the value of int and float, string id of str and of ints which
+don't fit into 64 bits, number of children of containers
+"""
+
+import mmap as _mmap
+import struct as _struct
+import sys as _sys
+from array import array as _array
+from typing import Any as _Any, List as _List
+
+from ._configs_handler import PathType as _PathType
+from ._diff import escape as _escape, unescape as _unescape
+from ._writer import atomic_write as _atomic_write
+
+MAGIC = b"JOSNAP\0\0"
+FORMAT_VERSION = 1
+
+_HEADER = _struct.Struct("<8sIIIxxxxQ")
+_ENTRY = _struct.Struct("<IB3x")
+_INT = _struct.Struct("<q")
+_FLOAT = _struct.Struct("<d")
+_ID = _struct.Struct("<Q")
+_ENTRY_SIZE = _ENTRY.size + 8
+
+_NULL, _FALSE, _TRUE, _INT_TYPE, _FLOAT_TYPE, _STR, _BIG_INT, _DICT, \
+    _LIST = range(9)
+_MISSING = object()
+
+
+def compile_snapshot(configs: dict) -> bytes:
+    """Return binary snapshot of given configs"""
+    strings = {}
+
+    def intern(string: str) -> int:
+        string_id = strings.get(string)
+        if string_id is None:
+            string_id = strings[string] = len(strings)
+        return string_id
+
+    entries = []  # (path, type, payload)
+    stack = [("", configs)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            entries.append((path, _DICT, len(value)))
+            stack.extend((f"{path}/{_escape(k)}", v) for k, v in value.items())
+        elif isinstance(value, list):
+            entries.append((path, _LIST, len(value)))
+            stack.extend((f"{path}/{i}", v) for i, v in enumerate(value))
+        elif value is None:
+            entries.append((path, _NULL, 0))
+        elif value is True or value is False:
+            entries.append((path, _TRUE if value else _FALSE, 0))
+        elif isinstance(value, int):
+            if -2 ** 63 <= value < 2 ** 63:
+                entries.append((path, _INT_TYPE, value))
+            else:
+                entries.append((path, _BIG_INT, intern(str(value))))
+        elif isinstance(value, float):
+            entries.append((path, _FLOAT_TYPE, value))
+        elif isinstance(value, str):
+            entries.append((path, _STR, intern(value)))
+        else:
+            raise TypeError(f"{type(value).__name__} at \"{path}\" is not "
+                            f"JSON serializable")
+
+    # note: order of UTF-8 bytes is the order of code points
+    entries.sort(key=lambda entry: entry[0])
+    table = bytearray(_ENTRY_SIZE * len(entries))
+    for i, (path, value_type, payload) in enumerate(entries):
+        offset = i * _ENTRY_SIZE
+        _ENTRY.pack_into(table, offset, intern(path), value_type)
+        payload_format = _FLOAT if value_type == _FLOAT_TYPE else \
+            _INT if value_type == _INT_TYPE else _ID
+        payload_format.pack_into(table, offset + _ENTRY.size, payload)
+
+    data = [string.encode() for string in strings]
+    offsets = _array("Q", [0])
+    for chunk in data:
+        offsets.append(offsets[-1] + len(chunk))
+    if _sys.byteorder != "little":
+        offsets.byteswap()
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), len(strings),
+                          _HEADER.size + len(table))
+    return b"".join([header, table, offsets.tobytes()] + data)
+
+
+def write_snapshot(configs: dict, filename: str):
+    """Compile snapshot of given configs into given file atomically. It's
+    never rewritten in place, as readers may have it mapped"""
+    _atomic_write(filename, compile_snapshot(configs), in_place=False)
+
+
+class ConfigsSnapshot:
+    """
+    Read-only view of a snapshot file. The file is memory-mapped: lookups
+    binary search the path table and decode only the values they return,
+    nothing is parsed on opening
+    """
+
+    def __init__(self, filename: str):
+        # pylint: disable=invalid-name
+        with open(filename, "rb") as f:
+            self.__mmap = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        self.__offsets = None
+        try:
+            self.__buffer = memoryview(self.__mmap)
+            magic, version, self.__count, strings, offsets_at = \
+                _HEADER.unpack_from(self.__buffer)
+            if magic != MAGIC:
+                raise ValueError(f"\"{filename}\" is not a configs snapshot")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Snapshot format {version} of "
+                                 f"\"{filename}\" is not supported")
+        except (ValueError, _struct.error):
+            self.close()
+            raise
+
+        offsets = self.__buffer[offsets_at:offsets_at + 8 * (strings + 1)]
+        if _sys.byteorder == "little":
+            self.__offsets = offsets.cast("Q")
+        else:
+            self.__offsets = _array("Q", offsets)
+            self.__offsets.byteswap()
+        self.__data_at = offsets_at + 8 * (strings + 1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Unmap the file. Values returned before stay valid"""
+        # note: views of the map must be released before closing it
+        for view in (self.__offsets, self.__buffer):
+            if isinstance(view, memoryview):
+                view.release()
+        self.__mmap.close()
+
+    def __len__(self) -> int:
+        """Number of nodes, containers included"""
+        return self.__count
+
+    def __string_bytes(self, string_id: int) -> bytes:
+        first = self.__data_at + self.__offsets[string_id]
+        last = self.__data_at + self.__offsets[string_id + 1]
+        return self.__mmap[first:last]
+
+    def __path(self, entry: int) -> bytes:
+        return self.__string_bytes(
+            _ENTRY.unpack_from(self.__buffer,
+                               _HEADER.size + entry * _ENTRY_SIZE)[0])
+
+    def __lower_bound(self, path: bytes, first: int = 0) -> int:
+        """Return index of the first entry with path not less than given"""
+        last = self.__count
+        while first < last:
+            middle = (first + last) // 2
+            if self.__path(middle) < path:
+                first = middle + 1
+            else:
+                last = middle
+        return first
+
+    def __scalar(self, entry: int) -> _Any:
+        offset = _HEADER.size + entry * _ENTRY_SIZE
+        value_type = self.__buffer[offset + 4]
+        offset += _ENTRY.size
+        if value_type == _STR:
+            return self.__string_bytes(
+                _ID.unpack_from(self.__buffer, offset)[0]).decode()
+        if value_type == _INT_TYPE:
+            return _INT.unpack_from(self.__buffer, offset)[0]
+        if value_type == _FLOAT_TYPE:
+            return _FLOAT.unpack_from(self.__buffer, offset)[0]
+        if value_type == _BIG_INT:
+            return int(self.__string_bytes(
+                _ID.unpack_from(self.__buffer, offset)[0]))
+        if value_type == _DICT:
+            return {}
+        if value_type == _LIST:
+            return [None] * _ID.unpack_from(self.__buffer, offset)[0]
+        return (None, False, True)[value_type]
+
+    def __value(self, entry: int, path: bytes) -> _Any:
+        value = self.__scalar(entry)
+        if not isinstance(value, (dict, list)):
+            return value
+
+        # descendants are contiguous: their paths start with "path/"
+        prefix = path + b"/"
+        containers = {path: value}
+        entry = self.__lower_bound(prefix, entry + 1)
+        while entry < self.__count:
+            child_path = self.__path(entry)
+            if not child_path.startswith(prefix):
+                break
+            parent_path, _, token = child_path.rpartition(b"/")
+            parent = containers[parent_path]
+            child = self.__scalar(entry)
+            if isinstance(parent, list):
+                parent[int(token)] = child
+            else:
+                parent[_unescape(token.decode())] = child
+            if isinstance(child, (dict, list)):
+                containers[child_path] = child
+            entry += 1
+        return value
+
+    @staticmethod
+    def __pointer(path: _PathType) -> bytes:
+        if isinstance(path, str):
+            if path and not path.startswith("/"):
+                raise ValueError(f"Invalid JSON Pointer \"{path}\"")
+            return path.encode()
+        return "".join(f"/{_escape(key)}" for key in path).encode()
+
+    def get(self, path: _PathType, default=_MISSING) -> _Any:
+        """Return value at given path (JSON Pointer or sequence of keys).
+        Raise KeyError if there's no such value unless default is given"""
+        pointer = self.__pointer(path)
+        entry = self.__lower_bound(pointer)
+        if entry < self.__count and self.__path(entry) == pointer:
+            return self.__value(entry, pointer)
+        if default is _MISSING:
+            raise KeyError(path)
+        return default
+
+    def __contains__(self, path: _PathType) -> bool:
+        pointer = self.__pointer(path)
+        entry = self.__lower_bound(pointer)
+        return entry < self.__count and self.__path(entry) == pointer
+
+    def keys(self, path: _PathType = "") -> _List[str]:
+        """Return keys of the dict at given path, sorted, without decoding
+        its values"""
+        pointer = self.__pointer(path)
+        prefix = pointer + b"/"
+        keys = []
+        entry = self.__lower_bound(prefix)
+        while entry < self.__count:
+            child_path = self.__path(entry)
+            if not child_path.startswith(prefix):
+                break
+            token = child_path[len(prefix):]
+            if b"/" not in token:
+                keys.append(_unescape(token.decode()))
+            entry += 1
+        if not keys:
+            # note: "in" would take the encoded pointer for a path
+            entry = self.__lower_bound(pointer)
+            if entry == self.__count or self.__path(entry) != pointer:
+                raise KeyError(path)
+        return keys
@@ -0,0 +1,72 @@
+"""Module that watches "config*.json" files and "overrides.json" for changes"""
+
+import os as _os
+
+# pylint: disable=no-name-in-module
+from PySide2.QtCore import QObject as _QObject, QTimer as _QTimer, \
+    QFileSystemWatcher as _QFileSystemWatcher, Signal as _Signal
+
+
+def _config_files(config_dir: str) -> set:
+    return {f"{config_dir}/{f}" for f in _os.listdir(config_dir)
+            if f.startswith("config") and f.endswith(".json")}
+
+
+class ConfigsWatcher (_QObject):
+    """
+    Watches configs directory and overrides file. Bursts of file system events
+    are collected for "delay" milliseconds and reported once per file
+    """
+
+    # name of config (file name without extension) which was changed, added
+    # or removed
+    configChanged = _Signal(str, name="configChanged")
+    overridesChanged = _Signal(name="overridesChanged")
+
+    def __init__(self, configs_dir: str, overrides_file: str,
+                 delay: int = 100, parent: _QObject = None):
+        _QObject.__init__(self, parent)
+        self.__configs_dir = configs_dir
+        self.__overrides_file = overrides_file
+        self.__config_files = _config_files(configs_dir)
+        self.__changed = set()
+
+        self.__watcher = _QFileSystemWatcher(self)
+        self.__watcher.addPath(configs_dir)
+        self.__watcher.addPaths(sorted(self.__config_files |
+                                       {overrides_file}))
+        self.__watcher.fileChanged.connect(self.__on_file_changed)
+        self.__watcher.directoryChanged.connect(self.__on_directory_changed)
+
+        self.__timer = _QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(delay)
+        self.__timer.timeout.connect(self.__emit_changes)
+
+    def __on_file_changed(self, path: str):
+        # Files replaced by rename are dropped from the watcher
+        if _os.path.exists(path) and path not in self.__watcher.files():
+            self.__watcher.addPath(path)
+        self.__changed.add(path)
+        self.__timer.start()
+
+    def __on_directory_changed(self, _path: str):
+        config_files = _config_files(self.__configs_dir)
+        added = config_files - self.__config_files
+        removed = self.__config_files - config_files
+        self.__config_files = config_files
+
+        if added:
+            self.__watcher.addPaths(sorted(added))
+        if added or removed:
+            self.__changed |= added | removed
+            self.__timer.start()
+
+    def __emit_changes(self):
+        changed, self.__changed = self.__changed, set()
+        for path in sorted(changed):
+            if path == self.__overrides_file:
+                self.overridesChanged.emit()
+            elif path.startswith(self.__configs_dir):
+                name = _os.path.splitext(_os.path.basename(path))[0]
+                self.configChanged.emit(name)
@@ -0,0 +1,210 @@
+"""Module that persists "overrides.json" off the GUI thread"""
+
+import logging as _logging
+import os as _os
+import threading as _threading
+import time as _time
+from tempfile import mkstemp as _mkstemp
+from typing import Callable as _Callable, Iterable as _Iterable, \
+    Union as _Union
+
+_logger = _logging.getLogger(__name__)
+
+
+def _write_data(f, data):  # pylint: disable=invalid-name
+    if isinstance(data, (str, bytes)):
+        f.write(data)
+    else:
+        for chunk in data:
+            f.write(chunk)
+
+
+def atomic_write(filename: str, data: _Union[str, bytes, _Iterable[str]],
+                 encoding: str = "ascii", in_place: bool = True):
+    """
+    Write data into given file through a temporary file, fsync and rename, so
+    the file is never left half-written. When the directory doesn't allow
+    creating files (e.g. 666 file in /etc) falls back to an in-place write
+    with a warning if "in_place" is set, raises PermissionError otherwise.
+    Data may be an iterable of strings, e.g. chunks of streamed JSON
+    """
+    directory = _os.path.dirname(_os.path.abspath(filename))
+    mode, encoding = ('wb', None) if isinstance(data, bytes) else \
+        ('w', encoding)
+
+    if not _os.access(directory, _os.W_OK | _os.X_OK):
+        if not in_place:
+            raise PermissionError(f"Can't replace \"{filename}\" atomically, "
+                                  f"directory \"{directory}\" is read-only")
+        _logger.warning("Directory \"%s\" is read-only, \"%s\" is "
+                        "rewritten in place", directory, filename)
+        # pylint: disable=invalid-name
+        with open(filename, mode, encoding=encoding) as f:
+            _write_data(f, data)
+            f.flush()
+            _os.fsync(f.fileno())
+        return
+
+    fd, tmp_name = _mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        # pylint: disable=invalid-name
+        with open(fd, mode, encoding=encoding) as f:
+            _write_data(f, data)
+            f.flush()
+            _os.fsync(f.fileno())
+
+        # keep permissions of the replaced file
+        if _os.path.exists(filename):
+            _os.chmod(tmp_name, _os.stat(filename).st_mode & 0o7777)
+        _os.replace(tmp_name, filename)
+    except BaseException:
+        _os.unlink(tmp_name)
+        raise
+
+
+class OverridesWriter:
+    """
+    Write-behind storage for overrides. Submitted configs are written by a
+    background thread; submissions made within "window" seconds are
+    coalesced into a single write. Callers must hold "lock" while modifying
+    an object that has been submitted. "last_written" keeps the data of the
+    last write to tell own changes of the file from external ones
+    """
+
+    def __init__(self, filename: str, window: float = 0.2,
+                 serialize: _Callable[[dict], _Union[str, bytes]] = None,
+                 lock: _threading.Lock = None, in_place: bool = True,
+                 on_error: _Callable[[Exception], None] = None):
+        """Configs are written as "serialize" returns them, by their dumps()
+        method by default. Writers of the same configs may share a lock.
+        "in_place" is passed to atomic_write(). A failed write is logged and
+        passed to "on_error", called from the background thread, then raised
+        by the next flush() or close() unless a later write succeeds"""
+        assert window >= 0
+
+        self.filename = filename
+        self.window = window
+        self.lock = _threading.Lock() if lock is None else lock
+        self.__serialize = serialize
+        self.__in_place = in_place
+        self.__on_error = on_error
+
+        self.__condition = _threading.Condition()
+        self.__pending = None
+        self.__pending_count = 0
+        self.__writing = False
+        self.__urgent = False
+        self.__closed = False
+        self.__error = None
+
+        self.last_written = None
+
+        self.__writes = 0
+        self.__errors = 0
+        self.__last_error = None
+        self.__submits = 0
+        self.__latency_total = 0.
+        self.__latency_max = 0.
+        self.__latency_last = 0.
+
+        self.__thread = _threading.Thread(target=self.__run,
+                                          name="OverridesWriter", daemon=True)
+        self.__thread.start()
+
+    def submit(self, configs: dict):
+        """Schedule given configs to be written into the file"""
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("OverridesWriter is closed")
+            self.__pending = configs
+            self.__pending_count += 1
+            self.__submits += 1
+            self.__condition.notify_all()
+
+    def flush(self):
+        """Block until every submitted configs are written"""
+        with self.__condition:
+            self.__urgent = self.__pending is not None
+            self.__condition.notify_all()
+            self.__condition.wait_for(lambda: self.__pending is None and
+                                      not self.__writing)
+            if self.__error is not None:
+                error, self.__error = self.__error, None
+                raise error
+
+    def close(self):
+        """Flush pending configs and stop the background thread"""
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__thread.join()
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def stats(self) -> dict:
+        """Return write-latency (seconds), queue-depth and failed-write
+        counters, "last_error" is the message of the last failure"""
+        with self.__condition:
+            return {"submits": self.__submits,
+                    "writes": self.__writes,
+                    "errors": self.__errors,
+                    "last_error": self.__last_error,
+                    "queue_depth": self.__pending_count,
+                    "latency_last": self.__latency_last,
+                    "latency_max": self.__latency_max,
+                    "latency_avg": self.__latency_total / self.__writes
+                    if self.__writes else 0.}
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__pending is not None
+                                          or self.__closed)
+                if self.__pending is None:
+                    return
+
+                # let bursts of submissions coalesce
+                deadline = _time.monotonic() + self.window
+                while not self.__closed and not self.__urgent:
+                    timeout = deadline - _time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.__condition.wait(timeout)
+
+                configs, self.__pending = self.__pending, None
+                self.__pending_count = 0
+                self.__urgent = False
+                self.__writing = True
+
+            started = _time.perf_counter()
+            try:
+                with self.lock:
+                    data = configs.dumps() if self.__serialize is None \
+                        else self.__serialize(configs)
+                atomic_write(self.filename, data, in_place=self.__in_place)
+                self.last_written = data
+            except Exception as error:  # pylint: disable=broad-except
+                _logger.error("\"%s\" is not written: %s", self.filename,
+                              error)
+                with self.__condition:
+                    self.__error = error
+                    self.__errors += 1
+                    self.__last_error = str(error)
+                    self.__writing = False
+                    self.__condition.notify_all()
+                if self.__on_error is not None:
+                    self.__on_error(error)
+                continue
+            latency = _time.perf_counter() - started
+
+            with self.__condition:
+                self.__error = None
+                self.__writing = False
+                self.__writes += 1
+                self.__latency_last = latency
+                self.__latency_total += latency
+                self.__latency_max = max(self.__latency_max, latency)
+                self.__condition.notify_all()
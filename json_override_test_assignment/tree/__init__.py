@@ -1,4 +1,18 @@
 """Tree view package public interface"""
 
+from ._history import EditHistory
 from ._item import TreeItem
-from ._model import TreeModel
+from ._store import TreeStore
+
+
+def __getattr__(name: str):
+    # note: Qt models are imported on first use, so tree items can be used
+    # without loading PySide2
+    # pylint: disable=import-outside-toplevel
+    if name in ("TreeModel", "ColumnarTreeModel"):
+        from . import _model
+        return getattr(_model, name)
+    if name == "SearchFilterModel":
+        from ._filter import SearchFilterModel
+        return SearchFilterModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
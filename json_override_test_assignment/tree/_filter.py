@@ -0,0 +1,49 @@
+from PySide2.QtCore import QObject as _QObject, \
+    QSortFilterProxyModel as _QSortFilterProxyModel, \
+    QModelIndex as _QModelIndex
+from typing import Optional as _Optional, Set as _Set
+
+from ._model import TreeModel as _TreeModel
+
+
+class SearchFilterModel (_QSortFilterProxyModel):
+    """
+    Proxy showing only items matching a query of the source model
+    SearchIndex together with their ancestors and descendants. Matches are
+    looked up in the index once per query, so rows are checked without
+    walking the tree
+    """
+
+    def __init__(self, parent: _QObject = None):
+        _QSortFilterProxyModel.__init__(self, parent)
+        self.__visible = None  # type: _Optional[_Set[tuple]]
+        self.__matches = set()
+
+    @property
+    def matches(self) -> _Set[tuple]:
+        """Paths of items matching the current query"""
+        return self.__matches
+
+    def set_query(self, text: str, prefix: bool = False):
+        """Filter items by given text, see SearchIndex.search(). Empty text
+        shows everything"""
+        source = self.sourceModel()  # type: _TreeModel
+        assert source.search_index is not None, "search is not enabled"
+
+        if text:
+            self.__matches = source.search_index.search(text, prefix)
+            self.__visible = {path[:i] for path in self.__matches
+                              for i in range(1, len(path) + 1)}
+        else:
+            self.__matches, self.__visible = set(), None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int,
+                         source_parent: _QModelIndex) -> bool:
+        """Override from QSortFilterProxyModel"""
+        if self.__visible is None:
+            return True
+        source = self.sourceModel()  # type: _TreeModel
+        path = source.path(source.index(source_row, 0, source_parent))
+        return path in self.__visible or \
+            any(path[:i] in self.__matches for i in range(1, len(path)))
@@ -0,0 +1,52 @@
+from collections import deque as _deque
+from typing import Any as _Any, Iterable as _Iterable, Tuple as _Tuple
+
+# path of changed leaf, its value before and after the change
+Change = _Tuple[tuple, _Any, _Any]
+
+
+class EditHistory:
+    """
+    Undo/redo stack of edits. A step keeps only paths and values of the
+    leaves it changed, so memory grows with the size of changes rather than
+    the size of configs. The oldest steps beyond "limit" are dropped
+    """
+
+    def __init__(self, limit: int = 1000):
+        assert limit > 0
+        self.__undo = _deque(maxlen=limit)
+        self.__redo = []
+
+    def __len__(self) -> int:
+        return len(self.__undo)
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.__undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.__redo)
+
+    def push(self, changes: _Iterable[Change]):
+        """Record a step made of given changes. Redo steps are discarded"""
+        changes = tuple(changes)
+        if changes:
+            self.__undo.append(changes)
+            self.__redo.clear()
+
+    def undo(self) -> _Tuple[Change, ...]:
+        """Return the last step moving it to redo steps"""
+        changes = self.__undo.pop()
+        self.__redo.append(changes)
+        return changes
+
+    def redo(self) -> _Tuple[Change, ...]:
+        """Return the last undone step moving it back to undo steps"""
+        changes = self.__redo.pop()
+        self.__undo.append(changes)
+        return changes
+
+    def clear(self):
+        self.__undo.clear()
+        self.__redo.clear()
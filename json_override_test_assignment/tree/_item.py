@@ -16,6 +16,12 @@ class TreeItem:
         self.__fields = dict.fromkeys(TreeItem.Fields, "") | {"type": None,
                                                               "is_leaf": False}
         self.__children = []
+        # JSON container whose children are not built yet (lazy mode)
+        self.__source = None
+        self.__keys = None
+        self.__sort = True
+        self.__lazy = False
+        self.__kind = None
 
     def append_child(self, item: _Self):
         """Attach given item to tree"""
@@ -33,10 +39,130 @@ class TreeItem:
         """Return the number of children of the current item"""
         return len(self.__children)
 
+    def total_count(self) -> int:
+        """Return the number of children including not yet built ones"""
+        if self.__source is None:
+            return len(self.__children)
+        return len(self.__source)
+
+    def can_fetch_more(self) -> bool:
+        """Check if some children of the item are not built yet"""
+        return self.__source is not None and \
+            len(self.__children) < len(self.__source)
+
+    def fetch_more(self, count: int) -> int:
+        """Build up to "count" next children. Return number of built ones"""
+        first = len(self.__children)
+        fetched = self.__fetch(count)
+        if not self.__lazy:
+            for child in self.__children[first:]:
+                child.__build()
+        return fetched
+
+    def __fetch(self, count: int) -> int:
+        """Attach up to "count" next children without building theirs"""
+        if self.__source is None:
+            return 0
+
+        source = self.__source
+        first = len(self.__children)
+        last = min(first + count, len(source))
+
+        if self.__keys is None:
+            self.__keys = self.ordered_keys(source)
+        kind = self.__kind
+        for key in self.__keys[first:last]:
+            child = TreeItem.__create(source[key], self, self.__sort,
+                                      self.__lazy)
+            child.__fields.update({"key": key, "type": kind})
+            self.__children.append(child)
+
+        # release the source when every child is built
+        if last == len(source):
+            self.__source = self.__keys = None
+
+        return last - first
+
+    def __build(self):
+        """Build children of the item and their descendants unless they're
+        lazy. Items to build are kept in a stack instead of recursing into
+        them, so the depth of data isn't limited by recursion"""
+        pending = [self]
+        while pending:
+            item = pending.pop()
+            if item.__source is not None and not item.__lazy:
+                item.__fetch(len(item.__source))
+                pending.extend(item.__children)
+
+    def ordered_keys(self, value: _Union[dict, list]) -> list:
+        """Return keys of given container in the order children are built"""
+        if isinstance(value, dict):
+            return sorted(value) if self.__sort else list(value)
+        return list(range(len(value)))
+
+    def make_child(self, key: _Union[str, int],
+                   value: _Union[dict, list, str]) -> _Self:
+        """Build a child item for given key and value without attaching it"""
+        child = self.load(value, self, self.__sort, self.__lazy)
+        child.__fields.update({"key": key, "type": self.__kind})
+        return child
+
+    def insert_children(self, row: int, items: list):
+        """Attach given items to tree at given row"""
+        self.__children[row:row] = items
+
+    def remove_children(self, row: int, count: int):
+        """Detach "count" children starting from given row"""
+        del self.__children[row:row + count]
+
+    def reset(self, value: _Union[dict, list]):
+        """Drop children and take them from given container. In lazy mode
+        they are built by fetch_more() later"""
+        self.__take(value)
+        if not self.__lazy:
+            self.__build()
+
+    def __take(self, value: _Union[dict, list]):
+        """Drop children and keep given container to build them from"""
+        assert isinstance(value, (dict, list))
+        self.__children = []
+        self.__source = value
+        self.__keys = None
+        self.__kind = type(value) if isinstance(value, _Configs) else \
+            dict if isinstance(value, dict) else list
+
+    @property
+    def kind(self):
+        """Type of container the item represents: Configs, dict, list or
+        None for leaves"""
+        return self.__kind
+
+    def child_values(self) -> list:
+        """Return values of all children without building missing ones"""
+        values = [child.value for child in self.__children]
+
+        source = self.__source
+        if source is not None:
+            keys = self.__keys if self.__keys is not None else \
+                self.ordered_keys(source)
+            values.extend("" if isinstance(value, (dict, list)) else value
+                          for value in (source[key]
+                                        for key in keys[len(values):]))
+
+        return values
+
     def row(self) -> int:
         """Return the row where the current item occupies in the parent"""
         return self.__parent.__children.index(self) if self.__parent else 0
 
+    def path(self) -> tuple:
+        """Return keys from the root (exclusive) to the current item"""
+        path, item = [], self
+        while item.__parent is not None:
+            path.append(item.key)
+            item = item.__parent
+        return tuple(reversed(path))
+
     def get_field(self, name: str) -> str:
         """Return field value with given name"""
         return self.__fields.get(name, "")
@@ -70,33 +196,25 @@ class TreeItem:
 
     @classmethod
     def load(cls, value: _Union[_Configs, dict, list, str],
-             parent: _Self = None, sort=True) -> _Self:
-        """Recursively build items tree from given JSON configuration data"""
-        root_item = TreeItem(parent)
+             parent: _Self = None, sort=True, lazy=False) -> _Self:
+        """Build items tree from given JSON configuration data. In lazy mode
+        children are not built until fetch_more() is called"""
+        root_item = TreeItem.__create(value, parent, sort, lazy)
         root_item.key = "root"
-
-        if isinstance(value, (_Configs, dict)):
-            items = sorted(value.items() if sort else value.items())
-            is_config_item = isinstance(value, _Configs)
-            for key, value in items:
-                child = cls.load(value, root_item)
-                child.__fields.update({"key": key,
-                                       "type": _Configs if is_config_item
-                                       else dict})
-                root_item.append_child(child)
-
-        elif isinstance(value, list):
-            for index, value in enumerate(value):
-                child = cls.load(value, root_item)
-                child.__fields.update({"key": index,
-                                       "type": list})
-                root_item.append_child(child)
-
-        else:
-            root_item.__fields.update({"value": value,
-                                       "type": type(value),
-                                       "is_leaf": True})
-
+        root_item.__build()
         return root_item
 
-
+    @staticmethod
+    def __create(value: _Union[_Configs, dict, list, str], parent: _Self,
+                 sort: bool, lazy: bool) -> _Self:
+        """Return item of given value, children of containers are not
+        built yet"""
+        item = TreeItem(parent)
+        if isinstance(value, (dict, list)):
+            item.__sort = sort
+            item.__lazy = lazy
+            item.__take(value)
+        else:
+            item.__fields.update({"value": value, "type": type(value),
+                                  "is_leaf": True})
+        return item
@@ -1,10 +1,59 @@
 from PySide2.QtCore import QObject as _QObject, Qt as _Qt, \
     QAbstractItemModel as _QAbstractItemModel, QModelIndex as _QModelIndex, \
     Signal as _Signal
-from typing import Any as _Any, Optional as _Optional
+from bisect import bisect_left as _bisect_left
+from contextlib import contextmanager as _contextmanager
+from typing import Any as _Any, Optional as _Optional, \
+    Iterable as _Iterable, Union as _Union, Callable as _Callable, \
+    Iterator as _Iterator, List as _List, Tuple as _Tuple
 
+from ._history import EditHistory as _EditHistory
 from ._item import TreeItem as _TreeItem
+from ._store import TreeStore as _TreeStore
 from .._configs_handler import Configs as _Configs
+from .._diff import LIST as _LIST
+from .._search import SearchIndex as _SearchIndex
+
+
+def _merge_into(changeset: dict, override: dict):
+    """Add given override to changeset, override values win"""
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(changeset.get(key), dict):
+            _merge_into(changeset[key], value)
+        else:
+            changeset[key] = value
+
+
+def _sparse_override(path: tuple, value) -> _Configs:
+    """Build override of the value at given path, list elements on the path
+    are addressed by index in sparse list overrides"""
+    for key in reversed(path[1:]):
+        value = {_LIST: True, str(key): value} if isinstance(key, int) \
+            else {key: value}
+    return _Configs({path[0]: value})
+
+
+class _Transaction:
+    """Edits collected till TreeModel.commit_transaction()"""
+
+    def __init__(self):
+        self.overrides = []
+        self.changes = []  # (path, before, after)
+        self.indexes = []
+        # lengths of the lists above when nested levels began
+        self.levels = []  # type: _List[_Tuple[int, int, int]]
+
+    def begin(self):
+        """Start a nested level"""
+        self.levels.append((len(self.overrides), len(self.changes),
+                            len(self.indexes)))
+
+    def drop(self, level: _Tuple[int, int, int]):
+        """Forget edits made since given level began"""
+        overrides, changes, indexes = level
+        del self.overrides[overrides:]
+        del self.changes[changes:]
+        del self.indexes[indexes:]
 
 
 class TreeModel (_QAbstractItemModel):
@@ -14,8 +63,24 @@ class TreeModel (_QAbstractItemModel):
     # register signal for value change.
     newOverride = _Signal(dict, name="newOverride")
 
-    def __init__(self, parent: _QObject = None):
+    def __init__(self, parent: _QObject = None, lazy: bool = False,
+                 batch_size: int = 256, search: bool = False,
+                 sparse_lists: bool = False):
+        """In lazy mode tree items are built on demand, "batch_size" items
+        at a time, when the view asks for them. With "search" set the model
+        keeps SearchIndex of its data. With "sparse_lists" edits of list
+        elements emit sparse overrides of single elements instead of whole
+        lists"""
+        assert batch_size > 0
         self._root_item = _TreeItem()
+        self._search_index = _SearchIndex() if search else None
+        self._value_source = None
+        self._history = _EditHistory()
+        self._recording = True
+        self._transaction = None  # type: _Optional[_Transaction]
+        self._sparse_lists = sparse_lists
+        self.__lazy = lazy
+        self.__batch_size = batch_size
         _QAbstractItemModel.__init__(self, parent)
 
     def clear(self):
@@ -29,12 +94,355 @@ class TreeModel (_QAbstractItemModel):
         assert isinstance(configs, _Configs)
 
         self.beginResetModel()
-        self._root_item = _TreeItem.load(configs)
+        self._root_item = _TreeItem.load(configs, lazy=self.__lazy)
         self._root_item.value_type = type(configs)
+        if self._search_index is not None:
+            self._search_index = _SearchIndex.build(configs)
+        self._history.clear()
         self.endResetModel()
 
         return True
 
+    @property
+    def search_index(self) -> _Optional[_SearchIndex]:
+        """Index of keys and values, None unless enabled"""
+        return self._search_index
+
+    @property
+    def history(self) -> _EditHistory:
+        """Undo/redo stack of edits made through setData()"""
+        return self._history
+
+    def index_of(self, path: tuple, column: int = 0) -> _QModelIndex:
+        """Return index of the item at given path, invalid if there's no
+        such item. Lazily built children are fetched on the way"""
+        index = _QModelIndex()
+        for depth, key in enumerate(path):
+            while self.canFetchMore(index):
+                self.fetchMore(index)
+            for row in range(self.rowCount(index)):
+                child = self.index(row, 0, index)
+                if self.path(child)[depth] == key:
+                    index = child
+                    break
+            else:
+                return _QModelIndex()
+        return self.index(index.row(), column, index.parent()) \
+            if index.isValid() else index
+
+    def begin_transaction(self):
+        """Start collecting edits: setData() stops emitting "newOverride" per
+        cell till commit_transaction(). Transactions nest"""
+        if self._transaction is None:
+            self._transaction = _Transaction()
+        else:
+            self._transaction.begin()
+
+    def commit_transaction(self):
+        """Finish the outermost transaction: emit a single merged
+        "newOverride", record a single undo step and a "dataChanged" range
+        per parent of edited items"""
+        transaction = self._transaction
+        assert transaction is not None, "no transaction is started"
+        if transaction.levels:
+            transaction.levels.pop()
+            return
+        self._transaction = None
+
+        if self._recording:
+            self._history.push(transaction.changes)
+        # rows of edited items by parent path
+        rows = {}
+        for index in transaction.indexes:
+            parent = index.parent()
+            first, last, _ = rows.get(self.path(parent),
+                                      (index.row(), index.row(), parent))
+            rows[self.path(parent)] = (min(first, index.row()),
+                                       max(last, index.row()), parent)
+        column = _TreeItem.Fields.index("value")
+        for first, last, parent in rows.values():
+            self.dataChanged.emit(self.index(first, column, parent),
+                                  self.index(last, column, parent))
+        override = _Configs()
+        for edit in transaction.overrides:
+            _merge_into(override, edit)
+        if override:
+            self.newOverride.emit(override)
+
+    def rollback_transaction(self):
+        """Revert edits of the innermost transaction and finish it, emitting
+        "dataChanged" only. The outer ones go on"""
+        transaction = self._transaction
+        if transaction is None:
+            return
+        nested = bool(transaction.levels)
+        level = transaction.levels.pop() if nested else (0, 0, 0)
+        column = _TreeItem.Fields.index("value")
+        for path, before, _ in reversed(transaction.changes[level[1]:]):
+            index = self.index_of(path, column)
+            if index.isValid():
+                self._set_value(index, before)
+                self.dataChanged.emit(index, index)
+        if nested:
+            transaction.drop(level)
+        else:
+            self._transaction = None
+
+    @_contextmanager
+    def transaction(self):
+        """Context of begin_transaction() and commit_transaction(), edits
+        are rolled back on exception"""
+        self.begin_transaction()
+        try:
+            yield self
+        except BaseException:
+            self.rollback_transaction()
+            raise
+        self.commit_transaction()
+
+    def _edited(self, index: _QModelIndex, change: _Optional[tuple],
+                override: _Configs):
+        """Emit override of edited item or keep it till the transaction is
+        committed. "change" is (path, before, after), None if the value is
+        the same"""
+        transaction = self._transaction
+        if transaction is None:
+            if self._recording and change is not None:
+                self._history.push([change])
+            self.newOverride.emit(override)
+            return
+        if change is not None:
+            transaction.changes.append(change)
+        transaction.overrides.append(override)
+        transaction.indexes.append(index)
+
+    def set_values(self, values: _Iterable[_Tuple[_QModelIndex, _Any]]) -> int:
+        """Set values of given leaves at once in a transaction. Return
+        number of changed items"""
+        count = 0
+        with self.transaction():
+            for index, value in values:
+                count += bool(self.setData(index, value, _Qt.EditRole))
+        return count
+
+    def leaf_indexes(self, text: str = None) -> _Iterator[_QModelIndex]:
+        """Yield indexes of value column of leaves, only of the ones whose
+        value contains given text if it's given. Lazily built children are
+        fetched. SearchIndex narrows the walk down if it's enabled"""
+        column = _TreeItem.Fields.index("value")
+        # note: the index ignores dots around queries, so it has nothing
+        # to narrow the walk down with for dots only
+        if text and text.strip(".") and self._search_index is not None:
+            for path in sorted(self._search_index.search(text), key=str):
+                index = self.index_of(path, column)
+                if index.isValid() and not self.hasChildren(
+                        self.index(index.row(), 0, index.parent())) and \
+                        text in str(self.data(index, _Qt.EditRole)):
+                    yield index
+            return
+
+        stack = [_QModelIndex()]
+        while stack:
+            parent = stack.pop()
+            while self.canFetchMore(parent):
+                self.fetchMore(parent)
+            for row in reversed(range(self.rowCount(parent))):
+                child = self.index(row, 0, parent)
+                if self.hasChildren(child):
+                    stack.append(child)
+                    continue
+                index = self.index(row, column, parent)
+                if not text or text in str(self.data(index, _Qt.EditRole)):
+                    yield index
+
+    def replace_all(self, text: str, replacement: str) -> int:
+        """Replace given text in every value in a single transaction.
+        Return number of changed items"""
+        assert text, "text to replace must not be empty"
+        return self.set_values(
+            [(index, str(self.data(index, _Qt.EditRole)).replace(
+                text, replacement)) for index in self.leaf_indexes(text)])
+
+    def __restore(self, changes: _Iterable[tuple]):
+        """Set given values of leaves in a transaction without recording
+        them"""
+        value_column = _TreeItem.Fields.index("value")
+        self._recording = False
+        try:
+            with self.transaction():
+                for path, value in changes:
+                    index = self.index_of(path, value_column)
+                    if index.isValid():
+                        self._set_value(index, value)
+        finally:
+            self._recording = True
+
+    def undo(self) -> bool:
+        """Revert the last edit, False if there's nothing to undo"""
+        if not self._history.can_undo:
+            return False
+        self.__restore((path, before) for path, before, _ in
+                       reversed(self._history.undo()))
+        return True
+
+    def redo(self) -> bool:
+        """Repeat the last undone edit, False if there's nothing to redo"""
+        if not self._history.can_redo:
+            return False
+        self.__restore((path, after)
+                       for path, _, after in self._history.redo())
+        return True
+
+    def set_value_source(self, source: _Callable[[tuple], _Optional[str]]):
+        """Show where values come from in tooltips of leaves. "source" maps
+        the path of a leaf to a name, e.g. OverrideLayers.source(), None for
+        original configs"""
+        self._value_source = source
+
+    def _tooltip(self, index: _QModelIndex) -> _Optional[str]:
+        if self._value_source is None:
+            return None
+        source = self._value_source(self.path(index))
+        return "Original config" if source is None else f"Layer \"{source}\""
+
+    def path(self, index: _QModelIndex) -> tuple:
+        """Return keys from the root (exclusive) to the item at given index"""
+        return index.internalPointer().path() if index.isValid() else ()
+
+    def update(self, configs: _Configs, keys: _Iterable[str] = None):
+        """Bring the underlying Tree items to given configs emitting
+        fine-grained change signals instead of a model reset, so expansion
+        and selection survive. Only configs with given keys are compared"""
+        assert isinstance(configs, _Configs)
+        keys = None if keys is None else set(keys)
+        self.__reconcile(_QModelIndex(), self._root_item, configs, keys)
+        self._reindex(configs, keys)
+        return True
+
+    def _reindex(self, configs: _Configs, keys: _Optional[set]):
+        """Bring the search index to given configs, only configs with given
+        keys changed"""
+        if self._search_index is not None and keys is None:
+            self._search_index = _SearchIndex.build(configs)
+        elif self._search_index is not None:
+            for key in keys:
+                self._search_index.remove((key,))
+                if key in configs:
+                    self._search_index.add((key,), configs[key])
+
+    def make_items(self, configs: _Configs) -> list:
+        """Build top-level items for given configs without attaching them.
+        The model isn't changed, so it's safe to call from a worker thread"""
+        root = self._root_item
+        return [root.make_child(k, configs[k])
+                for k in root.ordered_keys(configs)]
+
+    def add_items(self, items: list, configs: _Configs = None):
+        """Attach top-level items built by make_items() to the model keeping
+        rows ordered by key. Rows with the same keys are replaced. Configs
+        the items are built from are added to the search index"""
+        root = self._root_item
+        assert not root.can_fetch_more()
+
+        keys = [root.child(row).key for row in range(root.child_count())]
+        for item in items:
+            row = _bisect_left(keys, item.key)
+            if row < len(keys) and keys[row] == item.key:
+                self.beginRemoveRows(_QModelIndex(), row, row)
+                root.remove_children(row, 1)
+                del keys[row]
+                self.endRemoveRows()
+            self.beginInsertRows(_QModelIndex(), row, row)
+            root.insert_children(row, [item])
+            keys.insert(row, item.key)
+            self.endInsertRows()
+
+        if self._search_index is not None and configs is not None:
+            for key, value in configs.items():
+                self._search_index.add((key,), value)
+
+    def __reconcile(self, index: _QModelIndex, item: _TreeItem,
+                    value: _Union[dict, list], keys: _Optional[set] = None):
+        """Recursively apply structural delta between item and value"""
+
+        # Not yet built children will be taken from the new value anyway
+        if item.can_fetch_more():
+            if item.child_count():
+                self.beginRemoveRows(index, 0, item.child_count() - 1)
+                item.reset(value)
+                self.endRemoveRows()
+            else:
+                item.reset(value)
+            return
+
+        new_keys = item.ordered_keys(value)
+        new_set = set(new_keys)
+
+        # Remove vanished children starting from the last ones
+        rows = [row for row in range(item.child_count())
+                if item.child(row).key not in new_set]
+        while rows:
+            last = first = rows.pop()
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(index, first, last)
+            item.remove_children(first, last - first + 1)
+            self.endRemoveRows()
+
+        # Walk over new keys updating matching children and inserting
+        # missing ones in contiguous batches
+        pending = []
+
+        def insert_pending(row: int):
+            if pending:
+                self.beginInsertRows(index, row, row + len(pending) - 1)
+                item.insert_children(row, [item.make_child(k, value[k])
+                                           for k in pending])
+                self.endInsertRows()
+                pending.clear()
+
+        for row, key in enumerate(new_keys):
+            position = row - len(pending)
+            if position < item.child_count() and \
+                    item.child(position).key == key:
+                insert_pending(position)
+                if keys is None or key in keys:
+                    self.__reconcile_child(index, item, row, value[key])
+            else:
+                pending.append(key)
+        insert_pending(len(new_keys) - len(pending))
+
+        # Drop children left out of order
+        if item.child_count() > len(new_keys):
+            self.beginRemoveRows(index, len(new_keys), item.child_count() - 1)
+            item.remove_children(len(new_keys),
+                                 item.child_count() - len(new_keys))
+            self.endRemoveRows()
+
+    def __reconcile_child(self, index: _QModelIndex, item: _TreeItem,
+                          row: int, value: _Any):
+        child = item.child(row)
+
+        if child.is_leaf() and not isinstance(value, (dict, list)):
+            if child.value != value or type(child.value) != type(value):
+                child.value = value
+                value_index = self.index(row, _TreeItem.Fields.index("value"),
+                                         index)
+                self.dataChanged.emit(value_index, value_index)
+
+        elif isinstance(value, dict) and child.kind in (dict, _Configs) or \
+                isinstance(value, list) and child.kind == list:
+            self.__reconcile(self.index(row, 0, index), child, value)
+
+        # value turned from leaf into container or vice versa
+        else:
+            self.beginRemoveRows(index, row, row)
+            item.remove_children(row, 1)
+            self.endRemoveRows()
+            self.beginInsertRows(index, row, row)
+            item.insert_children(row, [item.make_child(child.key, value)])
+            self.endInsertRows()
+
     def data(self, index: _QModelIndex, role: _Qt.ItemDataRole) -> _Any:
         """
         Override from QAbstractItemModel. Returns underlying Tree item fields
@@ -52,32 +460,20 @@ class TreeModel (_QAbstractItemModel):
                 index.column() == _TreeItem.Fields.index("value"):
             return item.value
 
-    def __create_override(self, index: _QModelIndex,
-                          override: _Optional[dict]) -> dict:
-        """Recursively extract override dict from index of changed value"""
-        item = index.internalPointer()  # type: _TreeItem
+        elif role == _Qt.ToolTipRole and item.is_leaf():
+            return self._tooltip(index)
 
-        # Stop when None reached
-        if item is None:
-            return override
-
-        # Initialize override value
-        elif override is None:
-            # if item at index is list, go one level up and gather all values
-            if item.value_type == list:
-                parent = index.parent().internalPointer()  # type: _TreeItem
-                value = [parent.child(i).value
-                         for i in range(parent.child_count())]
-                return self.__create_override(index.parent().parent(),
-                                              {parent.key: value})
-            #
-            else:
-                return self.__create_override(index.parent(),
-                                              {item.key: item.value})
+    def __create_override(self, index: _QModelIndex) -> _Configs:
+        """Build override from the path of changed item"""
+        item = index.internalPointer()  # type: _TreeItem
+        if self._sparse_lists:
+            return _sparse_override(item.path(), item.value)
 
-        # Continue to folding dictionaries
-        else:
-            return self.__create_override(index.parent(), {item.key: override})
+        # lists are overridden as a whole
+        if item.value_type == list:
+            parent = item.parent()
+            return _Configs.from_path(parent.path(), parent.child_values())
+        return _Configs.from_path(item.path(), item.value)
 
     def setData(self, index: _QModelIndex, value: _Any, role: _Qt.ItemDataRole):
         """
@@ -89,16 +485,24 @@ class TreeModel (_QAbstractItemModel):
             item = index.internalPointer()  # type: _TreeItem
             if index.column() == _TreeItem.Fields.index("value") and \
                     item.is_leaf():
-                # set item value
-                item.value = str(value)
-
-                # extract override from index and emit the signal
-                override = self.__create_override(index, None)
-                self.newOverride.emit(override)
+                self._set_value(index, str(value))
                 return True
 
         return False
 
+    def _set_value(self, index: _QModelIndex, value: _Any):
+        """Set value of leaf at given index as it is, without converting it
+        to text as setData() does, and emit its override"""
+        item = index.internalPointer()  # type: _TreeItem
+        change = (self.path(index), item.value, value) \
+            if item.value != value else None
+        item.value = value
+        if self._search_index is not None:
+            self._search_index.set_value(self.path(index), item.value)
+
+        # extract override from index and emit the signal
+        self._edited(index, change, self.__create_override(index))
+
     def headerData(self, section: int, orientation: _Qt.Orientation,
                    role: _Qt.ItemDataRole):
         """Override from QAbstractItemModel
@@ -159,6 +563,48 @@ class TreeModel (_QAbstractItemModel):
 
         return parent_item.child_count()
 
+    def hasChildren(self, parent=_QModelIndex()) -> bool:
+        """
+        Override from QAbstractItemModel. Report children even if they are
+        not built yet
+        """
+        if parent.column() > 0:
+            return False
+
+        if not parent.isValid():
+            parent_item = self._root_item
+        else:
+            parent_item = parent.internalPointer()
+
+        return parent_item.total_count() > 0
+
+    def canFetchMore(self, parent: _QModelIndex) -> bool:
+        """
+        Override from QAbstractItemModel. Check if parent has children that
+        are not built yet
+        """
+        if not parent.isValid():
+            return self._root_item.can_fetch_more()
+        return parent.internalPointer().can_fetch_more()
+
+    def fetchMore(self, parent: _QModelIndex):
+        """
+        Override from QAbstractItemModel. Build next batch of parent children
+        """
+        if not parent.isValid():
+            parent_item = self._root_item
+        else:
+            parent_item = parent.internalPointer()
+
+        first = parent_item.child_count()
+        count = min(self.__batch_size, parent_item.total_count() - first)
+        if count <= 0:
+            return
+
+        self.beginInsertRows(parent, first, first + count - 1)
+        parent_item.fetch_more(count)
+        self.endInsertRows()
+
     def columnCount(self, parent=_QModelIndex()):
         """
         Override from QAbstractItemModel. Return number of columns
@@ -172,3 +618,192 @@ class TreeModel (_QAbstractItemModel):
             return _Qt.ItemIsEditable | flags
         else:
             return flags
+
+
+class ColumnarTreeModel (TreeModel):
+    """TreeModel backed by TreeStore instead of TreeItem objects. Indexes
+    hold node ids, so row, parent and child lookups are O(1)"""
+
+    def __init__(self, parent: _QObject = None, search: bool = False,
+                 sparse_lists: bool = False):
+        self._store = _TreeStore.load(_Configs())
+        TreeModel.__init__(self, parent, search=search,
+                           sparse_lists=sparse_lists)
+
+    def load(self, configs: _Configs):
+        """Override from TreeModel. Fills the underlying store with given
+        configs"""
+        assert isinstance(configs, _Configs)
+
+        self.beginResetModel()
+        self._store = _TreeStore.load(configs)
+        if self._search_index is not None:
+            self._search_index = _SearchIndex.build(configs)
+        self._history.clear()
+        self.endResetModel()
+
+        return True
+
+    def update(self, configs: _Configs, keys=None):
+        """Override from TreeModel. Changed values of leaves are set in place.
+        The store can't be changed structurally, so otherwise it's rebuilt
+        as a layout change: persistent indexes, and so expansion and
+        selection of views, move to the nodes with the same paths"""
+        assert isinstance(configs, _Configs)
+        keys = None if keys is None else set(keys)
+        changed = self.__changed_leaves(configs, keys)
+        if changed is None:
+            self.layoutAboutToBeChanged.emit()
+            before = self.persistentIndexList()
+            paths = [(self.path(index), index.column()) for index in before]
+            self._store = _TreeStore.load(configs)
+            self.changePersistentIndexList(
+                before, [self.index_of(path, column)
+                         for path, column in paths])
+            self.layoutChanged.emit()
+        else:
+            column = _TreeItem.Fields.index("value")
+            for node, value in changed:
+                self._store.set_value(node, value)
+                index = self.createIndex(self._store.row(node), column, node)
+                self.dataChanged.emit(index, index)
+        self._reindex(configs, keys)
+        return True
+
+    def __changed_leaves(self, configs: _Configs,
+                         keys: _Optional[set]) -> _Optional[list]:
+        """Return [(node, value)] of leaves whose values differ in given
+        configs, None if the structure differs. Only configs with given
+        keys are compared"""
+        store = self._store
+        names = [store.key(store.child(0, row))
+                 for row in range(store.child_count(0))]
+        if names != sorted(configs):
+            return None
+
+        changed = []
+        pending = [(store.child(0, row), configs[name])
+                   for row, name in enumerate(names)
+                   if keys is None or name in keys]
+        while pending:
+            node, value = pending.pop()
+            kind = _TreeStore.kind_of(value)
+            if kind != store.kinds[node]:
+                return None
+            if kind == _TreeStore.LEAF:
+                before = store.value(node)
+                if before != value or type(before) != type(value):
+                    changed.append((node, value))
+                continue
+            if len(value) != store.child_count(node):
+                return None
+            if kind == _TreeStore.LIST:
+                pending.extend((store.child(node, row), element)
+                               for row, element in enumerate(value))
+                continue
+            for row, key in enumerate(sorted(value)):
+                child = store.child(node, row)
+                if store.key(child) != key:
+                    return None
+                pending.append((child, value[key]))
+        return changed
+
+    def __node(self, index: _QModelIndex) -> int:
+        return index.internalId() if index.isValid() else 0
+
+    def path(self, index: _QModelIndex) -> tuple:
+        """Override from TreeModel"""
+        return self._store.path(self.__node(index))
+
+    def data(self, index: _QModelIndex, role: _Qt.ItemDataRole) -> _Any:
+        """Override from TreeModel. Returns underlying store fields"""
+        if not index.isValid():
+            return None
+
+        node = index.internalId()
+
+        if role == _Qt.DisplayRole:
+            column_name = _TreeItem.Fields[index.column()]
+            return self._store.get_field(node, column_name)
+
+        elif role == _Qt.EditRole and \
+                index.column() == _TreeItem.Fields.index("value"):
+            return self._store.value(node)
+
+        elif role == _Qt.ToolTipRole and self._store.is_leaf(node):
+            return self._tooltip(index)
+
+    def __create_override(self, node: int) -> _Configs:
+        """Build override from the path of changed node"""
+        store = self._store
+        if self._sparse_lists:
+            return _sparse_override(store.path(node), store.value(node))
+
+        # lists are overridden as a whole
+        if store.value_type(node) == list:
+            parent = store.parent(node)
+            return _Configs.from_path(store.path(parent),
+                                      store.child_values(parent))
+        return _Configs.from_path(store.path(node), store.value(node))
+
+    def setData(self, index: _QModelIndex, value: _Any, role: _Qt.ItemDataRole):
+        """Override from TreeModel. Catch value change and emit 'newOverride'
+        signal"""
+        if role == _Qt.EditRole and index.isValid():
+            node = index.internalId()
+            if index.column() == _TreeItem.Fields.index("value") and \
+                    self._store.is_leaf(node):
+                self._set_value(index, str(value))
+                return True
+
+        return False
+
+    def _set_value(self, index: _QModelIndex, value: _Any):
+        """Override from TreeModel"""
+        node = index.internalId()
+        before = self._store.value(node)
+        change = (self._store.path(node), before, value) \
+            if str(before) != str(value) else None
+        self._store.set_value(node, value)
+        if self._search_index is not None:
+            self._search_index.set_value(self._store.path(node),
+                                         self._store.value(node))
+        self._edited(index, change, self.__create_override(node))
+
+    def index(self, row: int, column: int,
+              parent=_QModelIndex()) -> _QModelIndex:
+        """Override from TreeModel. Return index according row, column and
+        parent"""
+        if not self.hasIndex(row, column, parent):
+            return _QModelIndex()
+
+        node = self._store.child(self.__node(parent), row)
+        return self.createIndex(row, column, node)
+
+    def parent(self, index: _QModelIndex) -> _QModelIndex:
+        """Override from TreeModel"""
+        if not index.isValid():
+            return _QModelIndex()
+
+        parent_node = self._store.parent(index.internalId())
+        if parent_node <= 0:
+            return _QModelIndex()
+
+        return self.createIndex(self._store.row(parent_node), 0, parent_node)
+
+    def rowCount(self, parent=_QModelIndex()):
+        """Override from TreeModel. Return row count from parent index"""
+        if parent.column() > 0:
+            return 0
+        return self._store.child_count(self.__node(parent))
+
+    def hasChildren(self, parent=_QModelIndex()) -> bool:
+        """Override from TreeModel"""
+        return self.rowCount(parent) > 0
+
+    def canFetchMore(self, parent: _QModelIndex) -> bool:
+        """Override from TreeModel. The store is always fully built"""
+        return False
+
+    def fetchMore(self, parent: _QModelIndex):
+        """Override from TreeModel. The store is always fully built"""
@@ -0,0 +1,163 @@
+from array import array as _array
+from collections import deque as _deque
+from sys import getsizeof as _getsizeof
+from typing import Union as _Union
+from .._configs_handler import Configs as _Configs
+
+
+class TreeStore:
+    """
+    Columnar alternative to TreeItem. Nodes are integer ids stored
+    breadth-first, so children of a node occupy a contiguous id range and
+    row/parent/child lookups are O(1). Node 0 is the root
+    """
+    # note: node kinds. Field "type" of a node is the kind of its parent
+    Kinds: tuple = (None, dict, _Configs, list)
+    LEAF, DICT, CONFIGS, LIST = range(4)
+
+    def __init__(self):
+        self.parents = _array('q')
+        self.rows = _array('q')
+        self.first_children = _array('q')
+        self.child_counts = _array('q')
+        # note: -1 key id means the key is the row (list element)
+        self.key_ids = _array('q')
+        self.kinds = _array('b')
+        self.values = []
+
+        self.keys = []
+        self.__key_ids = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __intern(self, key: str) -> int:
+        key_id = self.__key_ids.get(key)
+        if key_id is None:
+            key_id = self.__key_ids[key] = len(self.keys)
+            self.keys.append(key)
+        return key_id
+
+    @staticmethod
+    def kind_of(value) -> int:
+        """Return kind of node holding given value"""
+        if isinstance(value, _Configs):
+            return TreeStore.CONFIGS
+        if isinstance(value, dict):
+            return TreeStore.DICT
+        if isinstance(value, list):
+            return TreeStore.LIST
+        return TreeStore.LEAF
+
+    def __append(self, parent: int, row: int, key_id: int, value) -> int:
+        kind = TreeStore.kind_of(value)
+        self.parents.append(parent)
+        self.rows.append(row)
+        self.first_children.append(0)
+        self.child_counts.append(len(value) if kind else 0)
+        self.key_ids.append(key_id)
+        self.kinds.append(kind)
+        self.values.append("" if kind else value)
+        return len(self.kinds) - 1
+
+    @classmethod
+    def load(cls, value: _Union[_Configs, dict, list, str],
+             sort=True) -> "TreeStore":
+        """Build the store from given JSON configuration data"""
+        store = cls()
+        queue = _deque([(store.__append(-1, 0, store.__intern("root"),
+                                        value), value)])
+
+        while queue:
+            node, value = queue.popleft()
+            store.first_children[node] = len(store.kinds)
+
+            if isinstance(value, dict):
+                keys = sorted(value) if sort else list(value)
+                for row, key in enumerate(keys):
+                    child = value[key]
+                    child_id = store.__append(node, row, store.__intern(key),
+                                              child)
+                    if isinstance(child, (dict, list)):
+                        queue.append((child_id, child))
+            else:
+                for row, child in enumerate(value if isinstance(value, list)
+                                            else ()):
+                    child_id = store.__append(node, row, -1, child)
+                    if isinstance(child, (dict, list)):
+                        queue.append((child_id, child))
+
+        return store
+
+    def child(self, node: int, row: int) -> int:
+        """Return the child id at given row"""
+        assert 0 <= row < self.child_counts[node]
+        return self.first_children[node] + row
+
+    def parent(self, node: int) -> int:
+        """Return the parent id of given node or -1 for the root"""
+        return self.parents[node]
+
+    def row(self, node: int) -> int:
+        """Return the row where given node occupies in the parent"""
+        return self.rows[node]
+
+    def child_count(self, node: int) -> int:
+        """Return the number of children of given node"""
+        return self.child_counts[node]
+
+    def key(self, node: int) -> _Union[str, int]:
+        """Return key of given node, list elements keys are their rows"""
+        key_id = self.key_ids[node]
+        return self.rows[node] if key_id < 0 else self.keys[key_id]
+
+    def value(self, node: int):
+        """Return value of given node, empty string for containers"""
+        return self.values[node]
+
+    def set_value(self, node: int, value):
+        """Change value of given leaf node"""
+        assert self.is_leaf(node)
+        self.values[node] = value
+
+    def value_type(self, node: int):
+        """Return "type" field of given node: kind of its parent container"""
+        parent = self.parents[node]
+        return TreeStore.Kinds[self.kinds[node if parent < 0 else parent]]
+
+    def is_leaf(self, node: int) -> bool:
+        return self.kinds[node] == TreeStore.LEAF
+
+    def get_field(self, node: int, name: str):
+        """Return field value with given name, same as TreeItem.get_field"""
+        if name == "key":
+            return self.key(node)
+        if name == "value":
+            return self.values[node]
+        if name == "type":
+            return self.value_type(node)
+        if name == "is_leaf":
+            return self.is_leaf(node)
+        return ""
+
+    def child_values(self, node: int) -> list:
+        """Return values of all children of given node"""
+        first = self.first_children[node]
+        return self.values[first:first + self.child_counts[node]]
+
+    def path(self, node: int) -> tuple:
+        """Return keys from the root (exclusive) to given node"""
+        path = []
+        while self.parents[node] >= 0:
+            path.append(self.key(node))
+            node = self.parents[node]
+        return tuple(reversed(path))
+
+    def memory_usage(self) -> int:
+        """Return approximate number of bytes held by the store"""
+        arrays = (self.parents, self.rows, self.first_children,
+                  self.child_counts, self.key_ids, self.kinds)
+        return sum(_getsizeof(a) for a in arrays) + \
+            _getsizeof(self.values) + _getsizeof(self.keys) + \
+            _getsizeof(self.__key_ids) + \
+            sum(_getsizeof(k) for k in self.keys)
@@ -1,10 +1,12 @@
 #!/bin/env python3
 
+import logging
 import os
 import sys
 from argparse import ArgumentParser
-from json_override_test_assignment import Application, \
-    CONFIGS_DIRECTORY, OVERRIDE_FILE
+from json_override_test_assignment import Application, ConfigsCache, \
+    CONFIGS_DIRECTORY, OVERRIDE_FILE, enable_profiling, \
+    profiling_from_environment
 
 
 def is_valid_file(parser, arg):
@@ -30,8 +32,121 @@ if __name__ == "__main__":
                             help="path to directory with config*.json")
     arg_parser.add_argument("--overrides", type=str, default=OVERRIDE_FILE,
                             help="path to overrides.json file")
+    arg_parser.add_argument("--verify-overrides", action="store_true",
+                            help="check every incremental override against "
+                                 "a full recompute")
+    arg_parser.add_argument("--write-window", type=float, default=0.2,
+                            help="seconds to coalesce edits before writing "
+                                 "overrides.json")
+    arg_parser.add_argument("--lazy", action="store_true",
+                            help="build tree items only when expanded")
+    arg_parser.add_argument("--batch-size", type=int, default=256,
+                            help="number of tree items built at once in "
+                                 "lazy mode")
+    arg_parser.add_argument("--columnar", action="store_true",
+                            help="keep tree in flat arrays instead of "
+                                 "per-node objects")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="number of threads reading config files")
+    arg_parser.add_argument("--parse-processes", action="store_true",
+                            help="parse config files in a process pool of "
+                                 "--workers processes, one per CPU by "
+                                 "default")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="don't use cache of parsed config files")
+    arg_parser.add_argument("--clear-cache", action="store_true",
+                            help="remove cache of parsed config files")
+    arg_parser.add_argument("--hash-cache", action="store_true",
+                            help="validate cached files by content hash too")
+    arg_parser.add_argument("--watch", action="store_true",
+                            help="reload config files changed while running")
+    arg_parser.add_argument("--mmap", action="store_true",
+                            help="memory-map config files and parse them "
+                                 "on demand")
+    arg_parser.add_argument("--progressive", action="store_true",
+                            help="show the window at once and load configs "
+                                 "in the background")
+    arg_parser.add_argument("--chunk-size", type=int, default=16,
+                            help="number of config files added to the "
+                                 "window at once in progressive mode")
+    arg_parser.add_argument("--search", action="store_true",
+                            help="index keys and values and show search "
+                                 "field filtering the tree")
+    arg_parser.add_argument("--layers", type=str, default=None,
+                            help="directory of override layers applied in "
+                                 "file name order, e.g. 10-site.json, "
+                                 "20-user.json")
+    arg_parser.add_argument("--target-layer", type=str, default=None,
+                            help="name of the layer edits are saved to, "
+                                 "the top one by default")
+    arg_parser.add_argument("--snapshot", type=str, default=None,
+                            help="compile merged configs into given binary "
+                                 "snapshot file whenever they change")
+    arg_parser.add_argument("--journal", action="store_true",
+                            help="append edits to a journal next to the "
+                                 "overrides file and compact it in the "
+                                 "background instead of rewriting the file")
+    arg_parser.add_argument("--sparse-lists", action="store_true",
+                            help="save edited list elements instead of "
+                                 "whole lists into overrides")
+    arg_parser.add_argument("--verbose", action="store_true",
+                            help="log startup timings")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="count calls and latencies of model and "
+                                 "configs operations, report them on exit "
+                                 "or SIGUSR1")
+    arg_parser.add_argument("--trace", type=str, default=None,
+                            help="write Chrome trace of profiled calls "
+                                 "into given file on exit")
     args = arg_parser.parse_args()
 
+    if args.profile or args.trace:
+        enable_profiling(args.trace)
+    else:
+        profiling_from_environment()
+
+    if args.layers is not None:
+        if not os.path.isdir(args.layers):
+            arg_parser.error(f"The directory {args.layers} doesn't exist!")
+        if args.progressive:
+            arg_parser.error("--layers can't be loaded progressively")
+        layers = sorted(f[:-len(".json")] for f in os.listdir(args.layers)
+                        if f.endswith(".json"))
+        if not layers:
+            arg_parser.error(f"The directory {args.layers} doesn't contain "
+                             f"any layers")
+        target = args.target_layer or layers[-1]
+        if target not in layers:
+            arg_parser.error(f"Layer {target} not found in {args.layers}")
+        args.overrides = os.path.join(args.layers, f"{target}.json")
+
+    if args.workers is not None and args.workers < 1:
+        arg_parser.error("--workers must be positive")
+    if args.parse_processes and args.workers is None:
+        args.workers = os.cpu_count() or 1
+
+    if args.journal and args.progressive:
+        arg_parser.error("--journal can't be loaded progressively")
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+
+    cache = None if args.no_cache else ConfigsCache(
+        hash_contents=args.hash_cache)
+    if args.clear_cache:
+        ConfigsCache().clear()
+
     app = Application("json_override_test_assignment",
-                      args.configs, args.overrides)
+                      args.configs, args.overrides,
+                      verify_overrides=args.verify_overrides,
+                      write_window=args.write_window,
+                      lazy_tree=args.lazy, batch_size=args.batch_size,
+                      columnar_tree=args.columnar,
+                      workers=args.workers, processes=args.parse_processes,
+                      cache=cache, watch=args.watch, lazy_configs=args.mmap,
+                      progressive=args.progressive,
+                      chunk_size=args.chunk_size, search=args.search,
+                      overrides_dir=args.layers,
+                      snapshot_file=args.snapshot, journal=args.journal,
+                      sparse_lists=args.sparse_lists)
     sys.exit(app.exec())
@@ -0,0 +1,138 @@
+import unittest
+import json
+import io
+import sys
+import subprocess
+from json_override_test_assignment import ConfigsSnapshot
+from json_override_test_assignment._cli import main
+from json_override_test_assignment import _parsers
+from tempfile import mkdtemp
+import shutil
+import os
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.dirs = []
+        for i in range(3):
+            config_dir = f"{self.tmp_dir}/configs{i}"
+            os.mkdir(config_dir)
+            with open(f"{config_dir}/config1.json", 'w') as f:
+                json.dump({'a': {'b': i, 'c': [1, 2]}, 'd': 'x'}, f)
+            with open(f"{config_dir}/overrides.json", 'w') as f:
+                json.dump({'config1': {'a': {'b': 10}, 'd': 'x'}}, f)
+            self.dirs.append(config_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        status = main(list(argv), output)
+        return status, [json.loads(line)
+                        for line in output.getvalue().splitlines()]
+
+    def test_snapshot(self):
+        status, records = self.run_cli("snapshot", *self.dirs)
+        self.assertEqual(status, 0)
+        for i, record in enumerate(records):
+            with ConfigsSnapshot(record["snapshot"]) as snapshot:
+                self.assertEqual(snapshot.get("/config1/a/b"), 10)
+                self.assertEqual(snapshot.get("/config1/d"), "x")
+
+    def test_merge(self):
+        for workers in ("1", "2"):
+            status, records = self.run_cli("merge", *self.dirs,
+                                           "--workers", workers)
+            self.assertEqual(status, 0)
+            self.assertEqual([r["configs"] for r in records], self.dirs)
+            for record in records:
+                self.assertEqual(record["merged"], {
+                    'config1': {'a': {'b': 10, 'c': [1, 2]}, 'd': 'x'}})
+
+    def test_diff(self):
+        status, records = self.run_cli("diff", self.dirs[0])
+        self.assertEqual(status, 0)
+        self.assertEqual(records[0]["overrides"],
+                         {'config1': {'a': {'b': 10}}})
+
+        status, records = self.run_cli("diff", self.dirs[0], "--json-patch")
+        self.assertEqual(records[0]["json_patch"], [
+            {"op": "replace", "path": "/config1/a/b", "value": 10}])
+
+    def test_apply(self):
+        changes = f"{self.tmp_dir}/changes.json"
+        with open(changes, 'w') as f:
+            json.dump({'config1': {'a': {'b': 1}, 'd': 'y'}}, f)
+
+        status, records = self.run_cli("apply", changes, *self.dirs[:2])
+        self.assertEqual(status, 0)
+        self.assertEqual(records[0]["overrides"],
+                         {'config1': {'a': {'b': 1}, 'd': 'y'}})
+        self.assertEqual(records[1]["overrides"], {'config1': {'d': 'y'}})
+        with open(f"{self.dirs[1]}/overrides.json") as f:
+            self.assertEqual(json.load(f), {'config1': {'d': 'y'}})
+
+    def test_journal(self):
+        with open(f"{self.dirs[0]}/overrides.journal", 'w') as f:
+            f.write('{"seq": 1, "override": {"config1": {"d": "y"}}}\n')
+        status, records = self.run_cli("merge", self.dirs[0])
+        self.assertEqual(records[0]["merged"], {
+            'config1': {'a': {'b': 10, 'c': [1, 2]}, 'd': 'y'}})
+
+        changes = f"{self.tmp_dir}/changes.json"
+        with open(changes, 'w') as f:
+            json.dump({'config1': {'a': {'b': 0}}}, f)
+        status, records = self.run_cli("apply", changes, self.dirs[0])
+        self.assertEqual(status, 0)
+        self.assertEqual(records[0]["overrides"], {'config1': {'d': 'y'}})
+        with open(f"{self.dirs[0]}/overrides.journal") as f:
+            self.assertEqual(f.read(), '{"compacted": 1}\n')
+        status, records = self.run_cli("diff", self.dirs[0])
+        self.assertEqual(records[0]["overrides"], {'config1': {'d': 'y'}})
+
+    def test_validate(self):
+        with open(f"{self.dirs[1]}/overrides.json", 'w') as f:
+            json.dump({'config1': {'e': 1}, 'config2': {}}, f)
+        with open(f"{self.dirs[2]}/config2.json", 'w') as f:
+            f.write("{")
+
+        status, records = self.run_cli("validate", *self.dirs)
+        self.assertEqual(status, 1)
+        self.assertEqual([r["valid"] for r in records], [True, False, False])
+        self.assertEqual(len(records[1]["errors"]), 2)
+
+        status, records = self.run_cli("merge", self.dirs[2])
+        self.assertEqual(status, 1)
+        self.assertIn("error", records[0])
+
+    def test_parsers(self):
+        selected = _parsers._selected
+        try:
+            status, records = self.run_cli(
+                "parsers", "--file", f"{self.dirs[0]}/config1.json")
+        finally:
+            _parsers._selected = selected
+        self.assertEqual(status, 0)
+        self.assertIn("stdlib", [r["parser"] for r in records])
+        self.assertEqual(sum(r["selected"] for r in records), 1)
+
+    def test_legacy_generate(self):
+        filename = f"{self.tmp_dir}/config.json"
+        self.assertEqual(main([filename, "--seed", "1"]), 0)
+        with open(filename) as f:
+            self.assertTrue(json.load(f))
+
+    def test_import_without_qt(self):
+        code = "import sys, json_override_test_assignment as p; " \
+               "p.Configs; print(any(m.startswith('PySide2') " \
+               "for m in sys.modules))"
+        output = subprocess.check_output([sys.executable, "-c", code],
+                                         cwd=os.path.dirname(
+                                             os.path.dirname(__file__)))
+        self.assertEqual(output.strip(), b"False")
+
+
+if __name__ == '__main__':
+    unittest.main()
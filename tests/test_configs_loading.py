@@ -0,0 +1,104 @@
+import unittest
+import json
+from json_override_test_assignment import Configs, ConfigsLoadError, \
+    ConfigsCache, create_corpus
+from json_override_test_assignment._diff import equal
+from tempfile import mkdtemp
+import shutil
+import os
+
+
+class TestConfigsLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        for i in range(20):
+            with open(f"{self.tmp_dir}/config{i}.json", 'w') as f:
+                json.dump({'a': {'b': [i, i + 1]}, 'c': str(i)}, f)
+        with open(f"{self.tmp_dir}/overrides.json", 'w') as f:
+            f.write("not a config")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_concurrent_matches_serial(self):
+        serial = Configs.from_config_dir(self.tmp_dir)
+        self.assertEqual(len(serial), 20)
+        for processes in (False, True):
+            loaded = Configs.from_config_dir(self.tmp_dir, workers=4,
+                                             processes=processes)
+            self.assertEqual(loaded, serial)
+            self.assertEqual(list(loaded), list(serial))
+
+    def test_errors_collected(self):
+        for name in ("config5.json", "config7.json"):
+            with open(f"{self.tmp_dir}/{name}", 'w') as f:
+                f.write("{")
+
+        with self.assertRaises(ConfigsLoadError) as context:
+            Configs.from_config_dir(self.tmp_dir, workers=4)
+        self.assertEqual(sorted(context.exception.errors),
+                         [f"{self.tmp_dir}/config5.json",
+                          f"{self.tmp_dir}/config7.json"])
+        for error in context.exception.errors.values():
+            self.assertIsInstance(error, json.JSONDecodeError)
+
+    def test_cache(self):
+        cache = ConfigsCache(f"{self.tmp_dir}/cache", hash_contents=True)
+        serial = Configs.from_config_dir(self.tmp_dir)
+
+        self.assertEqual(Configs.from_config_dir(self.tmp_dir, cache=cache),
+                         serial)
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 20})
+
+        self.assertEqual(Configs.from_config_dir(self.tmp_dir, cache=cache),
+                         serial)
+        self.assertEqual(cache.stats(), {"hits": 20, "misses": 20})
+
+        # only changed file is parsed again, removed one is dropped
+        with open(f"{self.tmp_dir}/config3.json", 'w') as f:
+            json.dump({'changed': True}, f)
+        os.remove(f"{self.tmp_dir}/config4.json")
+        loaded = Configs.from_config_dir(self.tmp_dir, workers=2, cache=cache)
+        self.assertEqual(cache.stats(), {"hits": 38, "misses": 21})
+        self.assertEqual(loaded['config3'], {'changed': True})
+        self.assertEqual(loaded, Configs.from_config_dir(self.tmp_dir))
+
+        cache.clear(self.tmp_dir)
+        self.assertEqual(os.listdir(cache.directory), [])
+
+    def test_deep(self):
+        depth = 100_000
+        directory = mkdtemp(dir=self.tmp_dir)
+        with open(f"{directory}/config1.json", 'w') as f:
+            f.write('{"a": [1, ' * depth + '"x"' + ']}' * depth)
+        with open(f"{directory}/overrides.json", 'w') as f:
+            f.write('{"config1": ' + '{"a": {"$list": true, "1": ' * depth +
+                    '"y"' + '}}' * depth + '}')
+
+        cache = ConfigsCache(f"{self.tmp_dir}/cache")
+        for kwargs in ({}, {'workers': 2}, {'cache': cache}, {'lazy': True}):
+            loaded = Configs.from_config_dir(directory, **kwargs)
+            value = loaded['config1']
+            for _ in range(depth - 1):
+                value = value['a'][1]
+            self.assertEqual(value['a'], [1, 'x'])
+        self.assertRaises(ConfigsLoadError, Configs.from_config_dir,
+                          directory, workers=2, processes=True)
+
+        overrides = Configs.from_override_file(f"{directory}/overrides.json")
+        actual = Configs.override(loaded, overrides)
+        self.assertTrue(equal(Configs.diff(loaded, actual,
+                                           sparse_lists=True), overrides))
+
+    def test_corpus_generator(self):
+        def corpus(seed):
+            directory = mkdtemp(dir=self.tmp_dir)
+            create_corpus(directory, 3, seed=seed, depth=3, fanout=(2, 3),
+                          list_length=(1, 4), size=20000)
+            return Configs.from_config_dir(directory)
+
+        first = corpus(42)
+        self.assertEqual(sorted(first), ['config1', 'config2', 'config3'])
+        self.assertEqual(first, corpus(42))
+        self.assertNotEqual(first, corpus(43))
+        self.assertGreater(len(json.dumps(first, indent=2)), 15000)
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import socket
+import threading
+import unittest
+from tempfile import mkdtemp
+from json_override_test_assignment import ConfigsClient, ConfigsServer
+
+
+class TestConfigsServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.write('config1.json', {'a': {'b': 1, 'c': [1, 2]}})
+        self.write('config2.json', {'d': 'x'})
+        self.write('overrides.json', {'config1': {'a': {'b': 2}}})
+        self.server = ConfigsServer(
+            os.path.join(self.directory, 'configs.sock'), self.directory,
+            os.path.join(self.directory, 'overrides.json'),
+            poll_interval=3600)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs=dict(poll_interval=0.01))
+        self.thread.start()
+        self.client = ConfigsClient(self.server.server_address, pool_size=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        with open(os.path.join(self.directory, name), 'w') as f:
+            json.dump(content, f)
+
+    def test_get(self):
+        self.assertEqual(self.client.get('/config1/a/b'), 2)
+        self.assertEqual(self.client.get(('config1', 'a', 'c', 1)), 2)
+        self.assertEqual(self.client.get('/config1/a'),
+                         {'b': 2, 'c': [1, 2]})
+        with self.assertRaises(KeyError):
+            self.client.get('/config1/x')
+        self.assertIsNone(self.client.get('/config3', None))
+        with self.assertRaises(ValueError):
+            self.client.get('config1')
+        with self.assertRaises(ValueError):
+            self.client.request({'op': 'unknown'})
+
+    def test_snapshot(self):
+        self.assertEqual(self.client.snapshot('config2'), {'d': 'x'})
+        self.assertEqual(self.client.snapshot(),
+                         {'config1': {'a': {'b': 2, 'c': [1, 2]}},
+                          'config2': {'d': 'x'}})
+        with self.assertRaises(KeyError):
+            self.client.snapshot('config3')
+
+    def test_pool(self):
+        results = []
+
+        def worker():
+            results.extend(self.client.get('/config2/d') for _ in range(50))
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['x'] * 200)
+
+    def test_refresh(self):
+        version = self.client.version()
+        events = self.client.subscribe()
+        self.assertEqual(self.server.check(), set())
+
+        received = []
+        thread = threading.Thread(target=lambda: received.append(
+            next(events)))
+        thread.start()
+        self.write('overrides.json', {'config1': {'a': {'b': 3}},
+                                      'config2': {'d': 'x'}})
+        os.utime(os.path.join(self.directory, 'overrides.json'), ns=(1, 1))
+        while thread.is_alive():
+            self.server.check()
+            thread.join(0.01)
+        events.close()
+
+        self.assertEqual(received, [{'event': 'changed',
+                                     'version': version + 1,
+                                     'keys': ['config1']}])
+        self.assertEqual(self.client.get('/config1/a/b'), 3)
+        self.assertEqual(self.client.version(), version + 1)
+
+        os.remove(os.path.join(self.directory, 'config2.json'))
+        self.assertEqual(self.server.check(), {'config2'})
+        self.assertEqual(list(self.client.snapshot()), ['config1'])
+
+    def test_atomic_replace(self):
+        filename = os.path.join(self.directory, 'overrides.json')
+        stat = os.stat(filename)
+        self.write('replaced.json', {'config1': {'a': {'b': 5}}})
+        os.utime(os.path.join(self.directory, 'replaced.json'),
+                 ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(os.path.join(self.directory, 'replaced.json'), filename)
+        self.assertEqual(self.server.check(), {'config1'})
+        self.assertEqual(self.client.get('/config1/a/b'), 5)
+
+    def test_stalled_subscriber(self):
+        # notifications large enough to fill socket buffers quickly
+        names = [f"config{i:03}" + "x" * 200 for i in range(200)]
+        for name in names:
+            self.write(f'{name}.json', {'v': 0})
+        self.server.check()
+
+        stalled = socket.socket(socket.AF_UNIX)
+        stalled.settimeout(10)
+        stalled.connect(self.server.server_address)
+        stalled.sendall(b'{"op": "subscribe"}\n')
+        stalled.recv(1024)
+        events = self.client.subscribe()
+        received = []
+        thread = threading.Thread(target=lambda: received.extend(
+            next(events)["version"] for _ in range(100)), daemon=True)
+        thread.start()
+
+        version = self.client.version()
+        # more than the server queues for a subscriber by default
+        for i in range(1, 101):
+            self.write('overrides.json', {'config1': {'a': {'b': 2}},
+                                          **{name: {'v': i}
+                                             for name in names}})
+            os.utime(os.path.join(self.directory, 'overrides.json'),
+                     ns=(i, i))
+            self.assertEqual(len(self.server.check()), len(names))
+        thread.join()
+        events.close()
+        self.assertEqual(received, list(range(version + 1, version + 101)))
+
+        # the stalled one is disconnected
+        while stalled.recv(1 << 16):
+            pass
+        stalled.close()
+
+    def test_journal(self):
+        with open(os.path.join(self.directory, 'overrides.journal'),
+                  'w') as f:
+            f.write('{"seq": 1, "override": {"config2": {"d": "y"}}}\n')
+        self.assertEqual(self.server.check(), {'config2'})
+        self.assertEqual(self.client.get('/config2/d'), 'y')
+        self.assertEqual(self.client.get('/config1/a/b'), 2)
+
+    def test_served_already(self):
+        with self.assertRaises(OSError):
+            ConfigsServer(self.server.server_address, self.directory,
+                          os.path.join(self.directory, 'overrides.json'))
@@ -0,0 +1,25 @@
+import unittest
+from json_override_test_assignment.tree import EditHistory
+
+
+class TestEditHistory(unittest.TestCase):
+    def test_undo_redo(self):
+        history = EditHistory(limit=2)
+        self.assertFalse(history.can_undo)
+        history.push([])
+        self.assertEqual(len(history), 0)
+
+        for value in '123':
+            history.push([(('a',), str(int(value) - 1), value)])
+        # the oldest step is dropped
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history.undo(), ((('a',), '2', '3'),))
+        self.assertEqual(history.undo(), ((('a',), '1', '2'),))
+        self.assertFalse(history.can_undo)
+        self.assertEqual(history.redo(), ((('a',), '1', '2'),))
+        self.assertTrue(history.can_redo)
+
+        history.push([(('b',), '0', '1')])
+        self.assertFalse(history.can_redo)
+        history.clear()
+        self.assertFalse(history.can_undo)
@@ -0,0 +1,177 @@
+import unittest
+import json
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import mock
+from json_override_test_assignment import Configs, OverridesJournal, \
+    atomic_write
+from json_override_test_assignment._journal import read_overrides, \
+    write_overrides
+
+
+class TestOverridesJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.filename = f"{self.tmp_dir}/overrides.json"
+        self.journal_file = f"{self.tmp_dir}/overrides.journal"
+        self.original = Configs({'a': {'b': 1, 'c': 2}, 'd': [1, 2]})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def edit(self, journal: OverridesJournal, actual: Configs,
+             overrides: Configs, override: dict):
+        with journal.lock:
+            Configs.patch(actual, self.original, overrides, override)
+        journal.append(override, overrides)
+
+    def records(self) -> list:
+        with open(self.journal_file) as f:
+            return [json.loads(line) for line in f]
+
+    def test_replay(self):
+        journal = OverridesJournal(self.filename, compact_size=1 << 20)
+        self.assertEqual(journal.replay(), [])
+        actual, overrides = Configs.override(self.original, {}), Configs()
+        self.edit(journal, actual, overrides, {'a': {'b': 5}})
+        self.edit(journal, actual, overrides, {'d': [3]})
+        self.edit(journal, actual, overrides, {'a': {'b': 1}})
+        self.assertEqual(journal.stats()["records"], 3)
+        self.assertEqual([r["seq"] for r in self.records()], [1, 2, 3])
+        self.assertFalse(os.path.exists(self.filename))
+
+        # simulate a crash: nothing is compacted
+        journal = OverridesJournal(self.filename)
+        self.assertEqual(journal.replay(), [{'a': {'b': 5}}, {'d': [3]},
+                                            {'a': {'b': 1}}])
+        self.edit(journal, actual, overrides, {'a': {'c': 3}})
+        self.assertEqual(self.records()[-1]["seq"], 4)
+
+        journal.close()
+        self.assertEqual(Configs.from_override_file(self.filename),
+                         {'a': {'c': 3}, 'd': [3]})
+        self.assertEqual(self.records(), [{"compacted": 4}])
+        self.assertEqual(OverridesJournal(self.filename).replay(), [])
+
+    def test_torn_record(self):
+        journal = OverridesJournal(self.filename)
+        actual, overrides = Configs.override(self.original, {}), Configs()
+        self.edit(journal, actual, overrides, {'a': {'b': 5}})
+        with open(self.journal_file, "a") as f:
+            f.write('{"seq": 2, "override": {"a"')
+
+        journal = OverridesJournal(self.filename)
+        self.assertEqual(journal.replay(), [{'a': {'b': 5}}])
+        self.edit(journal, actual, overrides, {'d': []})
+        self.assertEqual([r["seq"] for r in self.records()], [1, 2])
+
+        # only the final record may be torn, records must be complete
+        with open(self.journal_file, "a") as f:
+            f.write('{"seq": 3}\n')
+        self.assertRaises(ValueError, OverridesJournal, self.filename)
+        with open(self.journal_file, "r+") as f:
+            f.truncate(len(f.read()) - len('{"seq": 3}\n'))
+        with open(self.journal_file, "a") as f:
+            f.write('{"seq": 3, "override": \n{"seq": 4, "override": {}}\n')
+        self.assertRaises(ValueError, OverridesJournal, self.filename)
+
+    def test_compaction(self):
+        journal = OverridesJournal(self.filename, compact_size=100)
+        actual, overrides = Configs.override(self.original, {}), Configs()
+        for i in range(10):
+            self.edit(journal, actual, overrides, {'a': {'b': i}})
+        journal.flush()
+        self.assertGreater(journal.stats()["compactions"], 0)
+        journal.close()
+
+        self.assertEqual(Configs.from_override_file(self.filename),
+                         {'a': {'b': 9}})
+        self.assertEqual(self.records(), [{"compacted": 10}])
+        self.assertEqual(journal.last_written,
+                         Configs({'a': {'b': 9}}).dumps())
+
+    def test_interrupted_compaction(self):
+        journal = OverridesJournal(self.filename)
+        actual, overrides = Configs.override(self.original, {}), Configs()
+        self.edit(journal, actual, overrides, {'a': {'b': 5}})
+        self.edit(journal, actual, overrides, {'a': {'b': 1, 'c': 4}})
+
+        # overrides file is written, but the journal is not rewritten yet
+        overrides.dump(self.filename)
+        actual = Configs.override(self.original,
+                                  Configs.from_override_file(self.filename))
+        restored = Configs.diff(self.original, actual)
+        for override in OverridesJournal(self.filename).replay():
+            Configs.patch(actual, self.original, restored, override)
+        self.assertEqual(restored, overrides)
+
+    def test_crash_after_compaction(self):
+        journal = OverridesJournal(self.filename)
+        actual, overrides = Configs.override(self.original, {}), Configs()
+        self.edit(journal, actual, overrides,
+                  {'d': {'$list': True, '$append': [3]}})
+        self.edit(journal, actual, overrides, {'a': {'b': 5}})
+
+        # the overrides file is written, but the journal is not rewritten
+        def write(filename, data, *args, **kwargs):
+            if filename == self.journal_file:
+                raise OSError("crash")
+            atomic_write(filename, data, *args, **kwargs)
+        with mock.patch('json_override_test_assignment._journal.'
+                        '_atomic_write', side_effect=write):
+            journal.submit(overrides)
+            self.assertRaises(OSError, journal.flush)
+        self.edit(journal, actual, overrides, {'d': {'$list': True,
+                                                     '$append': [4]}})
+        self.assertEqual(overrides, {'a': {'b': 5}, 'd': [1, 2, 3, 4]})
+
+        # only the record after the compaction is replayed
+        self.assertEqual(OverridesJournal(self.filename).replay(),
+                         [{'d': {'$list': True, '$append': [4]}}])
+        self.assertEqual(read_overrides(self.filename, self.original),
+                         overrides)
+        journal.close()
+        self.assertEqual(self.records(), [{"compacted": 3}])
+        self.assertEqual(Configs.from_override_file(self.filename),
+                         overrides)
+
+    def test_read_only_directory(self):
+        Configs().dump(self.filename)
+        with mock.patch('os.access',
+                        side_effect=lambda path, mode: path != self.tmp_dir):
+            with self.assertLogs('json_override_test_assignment._journal',
+                                 'WARNING'):
+                journal = OverridesJournal(self.filename)
+            actual = Configs.override(self.original, {})
+            overrides = Configs()
+            self.edit(journal, actual, overrides, {'a': {'b': 5}})
+            journal.flush()
+            self.assertEqual(Configs.from_override_file(self.filename),
+                             {'a': {'b': 5}})
+            self.edit(journal, actual, overrides, {'d': [3]})
+            journal.close()
+        self.assertEqual(Configs.from_override_file(self.filename),
+                         {'a': {'b': 5}, 'd': [3]})
+        self.assertFalse(os.path.exists(self.journal_file))
+
+    def test_other_readers(self):
+        Configs({'a': {'c': 4}}).dump(self.filename)
+        journal = OverridesJournal(self.filename)
+        actual = Configs.override(self.original,
+                                  Configs.from_override_file(self.filename))
+        overrides = Configs.diff(self.original, actual)
+        self.edit(journal, actual, overrides, {'a': {'b': 5}})
+        self.edit(journal, actual, overrides, {'d': [3]})
+
+        # the overrides file isn't complete till the journal is compacted
+        self.assertEqual(Configs.from_override_file(self.filename),
+                         {'a': {'c': 4}})
+        self.assertEqual(read_overrides(self.filename, self.original),
+                         overrides)
+
+        write_overrides(self.filename, Configs({'a': {'b': 2}}))
+        self.assertEqual(self.records(), [{"compacted": 2}])
+        self.assertEqual(read_overrides(self.filename, self.original),
+                         {'a': {'b': 2}})
+        journal.close()
@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+import unittest
+from copy import deepcopy
+from json_override_test_assignment import Configs, OverrideLayers
+
+
+class TestOverrideLayers(unittest.TestCase):
+    original = Configs({'config1': {'param1': {'key1': 'a', 'key2': 'b'},
+                                    'param2': [1, 2]},
+                        'config2': {'param1': 'x'}})
+
+    def layers(self) -> OverrideLayers:
+        return OverrideLayers(self.original, [
+            ('site', {'config1': {'param1': {'key1': 'site'}}}),
+            ('host', {'config1': {'param2': [3]}, 'config2': {'param1': 'y'}}),
+            ('user', {'config1': {'param1': {'key1': 'user'}}})])
+
+    def test_merge(self):
+        original = deepcopy(self.original)
+        layers = self.layers()
+        self.assertEqual(layers.names, ['site', 'host', 'user'])
+        self.assertEqual(layers.actual,
+                         {'config1': {'param1': {'key1': 'user', 'key2': 'b'},
+                                      'param2': [3]},
+                          'config2': {'param1': 'y'}})
+        self.assertEqual(layers.merged('site')['config1']['param1']['key1'],
+                         'site')
+        self.assertEqual(layers.merged('site')['config2'], {'param1': 'x'})
+        # untouched configs are shared, overridden ones are not
+        self.assertIs(layers.merged('user')['config2'],
+                      layers.merged('host')['config2'])
+        self.assertIsNot(layers.actual['config1'], self.original['config1'])
+        self.assertEqual(self.original, original)
+
+    def test_source(self):
+        layers = self.layers()
+        self.assertEqual(layers.source('/config1/param1/key1'), 'user')
+        self.assertEqual(layers.source(('config1', 'param1', 'key2')), None)
+        self.assertEqual(layers.source('/config1/param2/0'), 'host')
+        self.assertEqual(layers.source('/config2/param1'), 'host')
+        self.assertEqual(layers.source('/config1/param1'), None)
+
+    def test_edit(self):
+        layers = self.layers()
+        merges = layers.merges
+        layers.edit('host', {'config1': {'param1': {'key2': 'c'}}})
+        # only layers from the edited one up are merged again
+        self.assertEqual(layers.merges - merges, 2)
+        self.assertEqual(layers.layer('host'),
+                         {'config1': {'param1': {'key2': 'c'}, 'param2': [3]},
+                          'config2': {'param1': 'y'}})
+        self.assertEqual(layers.actual['config1']['param1'],
+                         {'key1': 'user', 'key2': 'c'})
+        self.assertEqual(layers.source('/config1/param1/key2'), 'host')
+        self.assertEqual(layers.merged('site')['config1']['param1']['key2'],
+                         'b')
+
+        # values equal to the ones below the layer are dropped from it
+        layers.edit('host', {'config1': {'param1': {'key2': 'b'}},
+                             'config2': {'param1': 'x'}})
+        self.assertEqual(layers.layer('host'), {'config1': {'param2': [3]}})
+        self.assertEqual(layers.actual['config2'], {'param1': 'x'})
+        self.assertEqual(self.original['config1']['param1']['key2'], 'b')
+
+        # edits masked by the layers above
+        layers.edit('site', {'config1': {'param1': {'key1': 'z'}}})
+        self.assertEqual(layers.actual['config1']['param1']['key1'], 'user')
+
+    def test_sparse_lists(self):
+        layers = OverrideLayers(self.original, [
+            ('site', {'config1': {'param2': {'$list': True,
+                                             '$append': [3]}}}),
+            ('user', {'config1': {'param2': {'$list': True, '0': 'u'}}})],
+            sparse_lists=True)
+        self.assertEqual(layers.actual['config1']['param2'], ['u', 2, 3])
+        self.assertEqual(layers.source('/config1/param2/0'), 'user')
+        self.assertEqual(layers.source(('config1', 'param2', 1)), 'site')
+
+        # elements are addressed in the list the edited layer makes
+        layers.edit('site', {'config1': {'param2': {'$list': True, '2': 4}}})
+        self.assertEqual(layers.layer('site'), {
+            'config1': {'param2': {'$list': True, '$append': [4]}}})
+        layers.edit('user', {'config1': {'param2': {'$list': True, '0': 1}}})
+        self.assertEqual(layers.layer('user'), {})
+        self.assertEqual(layers.actual['config1']['param2'], [1, 2, 4])
+        self.assertEqual(layers.source('/config1/param2/0'), 'site')
+
+        # without sparse lists edited lists are stored whole
+        layers = self.layers()
+        layers.edit('host', {'config1': {'param2': {'$list': True, '0': 5}}})
+        self.assertEqual(layers.layer('host')['config1'], {'param2': [5]})
+
+    def test_set_layer_and_config(self):
+        layers = self.layers()
+        merges = layers.merges
+        layers.set_layer('user', {})
+        self.assertEqual(layers.merges - merges, 1)
+        self.assertEqual(layers.actual['config1']['param1']['key1'], 'site')
+
+        layers.set_config('config2', {'param1': 'z', 'param3': 1})
+        self.assertEqual(layers.actual['config2'],
+                         {'param1': 'y', 'param3': 1})
+        self.assertEqual(self.original['config2'], {'param1': 'x'})
+        layers.set_config('config2', None)
+        self.assertNotIn('config2', layers.actual)
+
+    def test_from_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, content in (('20-user', {'config2': {'param1': 'u'}}),
+                                  ('10-site', {'config2': {'param1': 's'}})):
+                with open(os.path.join(directory, f'{name}.json'), 'w') as f:
+                    json.dump(content, f)
+            open(os.path.join(directory, '30-empty.json'), 'w').close()
+            open(os.path.join(directory, 'notes.txt'), 'w').close()
+
+            layers = OverrideLayers.from_directory(self.original, directory)
+        self.assertEqual(layers.names, ['10-site', '20-user', '30-empty'])
+        self.assertEqual(layers.actual['config2'], {'param1': 'u'})
+        self.assertEqual(layers.source('/config2/param1'), '20-user')
+        with self.assertRaises(NotADirectoryError):
+            OverrideLayers.from_directory(self.original, directory)
+
+    def test_no_layers(self):
+        layers = OverrideLayers(self.original, [])
+        self.assertIs(layers.actual, self.original)
+        self.assertEqual(layers.source('/config2/param1'), None)
+
+    def test_deep_edit(self):
+        def nested(depth, leaf):
+            root = node = {}
+            for _ in range(depth):
+                node = node.setdefault('child', {})
+            node['leaf'] = leaf
+            return root
+
+        depth = 10_000
+        layers = OverrideLayers(Configs(config=nested(depth, 'x')),
+                                [('user', {})])
+        layers.edit('user', {'config': nested(depth, 'y')})
+        path = '/config' + '/child' * depth + '/leaf'
+        self.assertEqual(layers.actual.get_path(path), 'y')
+        self.assertEqual(layers.source(path), 'user')
+
+        layers.edit('user', {'config': nested(depth, 'x')})
+        self.assertEqual(layers.layer('user'), {})
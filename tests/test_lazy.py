@@ -0,0 +1,52 @@
+import unittest
+import json
+from copy import deepcopy
+from json_override_test_assignment import Configs, LazyDocument, LazyDict
+from tempfile import mkdtemp
+import shutil
+
+
+class TestLazyDocument(unittest.TestCase):
+    content = {'a': {'b': {'c': [1, 2.5, "x{]\"y"], 'd': None},
+                     'e': True, 'f': {}},
+               'g': "value", 'h': [], 'i': -12e3}
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.filename = f"{self.tmp_dir}/config1.json"
+        with open(self.filename, 'w') as f:
+            json.dump(self.content, f, indent=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_content(self):
+        root = LazyDocument(self.filename).root
+        self.assertIsInstance(root, LazyDict)
+        self.assertEqual(root, self.content)
+        self.assertEqual(json.loads(json.dumps(root)), self.content)
+        self.assertEqual(Configs(LazyDocument(self.filename).root),
+                         self.content)
+        self.assertEqual(deepcopy(root), self.content)
+
+    def test_override_and_diff(self):
+        original = Configs.from_config_dir(self.tmp_dir, lazy=True)
+        actual = Configs.override(original, {'config1': {'a': {'e': False}}})
+        overrides = Configs.diff(original, actual)
+        self.assertEqual(overrides, {'config1': {'a': {'e': False}}})
+
+        # Untouched subtrees are not parsed
+        untouched = dict.__getitem__(dict.__getitem__(actual['config1'], 'a'),
+                                     'b')
+        self.assertNotIsInstance(untouched, (dict, list))
+
+        Configs.patch(actual, original, overrides,
+                      {'config1': {'a': {'b': {'d': 1}}}}, verify=True)
+        self.assertEqual(overrides, {'config1': {'a': {'b': {'d': 1},
+                                                       'e': False}}})
+
+    def test_errors(self):
+        with open(self.filename, 'w') as f:
+            f.write('{"a": [1, 2}')
+        with self.assertRaises(json.JSONDecodeError):
+            LazyDocument(self.filename).root
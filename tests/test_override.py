@@ -1,10 +1,32 @@
 import unittest
 from copy import deepcopy
-from json_override_test_assignment import Configs
+from json_override_test_assignment import Configs, apply_json_patch
+from json_override_test_assignment._diff import equal
 from tempfile import mkdtemp
 import shutil
 
 
+def nested(depth: int, leaf) -> dict:
+    """Return dicts nested "depth" levels deep with a list on each level"""
+    root = node = {}
+    for i in range(depth - 1):
+        node['other'] = [i, i]
+        node = node.setdefault('child', {})
+    node['leaf'] = leaf
+    return root
+
+
+def nested_list(depth: int, leaf) -> list:
+    """Return lists nested "depth" levels deep"""
+    root = node = []
+    for i in range(depth - 1):
+        child = []
+        node.extend([i, child])
+        node = child
+    node.append(leaf)
+    return root
+
+
 class TestOverrideMethods(unittest.TestCase):
     def test_io(self):
         original = {'a': {'b': {'c': [1, 2, 3],
@@ -49,5 +71,293 @@ class TestOverrideMethods(unittest.TestCase):
                                       'c': [2, 92, 4],
                                       'd': {'e': 90}}})
 
+    def test_patch(self):
+        original = {'a': {'b': {'c': 1, 'd': 2},
+                          'e': [3, 4]},
+                    'f': 5}
+        actual = Configs.override(original, {'f': 50})
+        overrides = Configs.diff(original, actual)
+
+        Configs.patch(actual, original, overrides, {'a': {'b': {'c': 10}}},
+                      verify=True)
+        self.assertEqual(actual, {'a': {'b': {'c': 10, 'd': 2},
+                                        'e': [3, 4]},
+                                  'f': 50})
+        self.assertEqual(overrides, {'a': {'b': {'c': 10}}, 'f': 50})
+
+        Configs.patch(actual, original, overrides, {'a': {'e': [3, 40]}},
+                      verify=True)
+        self.assertEqual(overrides, {'a': {'b': {'c': 10}, 'e': [3, 40]},
+                                     'f': 50})
+
+        # reverting values to original removes them from overrides
+        Configs.patch(actual, original, overrides,
+                      {'a': {'b': {'c': 1}, 'e': [3, 4]}, 'f': 5},
+                      verify=True)
+        self.assertEqual(actual, original)
+        self.assertEqual(overrides, {})
+
+        # unknown keys are ignored the same way override() does
+        Configs.patch(actual, original, overrides, {'x': 1}, verify=True)
+        self.assertEqual(overrides, {})
+
+    def test_json_patch(self):
+        original = {'a': {'b': 1,
+                          'c': [2, 3, {'x': 4}],
+                          'd': {'e': 5, 'f/~g': [6, 7]}},
+                    'h': 8}
+        altered = deepcopy(original)
+        altered['a']['c'][2]['x'] = 40
+        altered['a']['c'].append(9)
+        altered['a']['d']['f/~g'] = [6]
+        altered['i'] = {'j': 10}
+        del altered['h']
+
+        patch = Configs.json_patch(original, altered)
+        self.assertEqual(sorted(patch, key=lambda o: o['path']), [
+            {'op': 'replace', 'path': '/a/c/2/x', 'value': 40},
+            {'op': 'add', 'path': '/a/c/3', 'value': 9},
+            {'op': 'remove', 'path': '/a/d/f~1~0g/1'},
+            {'op': 'remove', 'path': '/h'},
+            {'op': 'add', 'path': '/i', 'value': {'j': 10}}])
+        self.assertEqual(apply_json_patch(deepcopy(original), patch), altered)
+        self.assertEqual(Configs.json_patch(original, deepcopy(original)), [])
+
+        # equal values of other types are replaced, nested ones too
+        original = {'a': {'b': 1, 'c': [1, {'d': 0}]}, 'e': [[1.0]]}
+        altered = {'a': {'b': True, 'c': [1, {'d': 0.0}]}, 'e': [[1]]}
+        patch = Configs.json_patch(original, altered)
+        self.assertEqual(sorted(patch, key=lambda o: o['path']), [
+            {'op': 'replace', 'path': '/a/b', 'value': True},
+            {'op': 'replace', 'path': '/a/c/1/d', 'value': 0.0},
+            {'op': 'replace', 'path': '/e/0/0', 'value': 1}])
+        self.assertEqual([type(o['value']) for o in sorted(
+            patch, key=lambda o: o['path'])], [bool, float, int])
+
+    def test_paths(self):
+        configs = Configs.override({'a': {'b': {'c': 1, 'd~/': 2},
+                                          'e': [3, {'f': 4}]}},
+                                   {'a': {'b': {'c': 10}}})
+        self.assertEqual(configs.get_path('/a/b/c'), 10)
+        self.assertEqual(configs.get_path(('a', 'b', 'c')), 10)
+        self.assertEqual(configs.get_path('/a/b/d~0~1'), 2)
+        self.assertEqual(configs.get_path('/a/e/1/f'), 4)
+        self.assertEqual(configs.get_path(('a', 'e', 0)), 3)
+        self.assertIs(configs.get_path(''), configs)
+
+        for missing in ('/x', '/a/x', '/a/b/c/x', '/a/e/2', '/a/e/-1',
+                        '/a/e/x', ('a', 'e', 0, 'x')):
+            self.assertFalse(configs.has_path(missing))
+            self.assertIsNone(configs.get_path(missing, None))
+            with self.assertRaises(KeyError):
+                configs.get_path(missing)
+        self.assertTrue(configs.has_path('/a/e/1'))
+        with self.assertRaises(ValueError):
+            configs.get_path('a/b')
+
+        configs.set_path('/a/b/c', 20)
+        configs.set_path(('a', 'e', 0), 30)
+        self.assertEqual(configs['a']['b']['c'], 20)
+        self.assertEqual(configs['a']['e'][0], 30)
+        with self.assertRaises(KeyError):
+            configs.set_path('/a/x/y', 1)
+        with self.assertRaises(KeyError):
+            configs.set_path('/a/e/2', 1)
+
+        # paths follow replaced containers
+        configs.set_path('/a/e', [5, {'f': 6}])
+        self.assertEqual(configs.get_path('/a/e/1/f'), 6)
+        configs['a']['e'][1] = {'f': 7}
+        self.assertEqual(configs.get_path('/a/e/1/f'), 7)
+        configs.set_path('/a/e/1/f', 8)
+        self.assertEqual(configs['a']['e'][1], {'f': 8})
+        configs['a'] = {'b': [7]}
+        self.assertEqual(configs.get_path('/a/b/0'), 7)
+        self.assertFalse(configs.has_path('/a/e/1'))
+
+        original = Configs(deepcopy(configs))
+        overrides = Configs()
+        Configs.patch(configs, original, overrides, {'a': {'b': [8]}})
+        self.assertEqual(configs.get_path('/a/b/0'), 8)
+
+        copy = deepcopy(configs)
+        copy.set_path('/a/b/0', 9)
+        self.assertEqual(configs.get_path('/a/b/0'), 8)
+        self.assertEqual(copy.get_path('/a/b/0'), 9)
+
+    def test_from_path(self):
+        self.assertEqual(Configs.from_path('/a/b~1c', 1), {'a': {'b/c': 1}})
+        self.assertEqual(Configs.from_path(('a',), [1]), {'a': [1]})
+
+
+    def test_with_path(self):
+        configs = Configs({'a': {'b': {'c': [1, 2]}, 'd': {'e': 1}},
+                           'f': {'g': 2}})
+        snapshot = deepcopy(configs)
+        changed = configs.with_path('/a/b/c/1', 3)
+        self.assertEqual(changed['a']['b']['c'], [1, 3])
+        self.assertEqual(configs, snapshot)
+        # untouched subtrees are shared
+        self.assertIs(changed['f'], configs['f'])
+        self.assertIs(changed['a']['d'], configs['a']['d'])
+        self.assertIsNot(changed['a']['b'], configs['a']['b'])
+
+        self.assertEqual(changed.with_path(('a', 'h'), 1)['a']['h'], 1)
+        for path in ('', '/x/y', '/a/b/c/5', '/f/g/h'):
+            with self.assertRaises(KeyError):
+                configs.with_path(path, 1)
+
+    def test_override_shared(self):
+        original = Configs({'a': {'b': 1, 'c': {'d': 2}}, 'e': {'f': 3}})
+        snapshot = deepcopy(original)
+        actual = Configs.override(original, {'a': {'b': 5}, 'x': 1},
+                                  share=True)
+        self.assertEqual(actual, Configs.override(original,
+                                                  {'a': {'b': 5}, 'x': 1}))
+        self.assertEqual(original, snapshot)
+        self.assertIs(actual['e'], original['e'])
+        self.assertIs(actual['a']['c'], original['a']['c'])
+
+    def test_sparse_lists(self):
+        original = Configs({'a': {'l': list(range(10)),
+                                  'd': [{'b': 1}, {'b': 2}],
+                                  'n': [[1, 2], [3]]}})
+        snapshot = deepcopy(original)
+        cases = [([0, 1, 'x'] + list(range(3, 10)),
+                  {'$list': True, '2': 'x'}),
+                 (list(range(12)), {'$list': True, '$append': [10, 11]}),
+                 ([0, 1] + list(range(4, 10)),
+                  {'$list': True, '$remove': [2, 3]}),
+                 ([0, 'a', 'b'] + list(range(1, 10)),
+                  {'$list': True, '$insert': {'1': ['a', 'b']}}),
+                 ([9], [9])]
+        for altered, expected in cases:
+            actual = Configs.override(original, {})
+            actual['a']['l'] = altered
+            over = Configs.diff(original, actual, sparse_lists=True)
+            self.assertEqual(over, {'a': {'l': expected}})
+            self.assertEqual(Configs.override(original, over), actual)
+            self.assertEqual(Configs.override(original, over, share=True),
+                             actual)
+        self.assertEqual(original, snapshot)
+
+        # elements are overridden like values of dicts, unknown are skipped
+        over = {'a': {'d': {'$list': True, '1': {'b': 5}, '7': 1, 'x': 1},
+                      'n': {'$list': True, '0': {'$list': True,
+                                                 '$append': [9]}}}}
+        actual = Configs.override(original, over)
+        self.assertEqual(actual['a']['d'], [{'b': 1}, {'b': 5}])
+        self.assertEqual(actual['a']['n'], [[1, 2, 9], [3]])
+        self.assertEqual(Configs.diff(original, actual, sparse_lists=True),
+                         {'a': {'d': {'$list': True, '1': {'b': 5}},
+                                'n': {'$list': True,
+                                      '0': {'$list': True, '$append': [9]}}}})
+        # whole lists keep working
+        self.assertEqual(Configs.diff(original, actual)['a']['n'],
+                         [[1, 2, 9], [3]])
+
+        # dicts without the mark replace lists
+        actual = Configs.override(original, {})
+        actual['a']['l'] = {'a': 1}
+        actual['a']['n'] = {'0': 5}
+        for sparse in (False, True):
+            over = Configs.diff(original, actual, sparse_lists=sparse)
+            self.assertEqual(over, {'a': {'l': {'a': 1}, 'n': {'0': 5}}})
+            for share in (False, True):
+                self.assertEqual(Configs.override(original, over,
+                                                  share=share), actual)
+
+    def test_sparse_list_elements(self):
+        original = Configs({'a': {'l': [{'b': 1, 'c': [1]}, {'b': 2}, [1, 2],
+                                        'x', 3]}})
+        # overrides skip keys missing in dicts and can't replace dicts, so
+        # such lists are stored whole
+        cases = [(0, 'a', True), (0, [1], True), (0, {'b': 1}, True),
+                 (1, {'b': 2, 'new': 2}, True), (1, {}, True),
+                 (0, {'b': 1, 'c': {'x': 1}}, False),
+                 (0, {'b': 1, 'c': [{'x': 1}]}, False),
+                 (0, {'b': 5, 'c': [1]}, False), (2, {'x': 1}, False),
+                 (4, [1], False)]
+        for index, element, whole in cases:
+            actual = Configs.override(original, {})
+            actual['a']['l'][index] = element
+            over = Configs.diff(original, actual, sparse_lists=True)
+            self.assertEqual(isinstance(over['a']['l'], list), whole)
+            for share in (False, True):
+                self.assertEqual(Configs.override(original, over,
+                                                  share=share), actual)
+
+            restored, overrides = Configs.override(original, {}), Configs()
+            Configs.patch(restored, original, overrides,
+                          {'a': {'l': actual['a']['l']}}, verify=True,
+                          sparse_lists=True)
+            self.assertEqual(overrides, over)
+
+    def test_patch_sparse_lists(self):
+        original = Configs({'a': {'l': list(range(10)), 'b': 1}})
+        actual = Configs.override(original, {})
+        overrides = Configs()
+        lists = actual['a']['l']
+
+        sparse = {'$list': True}
+        for over, expected in (({**sparse, '1': 'x'}, {**sparse, '1': 'x'}),
+                               ({**sparse, '3': 'y'},
+                                {**sparse, '1': 'x', '3': 'y'}),
+                               ({**sparse, '1': 1}, {**sparse, '3': 'y'}),
+                               ({**sparse, '$append': [10]},
+                                {**sparse, '3': 'y', '$append': [10]}),
+                               ([0, 1, 2, 3, 4, 5, 6, 7],
+                                {**sparse, '$remove': [8, 9]}),
+                               # mostly changed lists are stored whole
+                               ([0, 1, 2, 3], [0, 1, 2, 3])):
+            Configs.patch(actual, original, overrides, {'a': {'l': over}},
+                          verify=True, sparse_lists=True)
+            self.assertEqual(overrides, {'a': {'l': expected}})
+            if over == {**sparse, '1': 1}:
+                # element overrides change the list in place
+                self.assertIs(actual['a']['l'], lists)
+        self.assertEqual(original['a']['l'], list(range(10)))
+
+        Configs.patch(actual, original, overrides,
+                      {'a': {'l': list(range(10))}}, verify=True,
+                      sparse_lists=True)
+        self.assertEqual(overrides, {})
+
+    def test_deep(self):
+        # note: deep values are compared with equal(), == and repr() recurse
+        for depth in (10, 1000, 100_000):
+            original = Configs(config=nested(depth, 'x'))
+            changed = Configs(config=nested(depth, 'y'))
+            expected = Configs.from_path(
+                ('config',) + ('child',) * (depth - 1) + ('leaf',), 'y')
+
+            over = Configs.diff(original, changed)
+            self.assertTrue(equal(over, expected))
+            self.assertTrue(equal(Configs.diff(original, changed,
+                                               sparse_lists=True), expected))
+            self.assertTrue(equal(Configs.override(original, over), changed))
+            self.assertTrue(equal(Configs.override(original, over,
+                                                   share=True), changed))
+
+            actual = Configs.override(original, {})
+            overrides = Configs()
+            Configs.patch(actual, original, overrides, over, verify=True)
+            self.assertTrue(equal(actual, changed))
+            self.assertTrue(equal(overrides, expected))
+            self.assertTrue(equal(original, {'config': nested(depth, 'x')}))
 
+            path = '/config' + '/child' * (depth - 1) + '/leaf'
+            self.assertEqual(Configs.json_patch(original, changed),
+                             [{'op': 'replace', 'path': path, 'value': 'y'}])
 
+    def test_deep_lists(self):
+        for depth in (10, 1000, 100_000):
+            original = Configs(config=nested_list(depth, 1))
+            changed = Configs(config=nested_list(depth, 2))
+            self.assertFalse(equal(original, changed))
+            for sparse in (False, True):
+                over = Configs.diff(original, changed, sparse_lists=sparse)
+                for share in (False, True):
+                    self.assertTrue(equal(
+                        Configs.override(original, over, share=share),
+                        changed))
@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+import time
+import unittest
+from tempfile import mkdtemp
+from unittest import mock
+from json_override_test_assignment import Configs, ConfigsLoadError, \
+    available_parsers, benchmark_parsers, parse_json, register_parser, \
+    select_parser, selected_parser
+from json_override_test_assignment import _parsers
+
+
+def strict_loads(data: bytes):
+    """Backend rejecting what RFC 8259 doesn't allow, the way orjson does"""
+    def reject(constant):
+        raise ValueError(constant)
+    return json.loads(data, parse_constant=reject)
+
+
+def lossy_loads(data: bytes):
+    """Backend turning all ints into floats"""
+    return json.loads(data, parse_int=float)
+
+
+class TestParsers(unittest.TestCase):
+    documents = [b'{"a": {"b": [1, -2.5e-3, "x\\"y", null, true]}, "c": {}}',
+                 b'{"a": NaN, "b": -Infinity}', b'[18446744073709551616]',
+                 b'["\\ud800"]', b'{"a": 1, "a": 2}']
+    invalid = [b'', b'{"a": [1, 2,]}', b'{"a": 1} x', b'{"a": "\xc3\xa9"}',
+               b'{"a": "\x01"}']
+
+    def setUp(self):
+        self.backends = dict(_parsers._backends)
+        self.selected = _parsers._selected
+        register_parser("strict", strict_loads)
+        self.tmp_dir = mkdtemp()
+
+    def tearDown(self):
+        _parsers._backends.clear()
+        _parsers._backends.update(self.backends)
+        _parsers._selected = self.selected
+        shutil.rmtree(self.tmp_dir)
+
+    def error(self, data: bytes, parser: str):
+        try:
+            parse_json(data, parser)
+        except Exception as error:
+            return type(error), str(error)
+        self.fail(f"{data!r} parsed by {parser}")
+
+    def test_identical(self):
+        self.assertIn("stdlib", available_parsers())
+        for parser in available_parsers():
+            for data in self.documents:
+                self.assertEqual(repr(parse_json(data, parser)),
+                                 repr(parse_json(data, "stdlib")))
+            for data in self.invalid:
+                self.assertEqual(self.error(data, parser),
+                                 self.error(data, "stdlib"))
+
+    def test_iterative(self):
+        # the parser of deep documents accepts and rejects the same
+        for data in self.documents + self.invalid[:3] + [
+                b'{"a" 1}', b'[1 2]', b'{1: 2}', b'[', b'-', b'[-Infinity]']:
+            text = data.decode()
+            try:
+                expected = repr(json.loads(text))
+            except json.JSONDecodeError as error:
+                expected = (error.msg, error.pos)
+            try:
+                actual = repr(_parsers._loads_iteratively(text))
+            except json.JSONDecodeError as error:
+                actual = (error.msg, error.pos)
+            self.assertEqual(actual, expected)
+
+        depth = 100_000
+        data = b'{"a": [1, ' * depth + b'2' + b']}' * depth
+        for parser in available_parsers():
+            value = parse_json(data, parser)
+            for _ in range(depth):
+                value = value['a'][1]
+            self.assertEqual(value, 2)
+
+    def test_long_numbers(self):
+        register_parser("lossy", lossy_loads)
+        self.assertEqual(parse_json(b'[1, 2]', "lossy"), [1.0, 2.0])
+        self.assertEqual(repr(parse_json(b'[1, 9223372036854775808]',
+                                         "lossy")),
+                         "[1, 9223372036854775808]")
+
+    def test_needs_stdlib(self):
+        for data, expected in ((b'[1, 12345678901234567890]', True),
+                               (b'[123456789012345678, 1234567890]', False),
+                               (b'[1.2345678901234567e-05, 1.5]', False),
+                               (b'{"a": "\xc3\xa9"}', True),
+                               (b'{"a": ' * 512 + b'1' + b'}' * 512, False),
+                               (b'[' * 513 + b']' * 513, True),
+                               (b'[{"a": "]]]"}, "[[[["]', False)):
+            self.assertEqual(_parsers._needs_stdlib(data), expected, data)
+
+    def test_select(self):
+        self.assertEqual(select_parser("strict"), "strict")
+        self.assertEqual(selected_parser(), "strict")
+        self.assertRaises(ValueError, select_parser, "missing")
+
+        # backends giving other results are never selected
+        register_parser("broken", lambda data: {})
+        times = benchmark_parsers(repeat=1)
+        self.assertEqual(set(times), set(available_parsers()) - {"broken"})
+        self.assertIn(select_parser(), times)
+        self.assertIn("stdlib", benchmark_parsers(b'[1]', repeat=1))
+        self.assertIn("stdlib", benchmark_parsers(b'[NaN]', repeat=1))
+
+        # checks of the data other backends need are timed too
+        with mock.patch.object(_parsers, '_needs_stdlib',
+                               side_effect=lambda data: time.sleep(0.01)):
+            times = benchmark_parsers(b'[1]', repeat=1)
+        self.assertLess(times["stdlib"], 0.01)
+        self.assertGreaterEqual(times["strict"], 0.01)
+
+        with mock.patch.dict(os.environ,
+                             {_parsers.PARSER_VARIABLE: "stdlib"}):
+            self.assertEqual(select_parser(), "stdlib")
+            # explicit selection is kept when backends are registered
+            register_parser("other", strict_loads)
+            self.assertEqual(selected_parser(), "stdlib")
+
+    def test_configs(self):
+        with open(f"{self.tmp_dir}/config1.json", 'w') as f:
+            json.dump({'a': {'b': [1, 2.5, None]}, 'c': 'x'}, f, indent=2)
+        with open(f"{self.tmp_dir}/config2.json", 'w') as f:
+            f.write('{"a": NaN}')
+        with open(f"{self.tmp_dir}/overrides.json", 'w') as f:
+            f.write('{"config1": {"c": "y"}}')
+
+        select_parser("stdlib")
+        expected = repr(Configs.from_config_dir(self.tmp_dir))
+        for parser in available_parsers():
+            select_parser(parser)
+            configs = Configs.from_config_dir(self.tmp_dir)
+            self.assertEqual(repr(configs), expected)
+            self.assertEqual(Configs.from_config_dir(self.tmp_dir, workers=2,
+                                                     processes=True)
+                             ["config1"], configs["config1"])
+            self.assertEqual(Configs.from_override_file(
+                f"{self.tmp_dir}/overrides.json"), {'config1': {'c': 'y'}})
+
+            with open(f"{self.tmp_dir}/config3.json", 'w') as f:
+                f.write('{"a": [1, }')
+            with self.assertRaises(ConfigsLoadError) as context:
+                Configs.from_config_dir(self.tmp_dir, workers=2)
+            self.assertEqual(str(context.exception),
+                             "Failed to load config files:\n"
+                             f"  {self.tmp_dir}/config3.json: Expecting "
+                             f"value: line 1 column 11 (char 10)")
+            os.remove(f"{self.tmp_dir}/config3.json")
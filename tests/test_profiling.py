@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import signal
+import threading
+import unittest
+from tempfile import mkdtemp
+from unittest import mock
+import shutil
+from json_override_test_assignment import Configs, Profiler, \
+    enable_profiling, disable_profiling, profiling_from_environment
+from json_override_test_assignment.tree import TreeItem
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        disable_profiling()
+
+    def test_enable(self):
+        override = Configs.__dict__['override']
+        profiler = enable_profiling(report_on_exit=False)
+        self.assertIsNot(Configs.__dict__['override'], override)
+
+        configs = Configs({'a': {'b': [1, {'c': 2}]}})
+        for _ in range(3):
+            Configs.override(configs, {'a': {'b': [3]}})
+        # nested calls of recursive functions are measured once
+        TreeItem.load(configs)
+        Configs.patch(Configs(configs), configs, Configs(),
+                      {'a': {'b': [4]}})
+
+        stats = profiler.stats()
+        self.assertEqual(stats['Configs.override']['calls'], 3)
+        self.assertEqual(stats['TreeItem.load']['calls'], 1)
+        self.assertEqual(stats['Configs.patch']['calls'], 1)
+        for key in ('total', 'mean', 'p50', 'p99', 'max'):
+            self.assertGreater(stats['Configs.override'][key], 0)
+        self.assertLessEqual(stats['Configs.override']['p99'],
+                             stats['Configs.override']['max'])
+        self.assertIn('Configs.override', profiler.report())
+
+        self.assertIs(disable_profiling(), profiler)
+        self.assertIs(Configs.__dict__['override'], override)
+        Configs.override(configs, {})
+        self.assertEqual(profiler.stats()['Configs.override']['calls'], 3)
+
+    def test_chrome_trace(self):
+        profiler = Profiler(trace=True, max_events=2)
+        function = profiler.wrap('f', lambda x: x * 2)
+        self.assertEqual([function(i) for i in range(3)], [0, 2, 4])
+        self.assertEqual(profiler.stats()['f']['calls'], 3)
+
+        events = profiler.chrome_trace()['traceEvents']
+        self.assertEqual(len(events), 2)
+        self.assertEqual({e['name'] for e in events}, {'f'})
+        self.assertEqual({e['ph'] for e in events}, {'X'})
+        self.assertLessEqual(events[0]['ts'], events[1]['ts'])
+
+        directory = mkdtemp()
+        try:
+            filename = os.path.join(directory, 'trace.json')
+            profiler.dump_trace(filename)
+            with open(filename) as f:
+                self.assertEqual(json.load(f)['traceEvents'], events)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_environment(self):
+        with mock.patch.dict(os.environ, {'JSON_OVERRIDE_PROFILE': '0'}):
+            self.assertIsNone(profiling_from_environment())
+        with mock.patch.dict(os.environ, {'JSON_OVERRIDE_PROFILE': '1'}), \
+                mock.patch('atexit.register') as register:
+            self.assertIsInstance(profiling_from_environment(), Profiler)
+            register.assert_called_once()
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR1'), "no SIGUSR1")
+    def test_signal(self):
+        profiler = enable_profiling()
+        Configs.override(Configs({'a': 1}), {'a': 2})
+        handler = signal.getsignal(signal.SIGUSR1)
+
+        # the signal may arrive while record() holds the lock
+        with mock.patch('sys.stderr', io.StringIO()) as stderr:
+            with profiler._Profiler__lock:
+                handler(signal.SIGUSR1, None)
+            for thread in threading.enumerate():
+                if thread.name == 'ProfilingReport':
+                    thread.join()
+        self.assertIn('Configs.override', stderr.getvalue())
+
+        disable_profiling()
+        self.assertEqual(signal.getsignal(signal.SIGUSR1), signal.SIG_DFL)
@@ -0,0 +1,86 @@
+import unittest
+from json_override_test_assignment import Configs, SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+    configs = Configs({'config1': {'param1': {'key1': ['Value1', 'value2'],
+                                              'key2': '1.5'},
+                                   'param2': 'hello'},
+                       'config2': {'param1': 'x'}})
+
+    def test_search(self):
+        index = SearchIndex.build(self.configs)
+        self.assertEqual(len(index), 9)
+        self.assertEqual(index.search('PARAM1'),
+                         {('config1', 'param1'), ('config2', 'param1')})
+        self.assertEqual(index.search('v'),
+                         {('config1', 'param1', 'key1', 0),
+                          ('config1', 'param1', 'key1', 1)})
+        self.assertEqual(index.search('alue2'),
+                         {('config1', 'param1', 'key1', 1)})
+        self.assertEqual(index.search('1.5'), {('config1', 'param1', 'key2')})
+        self.assertEqual(index.search('nothing'), set())
+        self.assertEqual(index.search(''), set())
+
+    def test_prefix(self):
+        index = SearchIndex.build(self.configs)
+        self.assertEqual(index.search('hel', prefix=True),
+                         {('config1', 'param2')})
+        self.assertEqual(index.search('ello', prefix=True), set())
+        self.assertEqual(index.search('config1.p', prefix=True),
+                         {('config1', 'param1'), ('config1', 'param2')})
+        self.assertEqual(index.search('onfig1.p', prefix=True), set())
+
+    def test_paths(self):
+        index = SearchIndex.build(self.configs)
+        # only the topmost matching nodes are returned
+        self.assertEqual(index.search('g1.param1'), {('config1', 'param1')})
+        self.assertEqual(index.search('param1.k'),
+                         {('config1', 'param1', 'key1'),
+                          ('config1', 'param1', 'key2')})
+        self.assertEqual(index.search('config1.param1.key1.1'),
+                         {('config1', 'param1', 'key1', 1)})
+
+    def test_list_paths(self):
+        index = SearchIndex.build(Configs({'c': {'p': [
+            {'deep': 1}, {'deep': 2, 'l': [[{'y': 3}]]}]}}))
+        self.assertEqual(index.search('p.1.deep'), {('c', 'p', 1, 'deep')})
+        self.assertEqual(index.search('1.deep'), {('c', 'p', 1, 'deep')})
+        self.assertEqual(index.search('.deep'), {('c', 'p', 0, 'deep'),
+                                                 ('c', 'p', 1, 'deep')})
+        self.assertEqual(index.search('l.0.0.y'),
+                         {('c', 'p', 1, 'l', 0, 0, 'y')})
+        self.assertEqual(index.search('c.p.1.d', prefix=True),
+                         {('c', 'p', 1, 'deep')})
+        self.assertEqual(index.search('p.2.deep'), set())
+
+        index.remove(('c', 'p', 1))
+        self.assertEqual(index.search('p.1.deep'), set())
+        index.add(('c', 'p', 1), {'deep': 5})
+        self.assertEqual(index.search('p.1.deep'), {('c', 'p', 1, 'deep')})
+
+    def test_update(self):
+        index = SearchIndex.build(self.configs)
+        index.set_value(('config1', 'param2'), 'world')
+        self.assertEqual(index.search('hello'), set())
+        self.assertEqual(index.search('wor'), {('config1', 'param2')})
+
+        index.remove(('config1', 'param1'))
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.search('value'), set())
+        self.assertEqual(index.search('param1'), {('config2', 'param1')})
+
+        index.add(('config1', 'param1'), {'z': 'value'})
+        self.assertEqual(index.search('value'), {('config1', 'param1', 'z')})
+
+        # the same nodes are found as after building from scratch
+        changed = Configs({'config1': {'param1': {'z': 'value'},
+                                       'param2': 'world'},
+                           'config2': {'param1': 'x'}})
+        reference = SearchIndex.build(changed)
+        for text in ('p', 'value', 'wor', 'config', 'x', 'config1.param1.'):
+            self.assertEqual(index.search(text), reference.search(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import unittest
+from tempfile import mkdtemp
+from json_override_test_assignment import Configs, LazyDocument, \
+    encode_json, iterencode_json
+from json_override_test_assignment import _serialize
+
+
+class TestSerialize(unittest.TestCase):
+    values = [{}, [], None, 'x', 1.5,
+              {'a': {}, 'b': [], 'c': [{}], 'd': {'e': [1, [2, []]]}},
+              {'z': [None, True, -0.0, 1e16, 1e-07, 2 ** 70, 'ü"\n'],
+               'a': {'q': {'w': 'x'}, 'b': [[1], {'k': [1, {}]}]}}]
+
+    def test_compatible(self):
+        for value in self.values:
+            for sort_keys in (False, True):
+                self.assertEqual(
+                    encode_json(value, sort_keys=sort_keys, compatible=True),
+                    json.dumps(value, indent=2, sort_keys=sort_keys))
+                self.assertEqual(
+                    encode_json(value, compact=True, sort_keys=sort_keys,
+                                compatible=True),
+                    json.dumps(value, separators=(',', ':'),
+                               sort_keys=sort_keys))
+
+        # keys are converted the way json.dumps() does it
+        value = {1: {'x': 1}, 2.5: [1], True: {'y': float('nan')}, None: []}
+        self.assertEqual(encode_json(value, compatible=True),
+                         json.dumps(value, indent=2))
+
+    def test_fast(self):
+        for value in self.values:
+            for compact in (False, True):
+                text = encode_json(value, compact=compact, sort_keys=True)
+                self.assertTrue(text.isascii())
+                self.assertEqual(json.loads(text), value)
+        self.assertEqual(encode_json({'b': [1], 'a': 1}, sort_keys=True),
+                         '{\n  "a": 1,\n  "b": [\n    1\n  ]\n}')
+
+    def test_errors(self):
+        cycle = []
+        cycle.append(cycle)
+        for compatible in (False, True):
+            self.assertRaises(ValueError, encode_json, {'a': [cycle]},
+                              compatible=compatible)
+            self.assertRaises(TypeError, encode_json, {'a': [object(), []]},
+                              compatible=compatible)
+            self.assertRaises(TypeError, encode_json, {'a': {(1,): []}},
+                              compatible=compatible)
+
+    def test_chunks(self):
+        value = {f'config{i}': {'list': [{'a': i}, [i]]} for i in range(5000)}
+        chunks = list(_serialize._iterencode_pretty(value, False))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), json.dumps(value, indent=2))
+
+        # deeper than the recursion limit
+        depth = 2000
+        deep = leaf = []
+        for _ in range(depth):
+            leaf.append([])
+            leaf = leaf[0]
+        expected = ''.join(f'[\n{"  " * (i + 1)}' for i in range(depth)) + \
+            '[]' + ''.join(f'\n{"  " * i}]' for i in reversed(range(depth)))
+        self.assertEqual(''.join(iterencode_json(deep, compatible=True)),
+                         expected)
+
+    def test_dump(self):
+        directory = mkdtemp()
+        try:
+            configs = Configs({'b': {'x': [1, 2], 'y': {}}, 'a': 'ü'})
+            filename = os.path.join(directory, 'config.json')
+            configs.dump(filename, sort_keys=True, compatible=True)
+            with open(filename, encoding='ascii') as f:
+                text = f.read()
+            self.assertEqual(text, json.dumps(configs, indent=2,
+                                              sort_keys=True) + '\n')
+            self.assertEqual(text, configs.dumps(sort_keys=True,
+                                                 compatible=True))
+
+            configs.dump(filename)
+            self.assertEqual(Configs.read_config(filename), configs)
+
+            # values of lazy documents are parsed as they're encoded
+            root = LazyDocument(filename).root
+            self.assertEqual(encode_json(root), json.dumps(configs, indent=2))
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import unittest
+from tempfile import mkdtemp
+from json_override_test_assignment import Configs, ConfigsSnapshot, \
+    compile_snapshot, write_snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    configs = Configs({'config1': {'a/b': 1, 'a!': 'x', 'a': {'b': -5},
+                                   'x~y': [True, None, 1.5, 2 ** 70, 'ü',
+                                           *range(12)],
+                                   'e': {}, 'l': []},
+                       'config2': {'z': 'x'}})
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.filename = os.path.join(self.directory, 'configs.snap')
+        write_snapshot(self.configs, self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get(self):
+        with ConfigsSnapshot(self.filename) as snapshot:
+            self.assertEqual(len(snapshot), 28)
+            self.assertEqual(snapshot.get(''), self.configs)
+            self.assertEqual(snapshot.get('/config1/a~1b'), 1)
+            self.assertEqual(snapshot.get('/config1/a'), {'b': -5})
+            self.assertEqual(snapshot.get(('config1', 'x~y', 3)), 2 ** 70)
+            self.assertEqual(snapshot.get(['config1', 'x~y']),
+                             self.configs['config1']['x~y'])
+            self.assertEqual(snapshot.get('/config1/e'), {})
+            self.assertEqual(snapshot.get('/config1/l'), [])
+            self.assertIn('/config2/z', snapshot)
+            self.assertNotIn('/config2/y', snapshot)
+            self.assertIsNone(snapshot.get('/config3', None))
+            with self.assertRaises(KeyError):
+                snapshot.get('/config1/a/c')
+            with self.assertRaises(ValueError):
+                snapshot.get('config1')
+            self.assertEqual(snapshot.keys('/config1'),
+                             ['a', 'a!', 'a/b', 'e', 'l', 'x~y'])
+            self.assertEqual(snapshot.keys(), ['config1', 'config2'])
+            with self.assertRaises(KeyError):
+                snapshot.keys('/config3')
+            self.assertEqual(snapshot.keys('/config1/e'), [])
+            self.assertEqual(snapshot.keys(('config1', 'l')), [])
+            with self.assertRaises(KeyError):
+                snapshot.keys('/config1/f')
+
+    def test_empty_keys(self):
+        write_snapshot({'a': {}, '0': {}, '1': [], 'b': {'c': 1}},
+                       self.filename)
+        with ConfigsSnapshot(self.filename) as snapshot:
+            self.assertEqual(snapshot.keys('/a'), [])
+            self.assertEqual(snapshot.keys('/0'), [])
+            self.assertEqual(snapshot.keys(['1']), [])
+            self.assertEqual(snapshot.keys('/b'), ['c'])
+            with self.assertRaises(KeyError):
+                snapshot.keys('/2')
+
+    def test_interned(self):
+        data = compile_snapshot({'a': {'b': 'repeated value'},
+                                 'c': {'b': 'repeated value'}})
+        self.assertEqual(data.count(b'repeated value'), 1)
+
+    def test_invalid(self):
+        with open(self.filename, 'wb') as f:
+            f.write(b'{"config1": {}}' + bytes(32))
+        with self.assertRaises(ValueError):
+            ConfigsSnapshot(self.filename)
+        with self.assertRaises(TypeError):
+            compile_snapshot({'a': {1, 2}})
@@ -0,0 +1,84 @@
+import unittest
+from json_override_test_assignment import Configs
+from json_override_test_assignment.tree import TreeItem, TreeStore
+
+
+def dump_items(item: TreeItem):
+    """Return nested (key, value, type, children) tuples of built items"""
+    return [(child.key, child.value, child.value_type, dump_items(child))
+            for child in (item.child(i) for i in range(item.child_count()))]
+
+
+class TestTreeItem(unittest.TestCase):
+    configs = Configs({'config2': {'b': [1, 2, {'c': 3}], 'a': 'x'},
+                       'config1': {'d': {'e': 4}}})
+
+    def test_lazy_matches_eager(self):
+        eager = TreeItem.load(self.configs)
+        lazy = TreeItem.load(self.configs, lazy=True)
+
+        self.assertEqual(lazy.child_count(), 0)
+        self.assertEqual(lazy.total_count(), 2)
+
+        # fetch everything in batches of one item
+        stack = [lazy]
+        while stack:
+            item = stack.pop()
+            while item.can_fetch_more():
+                self.assertEqual(item.fetch_more(1), 1)
+            stack.extend(item.child(i) for i in range(item.child_count()))
+
+        self.assertEqual(dump_items(lazy), dump_items(eager))
+
+    def test_child_values(self):
+        root = TreeItem.load(self.configs, lazy=True)
+        root.fetch_more(2)
+        items = root.child(1)
+        items.fetch_more(2)
+        lst = items.child(1)
+        lst.fetch_more(1)
+        self.assertEqual(lst.child_count(), 1)
+        self.assertEqual(lst.child_values(), [1, 2, ""])
+        self.assertEqual(lst.child_count(), 1)
+
+    def test_path(self):
+        root = TreeItem.load(self.configs)
+        item = root.child(1).child(1).child(2).child(0)
+        self.assertEqual(item.path(), ('config2', 'b', 2, 'c'))
+        self.assertEqual(self.configs.get_path(item.path()), item.value)
+        self.assertEqual(root.path(), ())
+
+    def test_store_matches_items(self):
+        root = TreeItem.load(self.configs)
+        root.value_type = type(self.configs)
+        store = TreeStore.load(self.configs)
+        self.assertEqual(len(store), 11)
+
+        stack = [(root, 0)]
+        while stack:
+            item, node = stack.pop()
+            for name in ("key", "value", "type", "is_leaf"):
+                self.assertEqual(item.get_field(name),
+                                 store.get_field(node, name))
+            self.assertEqual(item.child_count(), store.child_count(node))
+            for row in range(item.child_count()):
+                child = store.child(node, row)
+                self.assertEqual(store.parent(child), node)
+                self.assertEqual(store.row(child), row)
+                stack.append((item.child(row), child))
+
+        node = store.child(store.child(store.child(0, 1), 1), 2)
+        self.assertEqual(store.path(node), ('config2', 'b', 2))
+
+    def test_deep(self):
+        for depth in (10, 1000, 100_000):
+            root = node = {}
+            for _ in range(depth - 1):
+                node = node.setdefault('a', {'b': [1]})
+            node['a'] = 'x'
+
+            item = TreeItem.load(Configs(config=root))
+            for _ in range(depth + 1):
+                item = item.child(0)
+            self.assertEqual(item.value, 'x')
+            self.assertEqual(item.path(), ('config',) + ('a',) * depth)
@@ -0,0 +1,367 @@
+import unittest
+from json_override_test_assignment import Configs, OverrideLayers, \
+    SearchIndex
+
+try:
+    from PySide2.QtCore import QModelIndex, QPersistentModelIndex, Qt
+except ImportError:
+    raise unittest.SkipTest("PySide2 is not installed")
+
+from json_override_test_assignment.tree import TreeModel, \
+    ColumnarTreeModel, SearchFilterModel
+from json_override_test_assignment._diff import equal
+from json_override_test_assignment._loader import ConfigsLoader
+from tempfile import mkdtemp
+import shutil
+import json
+
+
+def dump_model(model: TreeModel, parent=QModelIndex()):
+    """Return nested (key, value, children) tuples of the model rows"""
+    while model.canFetchMore(parent):
+        model.fetchMore(parent)
+    rows = []
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        rows.append((model.data(index, Qt.DisplayRole),
+                     model.data(model.index(row, 1, parent), Qt.DisplayRole),
+                     dump_model(model, index)))
+    return rows
+
+
+class TestTreeModel(unittest.TestCase):
+    original = Configs({'config1': {'a': 1, 'b': [1, 2, 3], 'd': {'x': 1}},
+                        'config2': {'e': 'value'}})
+    changed = Configs({'config0': {'z': [1]},
+                       'config1': {'a': 2, 'b': [1, 5], 'c': {'y': 2},
+                                   'd': 3}})
+
+    def test_update(self):
+        for lazy in (False, True):
+            model = TreeModel(lazy=lazy, batch_size=1)
+            model.load(self.original)
+            dump_model(model)
+
+            signals = []
+            model.modelReset.connect(lambda: signals.append("reset"))
+            model.rowsInserted.connect(lambda *a: signals.append("insert"))
+            model.rowsRemoved.connect(lambda *a: signals.append("remove"))
+            model.dataChanged.connect(lambda *a: signals.append("change"))
+            model.update(self.changed)
+
+            reference = TreeModel()
+            reference.load(self.changed)
+            self.assertEqual(dump_model(model), dump_model(reference))
+            self.assertNotIn("reset", signals)
+            self.assertIn("change", signals)
+
+    def test_update_keys(self):
+        model = TreeModel()
+        model.load(self.original)
+        model.update(Configs({'config1': self.original['config1'],
+                              'config2': {'e': 'new'}}), keys=('config1',))
+        index = model.index(0, 0, model.index(1, 0))
+        self.assertEqual(model.data(index.sibling(0, 1), Qt.DisplayRole),
+                         'value')
+
+    def test_columnar_update(self):
+        model = ColumnarTreeModel(search=True)
+        model.load(self.original)
+        signals = []
+        model.modelReset.connect(lambda: signals.append("reset"))
+        model.layoutChanged.connect(lambda *a: signals.append("layout"))
+        model.dataChanged.connect(lambda *a: signals.append("change"))
+
+        leaves = Configs({'config1': {'a': 2, 'b': [1, 2, 3],
+                                      'd': {'x': 1}},
+                          'config2': {'e': 'new'}})
+        model.update(leaves)
+        self.assertEqual(signals, ["change", "change"])
+        reference = TreeModel()
+        reference.load(leaves)
+        self.assertEqual(dump_model(model), dump_model(reference))
+
+        signals.clear()
+        selected = QPersistentModelIndex(model.index_of(('config1', 'b'), 1))
+        model.update(self.changed)
+        self.assertEqual(signals, ["layout"])
+        self.assertEqual(model.path(selected), ('config1', 'b'))
+        self.assertEqual(selected.column(), 1)
+        reference.load(self.changed)
+        self.assertEqual(dump_model(model), dump_model(reference))
+        self.assertEqual(model.search_index.search('y'),
+                         {('config1', 'c', 'y')})
+
+    def test_add_items(self):
+        for lazy in (False, True):
+            model = TreeModel(lazy=lazy, batch_size=1)
+            model.load(Configs())
+            model.add_items(model.make_items(
+                Configs({'config2': self.original['config2']})))
+            model.add_items(model.make_items(
+                Configs({'config1': self.original['config1']})))
+
+            reference = TreeModel()
+            reference.load(self.original)
+            self.assertEqual(dump_model(model), dump_model(reference))
+
+    def test_loader(self):
+        tmp_dir = mkdtemp()
+        try:
+            for name, value in self.original.items():
+                with open(f"{tmp_dir}/{name}.json", 'w') as f:
+                    json.dump(value, f)
+
+            for lazy in (False, True):
+                model = TreeModel(lazy=lazy)
+                model.load(Configs())
+                overrides = {'config1': {'a': 2, 'd': {'x': 1}}}
+                loader = ConfigsLoader(tmp_dir, overrides, model.make_items,
+                                       chunk_size=1)
+                chunks, progress = [], []
+                loader.chunkLoaded.connect(lambda *a: chunks.append(a))
+                loader.progress.connect(lambda *a: progress.append(a))
+                loader.run()
+
+                self.assertEqual(len(chunks), 2)
+                self.assertEqual(progress, [(0, 2), (1, 2), (2, 2)])
+                original, actual, delta = Configs(), Configs(), Configs()
+                for chunk in chunks:
+                    # configs are updated before items are added, as the
+                    # application does
+                    original.update(chunk[0])
+                    actual.update(chunk[1])
+                    delta.update(chunk[2])
+                    model.add_items(chunk[3])
+                self.assertEqual(original, self.original)
+                self.assertEqual(actual,
+                                 Configs.override(original, overrides))
+                self.assertEqual(delta, {'config1': {'a': 2}})
+
+                reference = TreeModel()
+                reference.load(actual)
+                self.assertEqual(dump_model(model), dump_model(reference))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_search(self):
+        for model in (TreeModel(lazy=True, search=True),
+                      ColumnarTreeModel(search=True)):
+            model.load(self.original)
+            dump_model(model)
+            self.assertEqual(model.search_index.search('value'),
+                             {('config2', 'e')})
+
+            # edits are indexed
+            index = model.index(0, 0, model.index(0, 0))
+            self.assertEqual(model.path(index), ('config1', 'a'))
+            model.setData(index.sibling(0, 1), 'found', Qt.EditRole)
+            self.assertEqual(model.search_index.search('found'),
+                             {('config1', 'a')})
+
+            proxy = SearchFilterModel()
+            proxy.setSourceModel(model)
+            proxy.set_query('found')
+            self.assertEqual(proxy.matches, {('config1', 'a')})
+            accepted = [model.path(model.index(row, 0, parent))
+                        for parent in (QModelIndex(), model.index(0, 0))
+                        for row in range(model.rowCount(parent))
+                        if proxy.filterAcceptsRow(row, parent)]
+            self.assertEqual(accepted, [('config1',), ('config1', 'a')])
+
+            # descendants of matches are shown too
+            proxy.set_query('config1.d')
+            parent = model.index(2, 0, model.index(0, 0))
+            self.assertTrue(proxy.filterAcceptsRow(0, parent))
+            proxy.set_query('')
+            self.assertTrue(proxy.filterAcceptsRow(1, QModelIndex()))
+
+    def test_search_update(self):
+        model = TreeModel(search=True)
+        model.load(self.original)
+        model.update(self.changed, keys=('config0', 'config1', 'config2'))
+        for text in ('z', 'y', 'value', 'config', 'd'):
+            self.assertEqual(model.search_index.search(text),
+                             SearchIndex.build(self.changed).search(text))
+
+    def test_override_from_path(self):
+        for model in (TreeModel(), ColumnarTreeModel()):
+            model.load(self.original)
+            overrides = []
+            model.newOverride.connect(overrides.append)
+
+            config1 = model.index(0, 0)
+            model.setData(model.index(0, 1, model.index(2, 0, config1)), 'x',
+                          Qt.EditRole)
+            model.setData(model.index(1, 1, model.index(1, 0, config1)), '9',
+                          Qt.EditRole)
+            self.assertEqual(overrides, [{'config1': {'d': {'x': 'x'}}},
+                                         {'config1': {'b': [1, '9', 3]}}])
+
+    def test_deep_override(self):
+        depth = 1000
+        root = node = {}
+        for _ in range(depth - 1):
+            node = node.setdefault('a', {})
+        node['a'] = 1
+        for model in (TreeModel(), ColumnarTreeModel()):
+            model.load(Configs(config=root))
+            overrides = []
+            model.newOverride.connect(overrides.append)
+
+            index = model.index(0, 0)
+            for _ in range(depth - 1):
+                index = model.index(0, 0, index)
+            model.setData(model.index(0, 1, index), '2', Qt.EditRole)
+            self.assertEqual(len(overrides), 1)
+            self.assertTrue(equal(overrides[0], Configs.from_path(
+                ('config',) + ('a',) * depth, '2')))
+
+    def test_sparse_override(self):
+        for model in (TreeModel(sparse_lists=True),
+                      ColumnarTreeModel(sparse_lists=True)):
+            model.load(self.original)
+            overrides = []
+            model.newOverride.connect(overrides.append)
+
+            config1 = model.index(0, 0)
+            model.setData(model.index(1, 1, model.index(1, 0, config1)), '9',
+                          Qt.EditRole)
+            self.assertEqual(overrides, [{'config1': {'b': {'$list': True,
+                                                            '1': '9'}}}])
+
+    def test_value_source(self):
+        layers = OverrideLayers(self.original,
+                                [('user', {'config1': {'b': [4]}})])
+        for model in (TreeModel(), ColumnarTreeModel()):
+            model.load(layers.actual)
+            config1 = model.index(0, 0)
+            self.assertIsNone(model.data(model.index(0, 1, config1),
+                                         Qt.ToolTipRole))
+            model.set_value_source(layers.source)
+            self.assertEqual(model.data(model.index(0, 1, config1),
+                                        Qt.ToolTipRole), 'Original config')
+            b = model.index(1, 0, config1)
+            self.assertEqual(model.data(model.index(0, 1, b),
+                                        Qt.ToolTipRole), 'Layer "user"')
+            self.assertIsNone(model.data(b, Qt.ToolTipRole))
+
+    def test_undo_redo(self):
+        for model in (TreeModel(), ColumnarTreeModel(),
+                      TreeModel(lazy=True, batch_size=1)):
+            model.load(self.original)
+            overrides = []
+            model.newOverride.connect(overrides.append)
+            actual, stored = Configs.override(self.original, {}), Configs()
+            model.newOverride.connect(lambda over: Configs.patch(
+                actual, self.original, stored, over, verify=True))
+            self.assertFalse(model.undo())
+
+            value = model.index_of(('config1', 'd', 'x'), 1)
+            model.setData(value, '5', Qt.EditRole)
+            model.setData(model.index_of(('config1', 'b', 2), 1), '7',
+                          Qt.EditRole)
+            model.setData(value, '6', Qt.EditRole)
+            self.assertEqual(len(model.history), 3)
+
+            self.assertTrue(model.undo())
+            self.assertTrue(model.undo())
+            self.assertEqual(model.data(value, Qt.DisplayRole), '5')
+            self.assertEqual(overrides[-1], {'config1': {'b': [1, 2, 3]}})
+            self.assertTrue(model.redo())
+            self.assertEqual(overrides[-1], {'config1': {'b': [1, 2, '7']}})
+            self.assertTrue(model.undo())
+            self.assertTrue(model.undo())
+            self.assertFalse(model.undo())
+            self.assertEqual(overrides[-1], {'config1': {'d': {'x': 1}}})
+            self.assertEqual(len(overrides), 8)
+            # undone edits leave no overrides of original values behind
+            self.assertEqual(stored, {})
+            self.assertEqual(actual, self.original)
+
+            # a new edit discards undone steps
+            model.setData(value, '8', Qt.EditRole)
+            self.assertFalse(model.history.can_redo)
+            self.assertFalse(model.index_of(('config1', 'missing')).isValid())
+
+    def test_transaction(self):
+        for model in (TreeModel(), ColumnarTreeModel(),
+                      TreeModel(lazy=True, batch_size=1)):
+            model.load(self.original)
+            overrides, changed = [], []
+            model.newOverride.connect(overrides.append)
+            model.dataChanged.connect(
+                lambda first, last: changed.append(
+                    (model.path(first), model.path(last))))
+
+            with model.transaction():
+                model.setData(model.index_of(('config1', 'a'), 1), '5',
+                              Qt.EditRole)
+                with model.transaction():
+                    model.setData(model.index_of(('config1', 'b', 0), 1),
+                                  '7', Qt.EditRole)
+                model.setData(model.index_of(('config1', 'b', 2), 1), '9',
+                              Qt.EditRole)
+                self.assertEqual(overrides, [])
+            self.assertEqual(overrides, [{'config1': {'a': '5',
+                                                      'b': ['7', 2, '9']}}])
+            self.assertIn((('config1', 'b', 0), ('config1', 'b', 2)),
+                          changed)
+            self.assertEqual(len(model.history), 1)
+            model.undo()
+            self.assertEqual(overrides[-1], {'config1': {'a': 1,
+                                                         'b': [1, 2, 3]}})
+
+            with self.assertRaises(RuntimeError):
+                with model.transaction():
+                    model.setData(model.index_of(('config2', 'e'), 1), 'x',
+                                  Qt.EditRole)
+                    raise RuntimeError
+            self.assertEqual(len(overrides), 2)
+            self.assertEqual(model.data(model.index_of(('config2', 'e'), 1),
+                                        Qt.DisplayRole), 'value')
+
+            # a failed inner transaction doesn't abort the outer one
+            with model.transaction():
+                model.setData(model.index_of(('config1', 'a'), 1), '6',
+                              Qt.EditRole)
+                with self.assertRaises(RuntimeError):
+                    with model.transaction():
+                        model.setData(model.index_of(('config2', 'e'), 1),
+                                      'y', Qt.EditRole)
+                        raise RuntimeError
+                model.setData(model.index_of(('config1', 'b', 1), 1), '8',
+                              Qt.EditRole)
+            self.assertEqual(overrides[-1], {'config1': {'a': '6',
+                                                         'b': [1, '8', 3]}})
+            self.assertEqual(model.data(model.index_of(('config2', 'e'), 1),
+                                        Qt.DisplayRole), 'value')
+            model.undo()
+            self.assertEqual(model.data(model.index_of(('config1', 'a'), 1),
+                                        Qt.DisplayRole), 1)
+
+    def test_replace_all(self):
+        for model in (TreeModel(), ColumnarTreeModel(search=True),
+                      TreeModel(lazy=True, batch_size=1)):
+            model.load(Configs({'config1': {'a': 'one two', 'b': ['one'],
+                                            'c': {'one': 'x'}},
+                                'config2': {'d': 'none'}}))
+            overrides = []
+            model.newOverride.connect(overrides.append)
+            self.assertEqual(model.replace_all('one', '1'), 3)
+            self.assertEqual(overrides, [{'config1': {'a': '1 two',
+                                                      'b': ['1']},
+                                          'config2': {'d': 'n1'}}])
+            self.assertEqual(model.replace_all('missing', ''), 0)
+            self.assertEqual(len(overrides), 1)
+
+            indexes = [model.index_of(('config1', 'a'), 1),
+                       model.index_of(('config1', 'c'), 1)]
+            self.assertEqual(model.set_values(zip(indexes, 'pq')), 1)
+
+            # queries of dots only aren't narrowed down by the search index
+            model.load(Configs({'config1': {'a': '1.5', 'b': 'x..y'}}))
+            self.assertEqual(model.replace_all('..', '.'), 1)
+            self.assertEqual(model.replace_all('.', ','), 2)
+            self.assertEqual(overrides[-1], {'config1': {'a': '1,5',
+                                                         'b': 'x,y'}})
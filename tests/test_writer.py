@@ -0,0 +1,105 @@
+import unittest
+import json
+import os
+from unittest import mock
+from json_override_test_assignment import Configs, OverridesWriter, \
+    atomic_write, write_snapshot
+from tempfile import mkdtemp
+import shutil
+
+
+class TestOverridesWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.filename = f"{self.tmp_dir}/overrides.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_coalescing(self):
+        writer = OverridesWriter(self.filename, window=0.5)
+        configs = Configs()
+        for i in range(10):
+            with writer.lock:
+                configs['a'] = i
+            writer.submit(configs)
+        writer.flush()
+
+        stats = writer.stats()
+        self.assertEqual(stats["submits"], 10)
+        self.assertEqual(stats["writes"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        with open(self.filename) as f:
+            self.assertEqual(json.load(f), {'a': 9})
+        writer.close()
+
+    def test_close_flushes(self):
+        writer = OverridesWriter(self.filename, window=60)
+        writer.submit(Configs({'a': {'b': 1}}))
+        writer.close()
+        self.assertEqual(Configs.from_override_file(self.filename),
+                         {'a': {'b': 1}})
+        self.assertRaises(RuntimeError, writer.submit, Configs())
+
+    def test_failed_write(self):
+        errors = []
+        writer = OverridesWriter(self.filename, window=0,
+                                 on_error=errors.append)
+        with mock.patch('json_override_test_assignment._writer.atomic_write',
+                        side_effect=OSError("disk full")):
+            with self.assertLogs('json_override_test_assignment._writer',
+                                 'ERROR'):
+                writer.submit(Configs({'a': 1}))
+                with self.assertRaises(OSError):
+                    writer.flush()
+        self.assertEqual([str(error) for error in errors], ["disk full"])
+        stats = writer.stats()
+        self.assertEqual(stats["writes"], 0)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["last_error"], "disk full")
+
+        # a later successful write supersedes the failed one
+        writer.submit(Configs({'a': 2}))
+        writer.close()
+        self.assertEqual(writer.stats()["writes"], 1)
+        self.assertEqual(Configs.from_override_file(self.filename), {'a': 2})
+
+    def test_non_finite_round_trip(self):
+        original = Configs({'a': {'x': 1.5, 'y': [1, 2]}, 'b': None})
+        changed = Configs({'a': {'x': float('inf'), 'y': [float('nan'), 2]},
+                           'b': float('-inf')})
+        over = Configs.diff(original, changed)
+
+        over.dump(self.filename)
+        restored = Configs.from_override_file(self.filename)
+        self.assertEqual(restored['a']['x'], float('inf'))
+        self.assertNotEqual(restored['a']['y'][0], restored['a']['y'][0])
+        self.assertEqual(restored['b'], float('-inf'))
+
+        writer = OverridesWriter(self.filename, window=0)
+        writer.submit(Configs({'a': {'x': float('nan')}}))
+        writer.close()
+        restored = Configs.from_override_file(self.filename)
+        self.assertNotEqual(restored['a']['x'], restored['a']['x'])
+
+    def test_atomic_dump_keeps_mode(self):
+        Configs({'a': 1}).dump(self.filename)
+        os.chmod(self.filename, 0o666)
+        Configs({'a': 2}).dump(self.filename)
+        self.assertEqual(os.stat(self.filename).st_mode & 0o777, 0o666)
+        self.assertEqual(os.listdir(self.tmp_dir), ["overrides.json"])
+
+    def test_read_only_directory(self):
+        Configs({'a': 1}).dump(self.filename)
+        with mock.patch('os.access', return_value=False):
+            with self.assertLogs('json_override_test_assignment._writer',
+                                 'WARNING'):
+                atomic_write(self.filename, '{"a": 2}')
+            with self.assertRaises(PermissionError):
+                atomic_write(self.filename, '{"a": 3}', in_place=False)
+            snapshot = f"{self.tmp_dir}/configs.snap"
+            with self.assertRaises(PermissionError):
+                write_snapshot(Configs({'a': 1}), snapshot)
+        with open(self.filename) as f:
+            self.assertEqual(json.load(f), {'a': 2})
+        self.assertEqual(os.listdir(self.tmp_dir), ["overrides.json"])